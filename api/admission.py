@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+# Custo relativo de cada modo (≈ tempo de CPU de um clipe de 5 s: vetoriais 4–5 ms,
+# mfcc_matrix ~6 ms, health_matrix ~14 ms com YIN). Sobrescreva com ADMISSION_WEIGHTS.
+DEFAULT_WEIGHTS = {
+    "mfcc": 1,
+    "logmel": 1,
+    "bio_mean144": 1,
+    "bio_mm72": 1,
+    "mfcc_matrix": 2,
+    "health_matrix": 3,
+}
+
+# Lidas pelas bibliotecas nativas ao carregar (as já carregadas são limitadas via threadpoolctl)
+NATIVE_THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS")
+
+ADMITTED, REJECTED, TIMED_OUT = "admitted", "rejected", "timeout"
+
+
+class Overloaded(Exception):
+    """
+    Extração recusada pelo controle de admissão: fila cheia (429) ou espera acima do limite (503).
+    A rota responde `status` com Retry-After = `retry_after`.
+    """
+
+    def __init__(self, message: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_weights(raw: str) -> Dict[str, int]:
+    """"health_matrix=4,mfcc=1" sobre DEFAULT_WEIGHTS; pesos inteiros >= 1."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in (raw or "").split(","):
+        if not item.strip():
+            continue
+        mode, _, value = item.partition("=")
+        try:
+            w = int(value)
+        except ValueError:
+            raise ValueError(f"invalid admission weight: {item!r} (use mode=int)")
+        if w < 1:
+            raise ValueError(f"admission weight must be >= 1: {item!r}")
+        weights[mode.strip().lower()] = w
+    return weights
+
+
+def native_threads(setting: str, workers: int, capacity: int) -> int:
+    """
+    Threads das bibliotecas nativas (BLAS/OpenMP) por extração. "auto": os núcleos divididos
+    entre as extrações simultâneas do nó (workers × capacity), no mínimo 1; "0": não limita.
+    """
+    setting = (setting or "auto").strip().lower()
+    if setting != "auto":
+        return max(0, int(setting))
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(1, cpus // max(1, workers * max(1, capacity)))
+
+
+def pin_native_threads(n: int) -> None:
+    """
+    Limita os pools de threads nativos deste processo a `n` (0 = não mexe): threadpoolctl nas
+    bibliotecas já carregadas e variáveis de ambiente (sem sobrescrever as definidas) nas que
+    ainda vão carregar. Chamado em create_app e no post_fork do gunicorn (cada worker).
+    """
+    if n <= 0:
+        return
+    for var in NATIVE_THREAD_ENV:
+        os.environ.setdefault(var, str(n))
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=n)
+
+
+class Governor:
+    """
+    Limite de extrações em andamento por worker, ponderado pelo custo do modo.
+
+    Cada extração ocupa `weight` unidades de `capacity` (um peso maior que a capacidade vale a
+    capacidade: roda sozinha). Quem não cabe espera numa fila FIFO de até `max_queue` pedidos:
+    com a fila cheia a recusa é imediata (429); passados `timeout` segundos na fila, 503.
+    Esperas "unbounded" (jobs em background) não têm limite de tempo nem são recusadas.
+    `observe(label, outcome, seconds)` recebe o tempo de fila de cada pedido.
+    capacity=0 desliga o controle (admit não espera).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_queue: int = 16,
+        timeout: float = 10.0,
+        retry_after: int = 2,
+        weights: Optional[Dict[str, int]] = None,
+        observe: Optional[Callable[[str, str, float], None]] = None,
+    ):
+        self.capacity = max(0, int(capacity))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = float(timeout)
+        self.retry_after = int(retry_after)
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.observe = observe
+        self.in_flight = 0
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self.counts = {ADMITTED: 0, REJECTED: 0, TIMED_OUT: 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def weight(self, modes: Iterable[str]) -> int:
+        """Peso de um pedido: soma dos modos (multi-modo), limitada à capacidade."""
+        w = sum(self.weights.get(m, 1) for m in modes)
+        return max(1, min(w, self.capacity)) if self.enabled else 0
+
+    @contextmanager
+    def admit(self, weight: int, label: str = "", bounded: bool = True) -> Iterator[float]:
+        """Ocupa `weight` unidades durante o bloco; devolve o tempo de espera na fila (s)."""
+        if not self.enabled:
+            yield 0.0
+            return
+        t0 = time.monotonic()
+        ticket = object()
+        outcome, error = ADMITTED, None
+        with self._cond:
+            if self._queue or self.in_flight + weight > self.capacity:
+                if bounded and len(self._queue) >= self.max_queue:
+                    outcome = REJECTED
+                    error = Overloaded("server busy: admission queue is full", 429, self.retry_after)
+                else:
+                    self._queue.append(ticket)
+                    deadline = t0 + self.timeout if bounded else None
+                    try:
+                        while self._queue[0] is not ticket or self.in_flight + weight > self.capacity:
+                            remaining = None if deadline is None else deadline - time.monotonic()
+                            if remaining is not None and remaining <= 0:
+                                outcome = TIMED_OUT
+                                error = Overloaded(
+                                    f"server busy: no extraction slot within {self.timeout:g}s", 503, self.retry_after
+                                )
+                                break
+                            self._cond.wait(remaining)
+                    finally:
+                        self._queue.remove(ticket)
+                        self._cond.notify_all()  # o próximo da fila pode caber agora
+            if error is None:
+                self.in_flight += weight
+            waited = 0.0 if outcome == REJECTED else time.monotonic() - t0
+            self.counts[outcome] += 1
+        # fora do lock: observe pode gravar métricas em disco (fsync) e não deve segurar a fila
+        if self.observe is not None:
+            self.observe(label, outcome, waited)
+        if error is not None:
+            raise error
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self.in_flight -= weight
+                self._cond.notify_all()
+
+    def info(self) -> Dict[str, int]:
+        with self._cond:
+            return {"capacity": self.capacity, "in_flight": self.in_flight, "queued": len(self._queue),
+                    "max_queue": self.max_queue, **self.counts}
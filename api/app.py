@@ -1,25 +1,40 @@
-import os
+import io
+import logging
+import threading
 import time
-import uuid
-from typing import Tuple, Dict, Any
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Tuple, Dict, Any, List, Optional
+import numpy as np
+from flask import Flask, Request, request, jsonify
 from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
+from .admission import Governor, Overloaded, native_threads, parse_weights, pin_native_threads
+from .cache import ResultCache, cache_key, hash_upload
 from .config import Config
+from .jobs import DONE, JobManager, QueueFull
+from .metrics import StageMetrics
+from .encoders import (
+    encode_json, encode_msgpack, encode_ndjson, encode_npy, encode_raw, matrix_records, negotiate_format, output_array,
+    pack_array,
+)
 
-# Extratores existentes
-from voiceprint_features_144 import extract_mfcc_144, extract_logmel_144
-# Novos modos estruturais (sem variância temporal)
-from voiceprint_features_144.biometric144 import extract_biometric_144
-# Novo modo MFCC em matriz (sem resumo estatístico)
-from voiceprint_features_144.extract_mfcc_matrix import extract_mfcc_matrix
-# Modo saúde temporal (log-mel/pcen + deltas + pitch/energia)
-from voiceprint_features_144.extract_health_matrix import extract_health_matrix
+# Extratores (mfcc, logmel, bio_*, mfcc_matrix, health_matrix) via registro de modos
+from voiceprint_features_144.analysis import AudioAnalysis
+from voiceprint_features_144.modes import ALL_MODES, MATRIX_MODES, MATRIX_DEFAULTS, PCEN_MODES, VECTOR_MODES, extract_mode
+from voiceprint_features_144.common_adaptive import fit_frames
+from voiceprint_features_144.dsp import get_engine, set_engine
+from voiceprint_features_144.index import EmbeddingIndex
+from voiceprint_features_144.realtime import LIVE_LAYOUTS, LIVE_SUMMARIES, LiveExtractor
+from voiceprint_features_144.resample import RESAMPLERS, check_resampler
+from voiceprint_features_144.pitch import PITCH_ESTIMATORS, check_pitch
+from voiceprint_features_144.warmup import warmup
+from voiceprint_features_144.timing import StageTimer, collect_timings, stage
 
 
 # ---------- Helpers puros (reduzem complexidade da rota) ----------
 
-ALLOWED_MODES = {"mfcc", "logmel", "bio_mean144", "bio_mm72", "mfcc_matrix", "health_matrix"}
+ALLOWED_MODES = set(ALL_MODES)
 
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in Config.ALLOWED_EXTENSIONS
@@ -40,140 +55,1018 @@ def get_request_params() -> Tuple[str, bool, bool]:
     down16k = (request.args.get("down16k") or Config.DEFAULT_DOWN16K) == "1"
     return mode, pcen, down16k
 
-def save_uploaded_wav(file: FileStorage, upload_dir: str) -> str:
-    """Valida extensão e salva com nome único; retorna caminho salvo."""
+def get_resampler() -> str:
+    """Lê ?resampler= (default Config.DEFAULT_RESAMPLER); motor desconhecido gera ValueError."""
+    return check_resampler(request.args.get("resampler") or Config.DEFAULT_RESAMPLER)
+
+def get_pitch() -> str:
+    """Lê ?pitch= (default Config.DEFAULT_PITCH); estimador desconhecido gera ValueError."""
+    return check_pitch(request.args.get("pitch") or Config.DEFAULT_PITCH)
+
+def get_vad() -> bool:
+    """Lê ?vad=0|1 (default Config.DEFAULT_VAD): descarta quadros sem voz nos modos vetoriais."""
+    return (request.args.get("vad") or Config.DEFAULT_VAD) == "1"
+
+class SpooledUploadRequest(Request):
+    """
+    Uploads ficam em memória até Config.UPLOAD_SPOOL_MAX_BYTES (o werkzeug passa para
+    arquivo temporário a partir de 500 KB); acima do limite, o spool vira um arquivo
+    temporário anônimo, que o SO descarta mesmo se o worker morrer.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MAX_BYTES, mode="rb+")
+
+def open_uploaded_wav(file: FileStorage) -> BinaryIO:
+    """Valida extensão e devolve o stream do upload (rebobinado) para decodificar direto dele."""
     if file.filename == "":
         raise ValueError("empty filename")
     if not allowed_file(file.filename):
         raise ValueError("unsupported file type, only .wav allowed")
+    file.stream.seek(0)
+    return file.stream
 
-    os.makedirs(upload_dir, exist_ok=True)
-    base = secure_filename(file.filename)
-    ext = os.path.splitext(base)[1].lower() or ".wav"
-    unique = f"{os.path.splitext(base)[0]}__{uuid.uuid4().hex}{ext}"
-    path = os.path.join(upload_dir, unique)
-    file.save(path)
-    return path
-
-def run_extractor(path: str, mode: str, pcen: bool, down16k: bool) -> Tuple[list, int, Tuple[int, int], str, bool]:
-    """
-    Executa o extrator escolhido e retorna:
-      (features, sr, band, mode_final, pcen_final)
-    """
-    if mode == "logmel":
-        vec, sr, band = extract_logmel_144(path, use_pcen=pcen, force_down_to_16k=down16k)
-        return vec.tolist(), int(sr), (int(band[0]), int(band[1])), "logmel", bool(pcen)
-
-    if mode == "bio_mean144":
-        # Log-Mel 144 bandas + média (144D “estrutural” puro)
-        vec, sr, band = extract_biometric_144(path, mode="mean144", use_pcen=pcen, force_down_to_16k=down16k)
-        return vec.tolist(), int(sr), (int(band[0]), int(band[1])), "bio_mean144", bool(pcen)
-
-    if mode == "bio_mm72":
-        # Log-Mel 72 bandas + [média, mediana] (144D, ainda sem variância)
-        vec, sr, band = extract_biometric_144(path, mode="mean_median_72", use_pcen=pcen, force_down_to_16k=down16k)
-        return vec.tolist(), int(sr), (int(band[0]), int(band[1])), "bio_mm72", bool(pcen)
-    if mode == "mfcc_matrix":
-        # Parâmetros opcionais via query string
-        try:
-            n_frames = int(request.args.get("n_frames", 20000))
-            fmin = int(request.args.get("fmin", 100))
-            fmax = int(request.args.get("fmax", 7000))
-        except Exception:
-            raise ValueError("n_frames, fmin ou fmax inválidos")
-
-        mat, sr, band = extract_mfcc_matrix(path, target_frames=n_frames, fmin=fmin, fmax=fmax)
-        return mat.tolist(), int(sr), (int(band[0]), int(band[1])), "mfcc_matrix", False
+def get_matrix_params(mode: str) -> Tuple[int, int, int, bool]:
+    """Lê n_frames/fmin/fmax/pad da query string com os defaults do modo temporal."""
+    d_frames, d_fmin, d_fmax = MATRIX_DEFAULTS[mode]
+    try:
+        n_frames = int(request.args.get("n_frames", d_frames))
+        fmin = int(request.args.get("fmin", d_fmin))
+        fmax = int(request.args.get("fmax", d_fmax))
+    except Exception:
+        raise ValueError("n_frames, fmin ou fmax inválidos")
+    pad = (request.args.get("pad") or "1") == "1"
+    return n_frames, fmin, fmax, pad
 
-    if mode == "health_matrix":
-        try:
-            n_frames = int(request.args.get("n_frames", 400))
-            fmin = int(request.args.get("fmin", 100))
-            fmax = int(request.args.get("fmax", 7200))
-        except Exception:
-            raise ValueError("n_frames, fmin ou fmax inválidos")
-
-        mat, sr, band = extract_health_matrix(
-            path,
-            target_frames=n_frames,
-            use_pcen=pcen,
-            force_down_to_16k=down16k,
-            fmin=fmin,
-            fmax=fmax,
+def run_extractor(
+    source,
+    mode: str,
+    pcen: bool,
+    down16k: bool,
+    resampler: Optional[str] = None,
+    matrix: Optional[Tuple[int, int, int, bool]] = None,
+    pitch: Optional[str] = None,
+    vad: bool = False,
+) -> Dict[str, Any]:
+    """
+    Executa o extrator escolhido e retorna um dict com:
+      features (np.ndarray), sr, band, mode, pcen e, nos modos temporais, n_valid_frames.
+    `source` pode ser o stream do upload, o caminho do .wav ou um AudioAnalysis compartilhado entre modos.
+    `matrix` = (n_frames, fmin, fmax, pad) já lidos; sem ele, vêm da query string da requisição atual.
+    `pitch` = estimador de F0 do health_matrix (ignorado nos demais modos).
+    `vad` = descarta quadros sem voz nos modos vetoriais e acrescenta voiced_fraction ao resultado.
+    """
+    result: Dict[str, Any] = {}
+    if mode in MATRIX_MODES:
+        n_frames, fmin, fmax, pad = matrix or get_matrix_params(mode)
+        if mode == "mfcc_matrix":
+            # mfcc_matrix sempre trabalhou em 16 kHz (não expõe down16k)
+            down16k = True
+        # Extrai só os quadros válidos; o padding (pad=1) é só para a resposta
+        feats, sr, band = extract_mode(
+            source, mode, use_pcen=pcen, force_down_to_16k=down16k,
+            n_frames=n_frames, fmin=fmin, fmax=fmax, pad=False, resampler=resampler, pitch=pitch,
         )
-        return mat.tolist(), int(sr), (int(band[0]), int(band[1])), "health_matrix", bool(pcen)
+        result["n_valid_frames"] = int(feats.shape[0])
+        if pad:
+            feats = fit_frames(feats, n_frames, pad=True)
+    elif vad:
+        # o AudioAnalysis fica aqui para ler a fração de quadros com voz depois do extrator
+        if not isinstance(source, AudioAnalysis):
+            source = AudioAnalysis.from_file(source, force_down_to_16k=down16k, resampler=resampler)
+        feats, sr, band = extract_mode(source, mode, use_pcen=pcen, vad=True)
+        result["voiced_fraction"] = round(source.voiced_fraction, 4)
+    else:
+        feats, sr, band = extract_mode(source, mode, use_pcen=pcen, force_down_to_16k=down16k, resampler=resampler)
+    result.update({
+        "features": feats,
+        "sr": int(sr),
+        "band": (int(band[0]), int(band[1])),
+        "mode": mode,
+        "pcen": bool(pcen) and mode in PCEN_MODES,
+    })
+    return result
+
+def get_request_modes() -> List[str]:
+    """
+    Lê ?modes=mfcc,logmel,... (multi-modo). Retorna [] quando não informado.
+    Modos desconhecidos geram ValueError.
+    """
+    raw = request.args.get("modes")
+    if not raw:
+        return []
+    modes = []
+    for m in raw.split(","):
+        m = m.strip().lower()
+        if not m:
+            continue
+        if m not in ALLOWED_MODES:
+            raise ValueError(f"unknown mode: {m}")
+        if m not in modes:
+            modes.append(m)
+    if not modes:
+        raise ValueError("modes is empty")
+    return modes
 
-    # default: mfcc (com Δ/ΔΔ + stats → 144D)
-    vec, sr, band = extract_mfcc_144(path, force_down_to_16k=down16k)
-    return vec.tolist(), int(sr), (int(band[0]), int(band[1])), "mfcc", False
+def _mode_meta(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadados por modo (sem as features)."""
+    meta = {
+        "band": [result["band"][0], result["band"][1]],
+        "pcen": result["pcen"],
+        "shape": list(result["features"].shape),
+    }
+    for extra in ("n_valid_frames", "voiced_fraction"):
+        if extra in result:
+            meta[extra] = result[extra]
+    return meta
 
-def build_payload(features: list, sr: int, band: Tuple[int, int], mode: str, pcen: bool,
-                  down16k: bool, latency_ms: int) -> Dict[str, Any]:
-    shape = [len(features), len(features[0])] if isinstance(features[0], list) else [144]
+def run_multi_extractor(
+    source,
+    modes: List[str],
+    pcen: bool,
+    down16k: bool,
+    resampler: Optional[str] = None,
+    matrix: Optional[Dict[str, Tuple[int, int, int, bool]]] = None,
+    pitch: Optional[str] = None,
+    vad: bool = False,
+) -> Dict[str, Any]:
+    """
+    Extrai todos os `modes` com um único decode/resample/STFT (AudioAnalysis compartilhado).
+    Retorna {"sr": ..., "results": {modo: {...}}}.
+    mfcc_matrix é sempre extraído em 16 kHz, como no modo único: com down16k=0 e sr > 16k ele
+    reamostra as amostras já decodificadas numa análise própria (sem novo decode).
+    """
+    analysis = AudioAnalysis.from_file(source, force_down_to_16k=down16k, resampler=resampler)
+    matrix = matrix or {}
+    results = {}
+    for m in modes:
+        src = (analysis.y, analysis.sr) if m == "mfcc_matrix" and analysis.sr > 16000 else analysis
+        results[m] = run_extractor(src, m, pcen, down16k, resampler, matrix.get(m), pitch, vad)
+    return {"sr": int(analysis.sr), "results": results}
+
+def parse_extract_request() -> Dict[str, Any]:
+    """
+    Lê e valida os parâmetros de extração da requisição atual (ValueError -> 400).
+    O dict resultante não depende do contexto da requisição (pode ir para um job em background).
+    """
+    mode, pcen, down16k = get_request_params()
+    modes = get_request_modes()
     return {
-        "sr": sr,
-        "band": [band[0], band[1]],
         "mode": mode,
+        "modes": modes,
         "pcen": pcen,
+        "down16k": down16k,
+        "resampler": get_resampler(),
+        "matrix": {m: get_matrix_params(m) for m in (modes or [mode]) if m in MATRIX_MODES},
+        "pitch": get_pitch(),
+        "vad": get_vad(),
+        "timings": request.args.get("timings") == "1",
+    }
+
+def get_response_format(spec: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Formato (?format= / Accept) e dtype (?dtype=) da resposta para a extração `spec`; ValueError -> 400.
+    ndjson (linhas em streaming) só existe nos modos temporais de um modo só.
+    """
+    fmt = negotiate_format(request.args, request.accept_mimetypes)
+    dtype = request.args.get("dtype")
+    if dtype not in (None, "", "float32", "float16"):
+        raise ValueError("dtype must be float32 or float16")
+    if spec["modes"] and fmt not in ("json", "msgpack"):
+        raise ValueError(f"format {fmt} supports a single mode; use json or msgpack with modes=")
+    if fmt == "ndjson" and spec["mode"] not in MATRIX_MODES:
+        raise ValueError(f"format ndjson streams frame rows: use it with {' or '.join(MATRIX_MODES)}")
+    return fmt, dtype
+
+def compute_result(source, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Extração descrita por `spec` (parse_extract_request): resultado de um modo ou multi-modo."""
+    if spec["modes"]:
+        return run_multi_extractor(
+            source, spec["modes"], spec["pcen"], spec["down16k"], spec["resampler"], spec["matrix"], spec["pitch"],
+            spec["vad"],
+        )
+    mode = spec["mode"]
+    return run_extractor(
+        source, mode, spec["pcen"], spec["down16k"], spec["resampler"], spec["matrix"].get(mode), spec["pitch"],
+        spec["vad"],
+    )
+
+def build_payload(result: Dict[str, Any], down16k: bool, latency_ms: int) -> Dict[str, Any]:
+    """Metadados da resposta de um modo; as features são anexadas pelo encoder escolhido."""
+    meta = _mode_meta(result)
+    payload = {
+        "sr": result["sr"],
+        "band": meta.pop("band"),
+        "mode": result["mode"],
+        "pcen": meta.pop("pcen"),
         "down16k": bool(down16k),
-        "shape": shape,
-        "features": features,
+    }
+    payload.update(meta)
+    payload["latency_ms"] = latency_ms
+    return payload
+
+def _with_sr(meta: Dict[str, Any], result: Dict[str, Any], shared_sr: int) -> Dict[str, Any]:
+    """Acrescenta o sr do modo quando difere do sr comum (mfcc_matrix em 16 kHz com down16k=0)."""
+    if result["sr"] != shared_sr:
+        meta["sr"] = result["sr"]
+    return meta
+
+def build_multi_payload(multi: Dict[str, Any], modes: List[str], down16k: bool, latency_ms: int) -> Dict[str, Any]:
+    return {
+        "sr": multi["sr"],
+        "modes": modes,
+        "down16k": bool(down16k),
+        "results": {m: _with_sr(_mode_meta(r), r, multi["sr"]) for m, r in multi["results"].items()},
         "latency_ms": latency_ms,
     }
 
+def cache_params(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parâmetros que determinam o resultado, normalizados para a chave do cache:
+    pcen só conta nos modos PCEN, pitch só no health_matrix, vad só nos modos vetoriais e
+    mfcc_matrix é sempre extraído em 16 kHz (também no multi-modo, ver run_multi_extractor):
+    down16k só deixa de contar quando todos os modos são mfcc_matrix. O motor de DSP entra na chave (os motores
+    concordam só dentro das tolerâncias de tests/test_engine.py).
+    """
+    modes = spec["modes"] or [spec["mode"]]
+    params: Dict[str, Any] = {
+        "modes": modes,
+        "multi": bool(spec["modes"]),
+        "pcen": bool(spec["pcen"]) and any(m in PCEN_MODES for m in modes),
+        "down16k": bool(spec["down16k"]) or all(m == "mfcc_matrix" for m in modes),
+        "resampler": spec["resampler"],
+        "engine": get_engine(),
+    }
+    for m, values in spec["matrix"].items():
+        params[m] = list(values)
+    if "health_matrix" in modes:
+        params["pitch"] = spec["pitch"]
+    if any(m in VECTOR_MODES for m in modes):
+        params["vad"] = bool(spec["vad"])
+    return params
+
+def etag_for(key: str, fmt: str, dtype: Optional[str]) -> str:
+    """ETag forte da representação: mesmo conteúdo/parâmetros + mesmo formato/dtype."""
+    rep = f"{fmt}-f16" if fmt != "json" and dtype == "float16" else fmt
+    return f"{key[:32]}-{rep}"
+
+def timings_block(timer: StageTimer) -> Dict[str, Any]:
+    """Bloco `timings` do payload (?timings=1): tempo próprio de cada estágio até aqui, em ms."""
+    return {"stages_ms": timer.as_ms(), "total_ms": round(timer.total() * 1000.0, 3)}
+
+def server_timing(timer: StageTimer) -> str:
+    """Header Server-Timing com os estágios (inclui encode; vale também para npy/raw)."""
+    return ", ".join(f"{name};dur={ms}" for name, ms in timer.as_ms().items())
+
+def metrics_labels(spec: Dict[str, Any], timer: StageTimer) -> Tuple[str, str]:
+    """Labels (mode, sr) dos histogramas: modos unidos por '+' e sr de entrada ('unknown' em acerto do cache)."""
+    mode = "+".join(spec["modes"]) if spec["modes"] else spec["mode"]
+    return mode, str(timer.notes.get("orig_sr", "unknown"))
+
+def json_payload(
+    value: Dict[str, Any], spec: Dict[str, Any], latency_ms: int, timings: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Payload JSON completo (features como listas) de um resultado de compute_result."""
+    if spec["modes"]:
+        payload = build_multi_payload(value, spec["modes"], spec["down16k"], latency_ms)
+        for m, r in value["results"].items():
+            payload["results"][m]["features"] = r["features"].tolist()
+    else:
+        payload = {**build_payload(value, spec["down16k"], latency_ms), "features": value["features"].tolist()}
+    if timings is not None:
+        payload["timings"] = timings
+    return payload
+
+def job_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro de job como visto pelo cliente (sem os parâmetros internos)."""
+    spec = record["meta"]
+    view = {k: record[k] for k in ("id", "status", "created_at", "started_at", "finished_at")}
+    view.update({"modes": spec["modes"]} if spec["modes"] else {"mode": spec["mode"]})
+    if record["error"]:
+        view["error"] = record["error"]
+    return view
+
+def encode_single(payload: Dict[str, Any], features: np.ndarray, fmt: str, dtype: Optional[str]):
+    """Serializa a resposta de um modo em npy, raw ou msgpack (json e ndjson ficam em encode_result)."""
+    arr = output_array(features, dtype)
+    if fmt == "npy":
+        return encode_npy(payload, arr)
+    if fmt == "raw":
+        return encode_raw(payload, arr)
+    return encode_msgpack({**payload, "features": pack_array(arr)})
+
+def encode_multi(payload: Dict[str, Any], multi: Dict[str, Any], fmt: str, dtype: Optional[str]):
+    """Multi-modo em msgpack (buffers por modo; json fica em encode_result); npy/raw só carregam um array."""
+    if fmt != "msgpack":
+        raise ValueError(f"format {fmt} supports a single mode; use json or msgpack with modes=")
+    for m, r in multi["results"].items():
+        payload["results"][m]["features"] = pack_array(output_array(r["features"], dtype))
+    return encode_msgpack(payload)
+
+def encode_result(
+    value: Dict[str, Any],
+    spec: Dict[str, Any],
+    latency_ms: int,
+    fmt: str,
+    dtype: Optional[str],
+    timings: Optional[Dict[str, Any]] = None,
+):
+    """
+    Monta o payload (um modo ou multi-modo) de um resultado de compute_result e serializa em `fmt`.
+    `timings` entra no payload json/msgpack e no cabeçalho ndjson; npy/raw só levam metadados
+    escalares nos headers. ndjson devolve uma resposta em streaming (matrix_records).
+    """
+    if fmt == "json":
+        return encode_json(json_payload(value, spec, latency_ms, timings))
+    if fmt == "ndjson":
+        payload = build_payload(value, spec["down16k"], latency_ms)
+        if timings is not None:
+            payload["timings"] = timings
+        return encode_ndjson(matrix_records(payload, value["features"], Config.STREAM_CHUNK_ROWS))
+    if spec["modes"]:
+        payload = build_multi_payload(value, spec["modes"], spec["down16k"], latency_ms)
+        if timings is not None:
+            payload["timings"] = timings
+        return encode_multi(payload, value, fmt, dtype)
+    payload = build_payload(value, spec["down16k"], latency_ms)
+    if timings is not None and fmt == "msgpack":
+        payload["timings"] = timings
+    return encode_single(payload, value["features"], fmt, dtype)
+
+BATCH_FORMATS = ("json", "msgpack", "ndjson")
+
+def get_batch_files() -> List[FileStorage]:
+    """Campos 'file' do lote: ao menos um e no máximo Config.BATCH_MAX_FILES."""
+    files = request.files.getlist("file")
+    if not files:
+        raise ValueError("missing file field 'file'")
+    if len(files) > Config.BATCH_MAX_FILES:
+        raise ValueError(f"too many files: {len(files)} (max {Config.BATCH_MAX_FILES})")
+    return files
+
+def get_batch_format(n_files: int) -> Tuple[str, Optional[str]]:
+    """
+    Formato (?format= / Accept) e dtype da resposta do lote: json | msgpack (um documento com as
+    features empilhadas) ou ndjson (uma linha por arquivo, em streaming). Sem ?format=, uma
+    resposta JSON vira ndjson acima de Config.BATCH_STREAM_MIN_FILES arquivos.
+    """
+    fmt = negotiate_format(request.args, request.accept_mimetypes)
+    if fmt not in BATCH_FORMATS:
+        raise ValueError(f"unsupported batch format: {fmt} (use one of {', '.join(BATCH_FORMATS)})")
+    if fmt == "json" and not request.args.get("format") and n_files > Config.BATCH_STREAM_MIN_FILES:
+        fmt = "ndjson"
+    dtype = request.args.get("dtype")
+    if dtype not in (None, "", "float32", "float16"):
+        raise ValueError("dtype must be float32 or float16")
+    return fmt, dtype
+
+def batch_header(spec: Dict[str, Any], n_files: int) -> Dict[str, Any]:
+    """Parâmetros comuns a todos os arquivos do lote."""
+    mode = spec["mode"]
+    header = {
+        "mode": mode,
+        "pcen": bool(spec["pcen"]) and mode in PCEN_MODES,
+        "down16k": bool(spec["down16k"]),
+        "n_files": n_files,
+    }
+    if mode in MATRIX_MODES:
+        header["n_frames"], _, _, header["pad"] = spec["matrix"][mode]
+    return header
+
+def batch_entry(index: int, filename: str, value: Optional[Dict[str, Any]], hit: bool, error: Optional[str]) -> Dict[str, Any]:
+    """Status de um arquivo do lote (sem as features): ok com sr/band/shape... ou error com a mensagem."""
+    entry: Dict[str, Any] = {"index": index, "filename": filename}
+    if error is not None:
+        entry.update(status="error", error=error)
+        return entry
+    meta = _mode_meta(value)
+    meta.pop("pcen")
+    entry.update(status="ok", sr=value["sr"], cache="HIT" if hit else "MISS", **meta)
+    return entry
+
+# PCM cru aceito por /api/v1/live (little-endian, canais intercalados)
+LIVE_ENCODINGS = {"s16le": np.dtype("<i2"), "f32le": np.dtype("<f4")}
+
+def get_live_params() -> Dict[str, Any]:
+    """
+    Query de /api/v1/live: sr (obrigatório), encoding=s16le|f32le, channels, layout=health_matrix|
+    mfcc_matrix, summary=mfcc|logmel, pcen, down16k, resampler, pitch (yin|acf).
+    """
+    try:
+        sr = int(request.args.get("sr", ""))
+        channels = int(request.args.get("channels", "1"))
+    except ValueError:
+        raise ValueError("sr and channels must be integers")
+    if not 8000 <= sr <= 192000:
+        raise ValueError("sr must be between 8000 and 192000")
+    if not 1 <= channels <= 8:
+        raise ValueError("channels must be between 1 and 8")
+    encoding = (request.args.get("encoding") or "s16le").strip().lower()
+    if encoding not in LIVE_ENCODINGS:
+        raise ValueError(f"unsupported encoding: {encoding} (use one of {', '.join(LIVE_ENCODINGS)})")
+    layout = (request.args.get("layout") or "health_matrix").strip().lower()
+    if layout not in LIVE_LAYOUTS:
+        raise ValueError(f"unsupported layout: {layout} (use one of {', '.join(LIVE_LAYOUTS)})")
+    summary = (request.args.get("summary") or "mfcc").strip().lower()
+    if summary not in LIVE_SUMMARIES:
+        raise ValueError(f"unsupported summary: {summary} (use one of {', '.join(LIVE_SUMMARIES)})")
+    _, pcen, down16k = get_request_params()
+    return {
+        "sr": sr, "channels": channels, "encoding": encoding, "layout": layout, "summary": summary,
+        "pcen": pcen, "down16k": down16k, "resampler": get_resampler(), "pitch": get_pitch(),
+    }
+
+def index_spec() -> Dict[str, Any]:
+    """
+    Extração usada no índice de locutores (enroll/identify), fixa pelo Config: todas as linhas
+    do índice precisam vir do mesmo modo/parâmetros para o cosseno fazer sentido.
+    """
+    mode = Config.INDEX_MODE.strip().lower()
+    if mode not in VECTOR_MODES:
+        raise ValueError(f"INDEX_MODE must be a vector mode ({', '.join(VECTOR_MODES)}), got {mode!r}")
+    return {
+        "mode": mode,
+        "modes": [],
+        "pcen": Config.DEFAULT_PCEN == "1",
+        "down16k": True,
+        "resampler": check_resampler(Config.DEFAULT_RESAMPLER),
+        "matrix": {},
+        "pitch": None,
+        "vad": Config.INDEX_VAD == "1",
+        "timings": False,
+    }
+
+def index_tag(spec: Dict[str, Any]) -> str:
+    """Configuração gravada no índice; abrir o mesmo INDEX_DIR com outra gera ValueError."""
+    params = cache_params(spec)
+    return ";".join(f"{k}={params[k]}" for k in ("modes", "pcen", "down16k", "resampler", "vad"))
+
+def get_speaker(raw: Optional[str]) -> str:
+    """Id do locutor (?speaker=): não vazio, até 128 caracteres."""
+    speaker = (raw or "").strip()
+    if not speaker:
+        raise ValueError("missing speaker id (?speaker=)")
+    if len(speaker) > 128:
+        raise ValueError("speaker id longer than 128 characters")
+    return speaker
+
+def get_top_k() -> int:
+    """Lê ?k= (default Config.INDEX_TOP_K), entre 1 e Config.INDEX_MAX_K."""
+    try:
+        k = int(request.args.get("k", Config.INDEX_TOP_K))
+    except ValueError:
+        raise ValueError("k must be an integer")
+    if not 1 <= k <= Config.INDEX_MAX_K:
+        raise ValueError(f"k must be between 1 and {Config.INDEX_MAX_K}")
+    return k
+
+class Readiness:
+    """Estado do aquecimento do worker: /health só responde 200 depois de `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            all_variants = Config.WARMUP_ALL == "1"
+            resamplers = RESAMPLERS if all_variants else (Config.DEFAULT_RESAMPLER,)
+            if get_engine() == "numpy":
+                # kaiser_best traz resampy + numba: sem librosa, só é carregado se for pedido
+                resamplers = [r for r in resamplers if r != "kaiser_best" or r == Config.DEFAULT_RESAMPLER]
+            warmup(
+                resamplers=resamplers,
+                pitches=PITCH_ESTIMATORS if all_variants else (Config.DEFAULT_PITCH,),
+            )
+        except Exception as e:
+            # aquecimento é só otimização: o worker fica pronto mesmo assim
+            self.error = f"{type(e).__name__}: {e}"
+            logging.getLogger(__name__).warning("warm-up failed: %s", self.error)
+        self.seconds = round(time.perf_counter() - t0, 3)
+        self.done.set()
+
+    def start(self, mode: str) -> None:
+        """mode: "background" (thread), "sync" (aqui mesmo) ou "0" (pronto sem aquecer)."""
+        if mode == "sync":
+            self.run()
+        elif mode == "background":
+            threading.Thread(target=self.run, name="voiceprint-warmup", daemon=True).start()
+        else:
+            self.done.set()
+
 
 # ---------- App Factory (WSGI-friendly) ----------
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.request_class = SpooledUploadRequest
     app.config.from_object(Config)
     app.config["MAX_CONTENT_LENGTH"] = Config.MAX_CONTENT_LENGTH
-    os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
+    # motor de DSP do processo (librosa | numpy), antes do aquecimento
+    set_engine(Config.FEATURE_ENGINE)
+    cache = ResultCache(Config.RESULT_CACHE_MAX_BYTES, Config.RESULT_CACHE_DIR, Config.RESULT_CACHE_DISK_MAX_BYTES)
+    app.extensions["result_cache"] = cache
+    jobs = JobManager(
+        Config.JOB_DIR, Config.JOB_WORKERS, Config.JOB_MAX_PENDING, Config.JOB_TTL_SECONDS, Config.JOB_ORPHAN_TTL_SECONDS
+    )
+    app.extensions["jobs"] = jobs
+    metrics = StageMetrics(Config.STAGE_METRICS == "1", Config.METRICS_DIR)
+    app.extensions["stage_metrics"] = metrics
+    readiness = Readiness()
+    app.extensions["readiness"] = readiness
+    readiness.start(Config.WARMUP)
+    # threads de extração dos lotes, comuns a todas as requisições deste worker
+    batch_pool = ThreadPoolExecutor(max_workers=max(1, Config.BATCH_CONCURRENCY), thread_name_prefix="voiceprint-batch")
+    app.extensions["batch_pool"] = batch_pool
+    # extrações simultâneas ponderadas pelo custo do modo + threads nativas de cada uma
+    governor = Governor(
+        Config.ADMISSION_MAX_WEIGHT, Config.ADMISSION_MAX_QUEUE, Config.ADMISSION_QUEUE_TIMEOUT_S,
+        Config.ADMISSION_RETRY_AFTER, parse_weights(Config.ADMISSION_WEIGHTS), metrics.observe_queue_wait,
+    )
+    app.extensions["governor"] = governor
+    app.extensions["native_threads"] = native_threads(
+        Config.NATIVE_THREADS, Config.GUNICORN_WORKERS, Config.ADMISSION_MAX_WEIGHT
+    )
+    pin_native_threads(app.extensions["native_threads"])
+
+    def cached_result(source, spec: Dict[str, Any], key: str, bounded: bool = True) -> Tuple[Dict[str, Any], bool]:
+        """
+        Resultado do cache ou extraído agora (e guardado); retorna (valor, veio_do_cache).
+        A extração passa pelo controle de admissão (Overloaded se não houver vaga; bounded=False
+        espera sem limite, para jobs em background).
+        """
+        value = cache.get(key) if cache.enabled else None
+        if value is not None:
+            return value, True
+        modes = spec["modes"] or [spec["mode"]]
+        with governor.admit(governor.weight(modes), label="+".join(modes), bounded=bounded):
+            value = compute_result(source, spec)
+        if cache.enabled:
+            cache.put(key, value)
+        return value, False
+
+    def embedding_index() -> EmbeddingIndex:
+        """Índice de locutores, aberto no primeiro uso (o diretório é comum aos workers)."""
+        index = app.extensions.get("embedding_index")
+        if index is None:
+            index = EmbeddingIndex(Config.INDEX_DIR, dim=144, tag=index_tag(index_spec()))
+            app.extensions["embedding_index"] = index
+        return index
+
+    def embed_upload(file: FileStorage) -> Dict[str, Any]:
+        """Vetor do índice (modo INDEX_MODE) de um upload; passa pelo cache de resultados como /extract."""
+        spec = index_spec()
+        audio = open_uploaded_wav(file)
+        key = cache_key(hash_upload(audio), cache_params(spec))
+        return cached_result(audio, spec, key)[0]
+
+    def timed(spec: Dict[str, Any]):
+        """Liga os cronômetros por estágio se o cliente pediu ?timings=1 ou /metrics está ativo."""
+        return collect_timings() if (spec.get("timings") or metrics.enabled) else nullcontext()
+
+    def observe(spec: Dict[str, Any], timer: Optional[StageTimer]) -> None:
+        if timer is not None:
+            metrics.observe_timings(timer.stages, *metrics_labels(spec, timer))
 
     @app.get("/health")
     def health():
-        return jsonify({"status": "ok"}), 200
+        """200 quando o worker está aquecido (ver Config.WARMUP); 503 + Retry-After durante o aquecimento."""
+        if not readiness.done.is_set():
+            resp = jsonify({"status": "warming_up"})
+            resp.headers["Retry-After"] = "1"
+            return resp, 503
+        payload = {
+            "status": "ok",
+            "engine": get_engine(),
+            "admission": governor.info(),
+            "native_threads": app.extensions["native_threads"],
+        }
+        if readiness.seconds is not None:
+            payload["warmup_s"] = readiness.seconds
+        if readiness.error:
+            payload["warmup_error"] = readiness.error
+        return jsonify(payload), 200
 
     @app.post("/api/v1/extract")
     def extract():
         """
         POST /api/v1/extract?mode=mfcc|logmel|bio_mean144|bio_mm72&pcen=0|1&down16k=0|1
+        POST /api/v1/extract?modes=mfcc,logmel,health_matrix  (multi-modo, um único decode/STFT)
+        &resampler=soxr_hq|soxr_vhq|polyphase|kaiser_best  (reamostragem quando sr > 16k)
+        &pitch=yin|acf|yin_decimated  (estimador de F0 do health_matrix)
+        &vad=0|1  (descarta quadros sem voz antes do pooling nos modos vetoriais; devolve voiced_fraction)
+        &timings=1  (bloco "timings" com o tempo de cada estágio + header Server-Timing)
         form-data: file=@file.wav
+        Resposta: ?format=json|npy|msgpack|raw (ou header Accept), ?dtype=float32|float16 nos binários;
+        ?format=ndjson nos modos temporais: cabeçalho + blocos de STREAM_CHUNK_ROWS quadros em streaming
         """
         t0 = time.time()
 
         # 1) parâmetros
-        mode, pcen, down16k = get_request_params()
+        try:
+            spec = parse_extract_request()
+            fmt, dtype = get_response_format(spec)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        with timed(spec) as timer:
+            # 2) arquivo (key obrigatória: 'file')
+            with stage("upload"):
+                file = request.files.get("file")
+            if file is None:
+                return jsonify({"error": "missing file field 'file'"}), 400
+
+            # 3) validar; o decode lê direto do stream do upload (sem gravar em disco)
+            try:
+                audio = open_uploaded_wav(file)
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+
+            try:
+                # 4) chave endereçada por conteúdo (bytes do upload + parâmetros normalizados)
+                with stage("hash"):
+                    key = cache_key(hash_upload(audio), cache_params(spec))
+                etag = etag_for(key, fmt, dtype)
+                if request.if_none_match.contains(etag):
+                    resp = app.response_class(status=304)
+                    resp.set_etag(etag)
+                    return resp
+
+                # 5) extrair (ou reaproveitar) + montar payload
+                value, hit = cached_result(audio, spec, key)
+                timings = timings_block(timer) if spec["timings"] else None
+                with stage("encode"):
+                    resp = encode_result(value, spec, int((time.time() - t0) * 1000), fmt, dtype, timings)
+            except Overloaded:
+                raise
+            except Exception as e:
+                return jsonify({"error": str(e)}), 500
+
+        observe(spec, timer)
+        if spec["timings"]:
+            resp.headers["Server-Timing"] = server_timing(timer)
+        resp.set_etag(etag)
+        resp.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return resp, 200
+
+    @app.post("/api/v1/extract/batch")
+    def extract_batch():
+        """
+        POST /api/v1/extract/batch?mode=...  (mesmos parâmetros de /api/v1/extract, um modo)
+        form-data: file=@a.wav file=@b.wav ... (até BATCH_MAX_FILES)
+        Cada arquivo é extraído (ou lido do cache) no pool do lote, até BATCH_CONCURRENCY ao mesmo
+        tempo; um arquivo inválido ou que falha não derruba os outros (status "error").
+        ?format=json|msgpack: {"files": [...status por arquivo, "row"...], "shape", "features"}
+          com as features dos arquivos ok empilhadas na ordem de envio;
+        ?format=ndjson (padrão acima de BATCH_STREAM_MIN_FILES): cabeçalho, uma linha por arquivo
+          na ordem em que terminam (com "features") e {"done": true, ...} no fim.
+        """
+        t0 = time.time()
+        try:
+            spec = parse_extract_request()
+            if spec["modes"]:
+                raise ValueError("batch extraction takes a single mode (use mode=, not modes=)")
+            files = get_batch_files()
+            fmt, dtype = get_batch_format(len(files))
+            mode = spec["mode"]
+            if fmt != "ndjson" and mode in MATRIX_MODES and not spec["matrix"][mode][3]:
+                raise ValueError("pad=0 gives rows of different lengths; use format=ndjson")
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        # validação por arquivo (extensão, nome) aqui; um inválido só vira status "error"
+        uploads: List[Tuple[str, Optional[BinaryIO], Optional[str]]] = []
+        for f in files:
+            try:
+                uploads.append((f.filename, open_uploaded_wav(f), None))
+            except ValueError as ve:
+                uploads.append((f.filename, None, str(ve)))
+        if fmt == "ndjson":
+            # o Flask fecha os uploads quando a view retorna, antes do corpo ser enviado: os streams
+            # passam a ser das tarefas (cada uma fecha o seu) e o FileStorage fica com um vazio
+            for f in files:
+                f.stream = io.BytesIO()
 
-        # 2) arquivo (key obrigatória: 'file')
+        def extract_one(i: int, audio: Optional[BinaryIO], error: Optional[str]):
+            # thread do pool: cronômetro próprio por arquivo
+            if error is not None:
+                return i, None, False, error
+            try:
+                with timed(spec) as timer:
+                    key = cache_key(hash_upload(audio), cache_params(spec))
+                    value, hit = cached_result(audio, spec, key)
+                observe(spec, timer)
+                return i, value, hit, None
+            except Exception as e:  # erro isolado por arquivo
+                return i, None, False, str(e)
+            finally:
+                audio.close()
+
+        futures = [batch_pool.submit(extract_one, i, audio, error) for i, (_, audio, error) in enumerate(uploads)]
+        header = batch_header(spec, len(files))
+
+        if fmt == "ndjson":
+            def records():
+                ok = 0
+                try:
+                    yield header
+                    for fut in as_completed(futures):
+                        i, value, hit, error = fut.result()
+                        entry = batch_entry(i, uploads[i][0], value, hit, error)
+                        if error is None:
+                            ok += 1
+                            entry["features"] = value["features"].tolist()
+                        yield entry
+                    yield {"done": True, "ok": ok, "failed": len(files) - ok,
+                           "latency_ms": int((time.time() - t0) * 1000)}
+                finally:
+                    # cliente desconectou: arquivos ainda na fila não são extraídos
+                    for fut, (_, audio, _) in zip(futures, uploads):
+                        if fut.cancel() and audio is not None:
+                            audio.close()
+
+            return encode_ndjson(records())
+
+        entries, stacked = [], []
+        for fut in futures:
+            i, value, hit, error = fut.result()
+            entry = batch_entry(i, uploads[i][0], value, hit, error)
+            if error is None:
+                entry["row"] = len(stacked)
+                stacked.append(value["features"])
+            entries.append(entry)
+        features = np.stack(stacked) if stacked else np.zeros((0,), dtype=np.float32)
+        payload = {**header, "ok": len(stacked), "failed": len(files) - len(stacked), "files": entries,
+                   "shape": list(features.shape), "latency_ms": int((time.time() - t0) * 1000)}
+        if fmt == "msgpack":
+            return encode_msgpack({**payload, "features": pack_array(output_array(features, dtype))}), 200
+        return encode_json({**payload, "features": features.tolist()}), 200
+
+    @app.post("/api/v1/live")
+    def live():
+        """
+        POST /api/v1/live?sr=16000&encoding=s16le|f32le&channels=1&layout=health_matrix|mfcc_matrix
+            &summary=mfcc|logmel&pcen=0|1&pitch=yin|acf&resampler=...
+        Corpo: PCM cru (Transfer-Encoding: chunked), lido em pedaços de LIVE_CHUNK_MS à medida
+        que chega. Resposta NDJSON em streaming: cabeçalho; {"offset", "rows"} com as linhas
+        uint8 (k, 144) de cada pedaço; {"t", "summary"} a cada LIVE_SUMMARY_EVERY_S de áudio;
+        {"done": true, "rows", "seconds", "summary", "max_chunk_ms"} quando o corpo termina.
+        """
+        try:
+            params = get_live_params()
+            extractor = LiveExtractor(
+                params["sr"], layout=params["layout"], summary=params["summary"], use_pcen=params["pcen"],
+                pitch=params["pitch"], resampler=params["resampler"], force_down_to_16k=params["down16k"],
+            )
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        dtype = LIVE_ENCODINGS[params["encoding"]]
+        frame_bytes = dtype.itemsize * params["channels"]
+        # o limite de upload vale para arquivos: aqui o teto é a duração do stream
+        request.max_content_length = int(Config.LIVE_MAX_SECONDS * params["sr"] * frame_bytes)
+        # o corpo é lido pelo gerador, depois que a view retorna: guarda o stream agora
+        body = request.stream
+        chunk_bytes = max(1, params["sr"] * Config.LIVE_CHUNK_MS // 1000) * frame_bytes
+        header = {**params, "analysis_sr": extractor.sr, "band": list(extractor.band),
+                  "hop": extractor.hop, "chunk_ms": Config.LIVE_CHUNK_MS}
+
+        def records():
+            rest = b""
+            next_summary, max_ms = Config.LIVE_SUMMARY_EVERY_S, 0.0
+            yield header
+            try:
+                while True:
+                    data = body.read(chunk_bytes)
+                    t0 = time.perf_counter()
+                    if data:
+                        # amostras incompletas ficam para o próximo pedaço
+                        data = rest + data
+                        cut = len(data) - len(data) % frame_bytes
+                        rest = data[cut:]
+                        pcm = np.frombuffer(data[:cut], dtype=dtype).reshape(-1, params["channels"])
+                        offset = extractor.n_rows
+                        rows = extractor.push(pcm)
+                    else:
+                        offset = extractor.n_rows
+                        rows = extractor.flush()
+                    max_ms = max(max_ms, (time.perf_counter() - t0) * 1000)
+                    if len(rows):
+                        yield {"offset": offset, "rows": rows.tolist()}
+                    if not data:
+                        break
+                    if extractor.seconds >= next_summary:
+                        yield {"t": round(extractor.seconds, 3), "summary": extractor.summary().tolist()}
+                        next_summary += Config.LIVE_SUMMARY_EVERY_S
+            except Exception as e:  # corpo grande demais, conexão caiu...
+                yield {"error": str(e)}
+                return
+            yield {"done": True, "rows": extractor.n_rows, "seconds": round(extractor.seconds, 3),
+                   "summary": extractor.summary().tolist(), "max_chunk_ms": round(max_ms, 3)}
+
+        return encode_ndjson(records())
+
+    @app.post("/api/v1/jobs")
+    def create_job():
+        """
+        POST /api/v1/jobs  (mesmos parâmetros e form-data de /api/v1/extract)
+        Modos temporais (mfcc_matrix, health_matrix) vão para o pool em background:
+          202 {"id", "status": "queued", ...} + Location; fila cheia -> 503 com Retry-After.
+        Modos vetoriais continuam no caminho síncrono: 200 com o job já concluído e o resultado.
+        """
+        try:
+            spec = parse_extract_request()
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
         file = request.files.get("file")
         if file is None:
             return jsonify({"error": "missing file field 'file'"}), 400
+        try:
+            audio = open_uploaded_wav(file)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+
+        key = cache_key(hash_upload(audio), cache_params(spec))
+        heavy = any(m in MATRIX_MODES for m in (spec["modes"] or [spec["mode"]]))
+        if not heavy:
+            t0 = time.time()
+            try:
+                value, _ = cached_result(audio, spec, key)
+            except Overloaded:
+                raise
+            except Exception as e:
+                return jsonify({"error": str(e)}), 500
+            record = jobs.complete(value, meta=spec)
+            return jsonify({**job_view(record), "result": json_payload(value, spec, int((time.time() - t0) * 1000))}), 200
+
+        def run_job(data: bytes) -> Dict[str, Any]:
+            # thread do pool: contexto próprio, sem o cronômetro da requisição
+            with timed({}) as timer:
+                value = cached_result(data, spec, key, bounded=False)[0]
+            observe(spec, timer)
+            return value
+
+        # O job roda depois que a requisição termina: leva os bytes do upload, não o stream
+        try:
+            record = jobs.submit(run_job, audio.read(), meta=spec)
+        except QueueFull as qf:
+            resp = jsonify({"error": str(qf)})
+            resp.headers["Retry-After"] = str(Config.JOB_RETRY_AFTER)
+            return resp, 503
+        resp = jsonify(job_view(record))
+        resp.headers["Location"] = f"/api/v1/jobs/{record['id']}"
+        return resp, 202
+
+    @app.get("/api/v1/jobs/<job_id>")
+    def get_job(job_id: str):
+        """
+        GET /api/v1/jobs/<id>: status (queued | running | done | failed | cancelled).
+        Concluído: JSON com "result", ou o resultado em ?format=npy|msgpack|raw (Accept) como em /extract.
+        Jobs expiram JOB_TTL_SECONDS depois de concluídos (404).
+        """
+        record = jobs.get(job_id)
+        if record is None:
+            return jsonify({"error": "job not found"}), 404
+        view = job_view(record)
+        if record["status"] != DONE:
+            resp = jsonify(view)
+            if record["status"] in ("queued", "running"):
+                resp.headers["Retry-After"] = "1"
+            return resp, 200
 
-        # 3) salvar temporário
+        spec = record["meta"]
+        try:
+            fmt, dtype = get_response_format(spec)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        try:
+            value = jobs.result(job_id)
+        except OSError:
+            return jsonify({"error": "job not found"}), 404
+        latency = int((record["finished_at"] - record["created_at"]) * 1000)
+        if fmt == "json":
+            return jsonify({**view, "result": json_payload(value, spec, latency)}), 200
+        resp = encode_result(value, spec, latency, fmt, dtype)
+        resp.headers["X-Job-Id"] = job_id
+        return resp, 200
+
+    @app.delete("/api/v1/jobs/<job_id>")
+    def cancel_job(job_id: str):
+        """Cancela um job em fila/execução (o resultado é descartado) ou apaga um já concluído."""
+        record = jobs.cancel(job_id)
+        if record is None:
+            return jsonify({"error": "job not found"}), 404
+        return jsonify(job_view(record)), 200
+
+    @app.post("/api/v1/enroll")
+    def enroll():
+        """
+        POST /api/v1/enroll?speaker=<id>
+        form-data: file=@a.wav (um ou mais campos 'file'; cada arquivo vira uma linha do índice)
+        Extrai o vetor de INDEX_MODE (com INDEX_VAD) e acrescenta ao índice compartilhado.
+        201 {"speaker", "rows", "voiced_fraction"?, "index": {...}}
+        """
+        t0 = time.time()
+        try:
+            speaker = get_speaker(request.args.get("speaker"))
+            files = request.files.getlist("file")
+            if not files:
+                raise ValueError("missing file field 'file'")
+            index = embedding_index()
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
         try:
-            save_path = save_uploaded_wav(file, Config.UPLOAD_DIR)
+            results = [embed_upload(f) for f in files]
         except ValueError as ve:
             return jsonify({"error": str(ve)}), 400
+        except Overloaded:
+            raise
         except Exception as e:
-            return jsonify({"error": f"failed to save file: {e}"}), 500
+            return jsonify({"error": str(e)}), 500
+        rows = index.append(np.stack([r["features"] for r in results]), [speaker] * len(results))
+        payload = {"speaker": speaker, "mode": results[0]["mode"], "rows": rows.tolist()}
+        if "voiced_fraction" in results[0]:
+            payload["voiced_fraction"] = [r["voiced_fraction"] for r in results]
+        payload.update(index=index.info(), latency_ms=int((time.time() - t0) * 1000))
+        return jsonify(payload), 201
 
-        # 4) extrair + montar payload
+    @app.post("/api/v1/identify")
+    def identify():
+        """
+        POST /api/v1/identify?k=5
+        form-data: file=@query.wav
+        200 {"matches": [{"speaker", "score", "row"}, ...]}: os k locutores de maior cosseno
+        (melhor linha de cada um), em ordem decrescente; índice vazio -> matches [].
+        """
+        t0 = time.time()
         try:
-            vec, sr, band, mode_final, pcen_final = run_extractor(save_path, mode, pcen, down16k)
-            latency = int((time.time() - t0) * 1000)
-            return jsonify(build_payload(vec, sr, band, mode_final, pcen_final, down16k, latency)), 200
+            k = get_top_k()
+            file = request.files.get("file")
+            if file is None:
+                raise ValueError("missing file field 'file'")
+            index = embedding_index()
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        try:
+            result = embed_upload(file)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        except Overloaded:
+            raise
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            # 5) limpar arquivo
-            try:
-                os.remove(save_path)
-            except Exception:
-                pass
+        matches = [{"speaker": sp, "score": round(score, 6), "row": row}
+                   for sp, score, row in index.identify(result["features"], k)]
+        payload = {"mode": result["mode"], "k": k, "matches": matches, "indexed": len(index)}
+        if "voiced_fraction" in result:
+            payload["voiced_fraction"] = result["voiced_fraction"]
+        payload["latency_ms"] = int((time.time() - t0) * 1000)
+        return jsonify(payload), 200
+
+    @app.get("/api/v1/index")
+    def index_info():
+        """Tamanho do índice de locutores (linhas, ativas, apagadas, locutores, configuração)."""
+        try:
+            return jsonify(embedding_index().info()), 200
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 500
+
+    @app.delete("/api/v1/speakers/<speaker>")
+    def delete_speaker(speaker: str):
+        """Remove todas as linhas do locutor; compacta quando as apagadas passam de INDEX_COMPACT_RATIO."""
+        try:
+            index = embedding_index()
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 500
+        removed = index.delete(speaker)
+        if not removed:
+            return jsonify({"error": "speaker not found"}), 404
+        compacted = index.maybe_compact(Config.INDEX_COMPACT_RATIO)
+        return jsonify({"speaker": speaker, "deleted": removed, "compacted": compacted, "index": index.info()}), 200
+
+    @app.get("/api/v1/cache")
+    def cache_stats():
+        """Contadores do cache de resultados (hits, disk_hits, misses, hit_ratio, evictions...)."""
+        return jsonify(cache.info()), 200
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        """Histogramas por estágio (voiceprint_stage_seconds) e por extração, labels mode/sr."""
+        if not metrics.enabled:
+            return jsonify({"error": "stage metrics are disabled (STAGE_METRICS=0)"}), 404
+        return app.response_class(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
     @app.errorhandler(413)
     def too_large(_):
         return jsonify({"error": "file too large"}), 413
 
+    @app.errorhandler(Overloaded)
+    def overloaded(ov: Overloaded):
+        """Sem vaga no controle de admissão: 429 (fila cheia) ou 503 (espera longa demais) + Retry-After."""
+        resp = jsonify({"error": str(ov), "admission": governor.info()})
+        resp.headers["Retry-After"] = str(ov.retry_after)
+        return resp, ov.status
+
     return app
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional
+
+import msgpack
+import numpy as np
+
+from voiceprint_features_144._io import write_atomic
+
+from .encoders import pack_array, unpack_array
+
+# Entra na chave: mude quando a saída dos extratores mudar para invalidar caches em disco antigos
+CACHE_VERSION = "3"
+
+_ENTRY_OVERHEAD = 512  # bytes estimados por entrada além dos arrays
+_PRUNE_EVERY = 32      # a cada N gravações em disco, poda o diretório até o limite
+
+
+def hash_upload(stream: BinaryIO, chunk_size: int = 1 << 20) -> str:
+    """sha256 do conteúdo do upload (lido em blocos); o stream volta para o início."""
+    h = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
+
+
+def cache_key(digest: str, params: Dict[str, Any]) -> str:
+    """Chave endereçada por conteúdo: sha256(versão + bytes do upload + parâmetros normalizados)."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{CACHE_VERSION}:{digest}:{blob}".encode()).hexdigest()
+
+
+def _nbytes(obj: Any) -> int:
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values())
+    return 0
+
+
+def _freeze(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        obj.setflags(write=False)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            _freeze(v)
+    return obj
+
+
+def pack_value(obj: Any) -> Any:
+    """Converte um resultado (dicts com np.ndarray) em objeto serializável por msgpack."""
+    if isinstance(obj, np.ndarray):
+        return {"__ndarray__": pack_array(np.ascontiguousarray(obj))}
+    if isinstance(obj, dict):
+        return {k: pack_value(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return list(obj)
+    return obj
+
+
+def unpack_value(obj: Any) -> Any:
+    """Inverso de pack_value (arrays voltam somente leitura, sem cópia)."""
+    if isinstance(obj, dict):
+        if "__ndarray__" in obj:
+            return unpack_array(obj["__ndarray__"])
+        return {k: unpack_value(v) for k, v in obj.items()}
+    return obj
+
+
+class ResultCache:
+    """
+    Cache de resultados de extração endereçado por conteúdo.
+
+    - memória: LRU limitado pelo total de bytes dos arrays (max_bytes; 0 desliga)
+    - disco (opcional, disk_dir): um .msgpack por chave, gravado de forma atômica,
+      compartilhado entre workers do gunicorn; podado por mtime até disk_max_bytes
+    Os valores são dicts com np.ndarray (somente leitura) e metadados simples.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.disk_dir is not None
+
+    # ---------- memória ----------
+
+    def _remember(self, key: str, value: Any) -> None:
+        size = _nbytes(value) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes[key]
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old)
+                self.evictions += 1
+
+    # ---------- disco ----------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".msgpack")
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = unpack_value(msgpack.unpackb(f.read(), raw=False))
+            os.utime(path)  # LRU aproximado: a poda remove os menos usados
+            return value
+        except (OSError, ValueError, msgpack.UnpackException):
+            return None
+
+    def _disk_put(self, key: str, value: Any) -> None:
+        try:
+            write_atomic(self._disk_path(key), msgpack.packb(pack_value(value), use_bin_type=True))
+        except OSError:
+            return
+        with self._lock:
+            self._disk_puts += 1
+            prune = self.disk_max_bytes and self._disk_puts % _PRUNE_EVERY == 0
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self) -> None:
+        """Remove os arquivos menos recentemente usados até o diretório caber em disk_max_bytes."""
+        if not self.disk_dir or not self.disk_max_bytes:
+            return
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for n in names:
+                if n.endswith(".msgpack"):
+                    p = os.path.join(root, n)
+                    try:
+                        st = os.stat(p)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, p))
+        total = sum(s for _, s, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(p)
+                total -= size
+                with self._lock:
+                    self.disk_evictions += 1
+            except OSError:
+                pass
+
+    # ---------- API ----------
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        value = self._disk_get(key) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        if self.max_bytes:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        _freeze(value)
+        if self.max_bytes:
+            self._remember(key, value)
+        if self.disk_dir:
+            self._disk_put(key, value)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": self.disk_dir is not None,
+            }
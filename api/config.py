@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class Config:
     # Host/Porta
@@ -9,7 +10,8 @@ class Config:
     MAX_CONTENT_LENGTH = int(
         os.getenv("MAX_CONTENT_LENGTH", str(20 * 1024 * 1024))
     )  # 20 MB
-    UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join("api", "uploads"))
+    # Uploads são decodificados em memória; acima deste tamanho o buffer vai para um temporário anônimo
+    UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(MAX_CONTENT_LENGTH)))
 
     # Modos de extração disponíveis:
     # - mfcc: 24 MFCC + Δ + ΔΔ + stats -> 144D
@@ -24,5 +26,92 @@ class Config:
     # Downsample para 16kHz se sr > 16k
     DEFAULT_DOWN16K = os.getenv("DEFAULT_DOWN16K", "1")  # "0" ou "1"
 
+    # Motor de reamostragem (sr > 16k): soxr_hq | soxr_vhq | polyphase | kaiser_best
+    DEFAULT_RESAMPLER = os.getenv("DEFAULT_RESAMPLER", "soxr_hq")
+
+    # Motor de DSP dos extratores: librosa (referência) | numpy (NumPy/SciPy puro: o worker não
+    # importa librosa/numba, menos memória e cold start; mesmas saídas dentro das tolerâncias
+    # de tests/test_engine.py). Vale para o processo inteiro.
+    FEATURE_ENGINE = os.getenv("FEATURE_ENGINE", os.getenv("VOICEPRINT_ENGINE", "librosa"))
+
+    # Estimador de pitch do health_matrix: yin | acf | yin_decimated
+    DEFAULT_PITCH = os.getenv("DEFAULT_PITCH", "yin")
+
+    # VAD por energia/planicidade nos modos vetoriais (mfcc, logmel, bio_*): pooling só nos quadros com voz
+    DEFAULT_VAD = os.getenv("DEFAULT_VAD", "0")  # "0" ou "1"
+
+    # Cache de resultados endereçado por conteúdo (sha256 do upload + parâmetros)
+    # memória: LRU por bytes (0 desliga); disco: diretório opcional compartilhado entre workers
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+    RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+    # Jobs assíncronos (POST /api/v1/jobs): pool local por worker, fila limitada, resultados com TTL.
+    # JOB_DIR guarda o estado dos jobs e deve ser comum aos workers do gunicorn.
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "16"))
+    JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "600"))
+    # Jobs queued/running sem escrita há mais que isso são órfãos (worker morreu) e são removidos
+    JOB_ORPHAN_TTL_SECONDS = float(os.getenv("JOB_ORPHAN_TTL_SECONDS", "3600"))
+    JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "5"))
+    JOB_DIR = os.getenv("JOB_DIR", os.path.join(tempfile.gettempdir(), "voiceprint-jobs"))
+
+    # Lote (POST /api/v1/extract/batch): vários campos 'file', um conjunto de parâmetros.
+    # Os arquivos são extraídos em até BATCH_CONCURRENCY threads por worker (pool comum aos lotes);
+    # acima de BATCH_STREAM_MIN_FILES arquivos a resposta padrão é NDJSON em streaming.
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "64"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_STREAM_MIN_FILES = int(os.getenv("BATCH_STREAM_MIN_FILES", "16"))
+
+    # Linhas (quadros) por registro nas respostas NDJSON dos modos temporais (?format=ndjson)
+    STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "256"))
+
+    # Extração ao vivo (POST /api/v1/live): PCM cru no corpo (chunked), linhas NDJSON de volta.
+    # O corpo é lido em pedaços de LIVE_CHUNK_MS de áudio; o resumo 144D sai a cada
+    # LIVE_SUMMARY_EVERY_S de áudio; streams acima de LIVE_MAX_SECONDS são cortados (413).
+    LIVE_CHUNK_MS = int(os.getenv("LIVE_CHUNK_MS", "100"))
+    LIVE_SUMMARY_EVERY_S = float(os.getenv("LIVE_SUMMARY_EVERY_S", "1.0"))
+    LIVE_MAX_SECONDS = float(os.getenv("LIVE_MAX_SECONDS", "3600"))
+
+    # Controle de admissão por worker: extrações em andamento limitadas a ADMISSION_MAX_WEIGHT
+    # unidades, cada modo pesando o seu custo (vetoriais 1, mfcc_matrix 2, health_matrix 3;
+    # ADMISSION_WEIGHTS="health_matrix=4,..." sobrescreve). Quem não cabe espera numa fila de
+    # ADMISSION_MAX_QUEUE pedidos: fila cheia -> 429, mais de ADMISSION_QUEUE_TIMEOUT_S na fila
+    # -> 503, ambos com Retry-After. Acertos do cache não passam pelo controle. 0 desliga.
+    ADMISSION_MAX_WEIGHT = int(os.getenv("ADMISSION_MAX_WEIGHT", os.getenv("GUNICORN_THREADS", "4")))
+    ADMISSION_WEIGHTS = os.getenv("ADMISSION_WEIGHTS", "")
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+    ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+    # Threads de BLAS/OpenMP por worker (threadpoolctl): "auto" divide os núcleos entre as
+    # extrações simultâneas do nó (GUNICORN_WORKERS × ADMISSION_MAX_WEIGHT), "0" não limita
+    NATIVE_THREADS = os.getenv("NATIVE_THREADS", "auto")
+    GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", "2"))
+
+    # Tempo por estágio (decode, resample, stft, mel, delta, pitch, encode...): histogramas em /metrics
+    # (formato Prometheus, labels stage/mode/sr). METRICS_DIR (opcional, comum aos workers do
+    # gunicorn) soma os histogramas de todos os workers; vazio = só o worker que atende o scrape.
+    # Desligado por padrão: ligado, todo pedido lê o relógio por estágio e atualiza os histogramas.
+    STAGE_METRICS = os.getenv("STAGE_METRICS", "0")  # "0" ou "1"
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+
+    # Índice de locutores (POST /api/v1/enroll, /api/v1/identify): vetores do modo INDEX_MODE
+    # num diretório mapeado em memória, comum aos workers do gunicorn. Mudar modo/vad/pcen/resampler
+    # exige um INDEX_DIR novo (o índice guarda a configuração e recusa abrir com outra).
+    INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(tempfile.gettempdir(), "voiceprint-index"))
+    INDEX_MODE = os.getenv("INDEX_MODE", "mfcc")       # mfcc | logmel | bio_mean144 | bio_mm72
+    INDEX_VAD = os.getenv("INDEX_VAD", "1")            # "0" ou "1"
+    INDEX_TOP_K = int(os.getenv("INDEX_TOP_K", "5"))   # k padrão do identify
+    INDEX_MAX_K = int(os.getenv("INDEX_MAX_K", "100"))
+    INDEX_COMPACT_RATIO = float(os.getenv("INDEX_COMPACT_RATIO", "0.25"))  # compacta após deletes acima disso
+
+    # Aquecimento (voiceprint_features_144.warmup) na criação do app; /health só responde 200 depois dele.
+    # "background": thread no worker (o worker já aceita conexões, /health = 503 até terminar);
+    # "sync": create_app só retorna aquecido (use com preload_app do gunicorn: aquece uma vez no master);
+    # "0": desligado. O cache em disco do numba vem de NUMBA_CACHE_DIR (lido pelo próprio numba).
+    WARMUP = os.getenv("WARMUP", "background")
+    WARMUP_ALL = os.getenv("WARMUP_ALL", "1")  # "1": todos os resamplers/estimadores de pitch aceitos na query
+
     # Extensões permitidas
     ALLOWED_EXTENSIONS = {"wav"}
@@ -0,0 +1,122 @@
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import msgpack
+import numpy as np
+from flask import Response, jsonify
+
+# Formatos de resposta de /api/v1/extract
+FORMATS = ("json", "npy", "msgpack", "raw", "ndjson")
+
+# Accept -> formato (a ordem define a preferência quando o cliente aceita vários com a mesma
+# qualidade; json primeiro para que */* — o Accept padrão do curl — continue dando json)
+_ACCEPT_MAP = (
+    ("application/json", "json"),
+    ("application/x-npy", "npy"),
+    ("application/x-msgpack", "msgpack"),
+    ("application/msgpack", "msgpack"),
+    ("application/vnd.msgpack", "msgpack"),
+    ("application/octet-stream", "raw"),
+    ("application/x-ndjson", "ndjson"),
+)
+
+_MIMETYPES = {
+    "npy": "application/x-npy",
+    "msgpack": "application/x-msgpack",
+    "raw": "application/octet-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def negotiate_format(args, accept) -> str:
+    """
+    Escolhe o formato da resposta: ?format= tem prioridade; senão usa o header Accept
+    (werkzeug MIMEAccept); default json. Formato desconhecido gera ValueError.
+    """
+    fmt = (args.get("format") or "").strip().lower()
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported format: {fmt} (use one of {', '.join(FORMATS)})")
+        return fmt
+    best = accept.best_match([m for m, _ in _ACCEPT_MAP]) if accept else None
+    return dict(_ACCEPT_MAP).get(best, "json")
+
+
+def output_array(features: np.ndarray, dtype: Optional[str]) -> np.ndarray:
+    """
+    Array contíguo little-endian para os formatos binários. Vetores float32 podem ser
+    enviados como float16 (?dtype=float16); matrizes uint8 seguem como uint8.
+    """
+    if dtype not in (None, "", "float32", "float16"):
+        raise ValueError("dtype must be float32 or float16")
+    arr = features
+    if arr.dtype.kind == "f":
+        arr = arr.astype("<f2" if dtype == "float16" else "<f4", copy=False)
+    return np.ascontiguousarray(arr)
+
+
+def _meta_headers(meta: Dict[str, Any]) -> Dict[str, str]:
+    headers = {}
+    for k, v in meta.items():
+        name = "X-" + "-".join(p.capitalize() for p in k.split("_"))
+        if isinstance(v, (list, tuple)):
+            v = ",".join(str(x) for x in v)
+        elif isinstance(v, bool):
+            v = "1" if v else "0"
+        headers[name] = str(v)
+    return headers
+
+
+def encode_npy(meta: Dict[str, Any], arr: np.ndarray) -> Response:
+    """Corpo .npy (np.load direto); metadados nos headers X-*."""
+    buf = io.BytesIO()
+    np.lib.format.write_array(buf, arr, allow_pickle=False)
+    return Response(buf.getvalue(), mimetype=_MIMETYPES["npy"], headers=_meta_headers(meta))
+
+
+def encode_raw(meta: Dict[str, Any], arr: np.ndarray) -> Response:
+    """Corpo = buffer little-endian do array; shape/dtype e metadados nos headers X-*."""
+    headers = _meta_headers(meta)
+    headers["X-Shape"] = ",".join(str(d) for d in arr.shape)
+    headers["X-Dtype"] = arr.dtype.str
+    return Response(arr.tobytes(), mimetype=_MIMETYPES["raw"], headers=headers)
+
+
+def pack_array(arr: np.ndarray) -> Dict[str, Any]:
+    """Array como {dtype, shape, data(bin)} para msgpack, sem conversão por elemento."""
+    return {"dtype": arr.dtype.str, "shape": list(arr.shape), "data": memoryview(arr).cast("B")}
+
+
+def encode_msgpack(doc: Dict[str, Any]) -> Response:
+    return Response(msgpack.packb(doc, use_bin_type=True), mimetype=_MIMETYPES["msgpack"])
+
+
+def encode_json(doc: Dict[str, Any]) -> Response:
+    return jsonify(doc)
+
+
+def encode_ndjson(records: Iterable[Dict[str, Any]]) -> Response:
+    """
+    Resposta em streaming (chunked): um objeto JSON por linha, serializado só quando o gerador
+    `records` o produz; o corpo inteiro nunca fica em memória.
+    """
+    return Response((json.dumps(r, separators=(",", ":")) + "\n" for r in records), mimetype=_MIMETYPES["ndjson"])
+
+
+def matrix_records(meta: Dict[str, Any], mat: np.ndarray, chunk_rows: int) -> Iterator[Dict[str, Any]]:
+    """
+    Registros NDJSON de uma matriz (n_frames, 144): cabeçalho (metadados + shape/dtype/chunk_rows),
+    blocos {"offset", "rows"} de até `chunk_rows` linhas e {"done": true, "rows": n} no fim.
+    Cada bloco vira lista só quando é consumido: a memória da serialização não cresce com n_frames.
+    """
+    chunk_rows = max(1, int(chunk_rows))
+    yield {**meta, "shape": list(mat.shape), "dtype": mat.dtype.name, "chunk_rows": chunk_rows}
+    for start in range(0, mat.shape[0], chunk_rows):
+        yield {"offset": start, "rows": mat[start:start + chunk_rows].tolist()}
+    yield {"done": True, "rows": int(mat.shape[0])}
+
+
+def unpack_array(obj: Dict[str, Any]) -> np.ndarray:
+    """Inverso de pack_array (útil para clientes Python e testes)."""
+    return np.frombuffer(obj["data"], dtype=np.dtype(obj["dtype"])).reshape(obj["shape"])
@@ -0,0 +1,219 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import msgpack
+
+from voiceprint_features_144._io import write_atomic
+
+from .cache import pack_value, unpack_value
+
+# Estados de um job
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+LOCK = "jobs.lock"
+
+
+class QueueFull(Exception):
+    """A fila de jobs deste worker está cheia (a rota responde 503 com Retry-After)."""
+
+
+class JobManager:
+    """
+    Jobs de extração em background com pool local de threads.
+
+    O estado fica em `job_dir` (um .json por job + .msgpack com o resultado), gravado de forma
+    atômica, para que GET/DELETE funcionem em qualquer worker do gunicorn, não só no que
+    recebeu o POST. A fila (queued + running) é limitada por worker em `max_pending`;
+    jobs terminados expiram após `ttl` segundos. O cancelamento de um job em fila o remove
+    do pool; um job já em execução termina, mas o resultado é descartado.
+
+    As transições de estado (início, fim, cancelamento) conferem o marcador .cancel e gravam o
+    registro sob um flock comum aos workers (jobs.lock): um cancelamento vindo de outro worker
+    nunca é sobrescrito por running/done. Registros queued/running só são removidos como órfãos
+    (worker que morreu) depois de `orphan_ttl` segundos sem escrita.
+    """
+
+    def __init__(
+        self, job_dir: str, workers: int = 2, max_pending: int = 16, ttl: float = 600.0, orphan_ttl: float = 3600.0,
+    ):
+        self.job_dir = job_dir
+        self.max_pending = max(1, int(max_pending))
+        self.ttl = float(ttl)
+        self.orphan_ttl = max(float(orphan_ttl), self.ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="voiceprint-job")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(job_dir, exist_ok=True)
+
+    # ---------- arquivos ----------
+
+    def _path(self, job_id: str, ext: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.{ext}")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        write_atomic(self._path(record["id"], "json"), json.dumps(record).encode())
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id, "json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove(self, job_id: str) -> None:
+        for ext in ("json", "msgpack", "cancel"):
+            try:
+                os.remove(self._path(job_id, ext))
+            except OSError:
+                pass
+
+    def _cancelled(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, "cancel"))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """flock exclusivo entre workers (e threads) para ler o marcador e gravar o registro."""
+        with open(os.path.join(self.job_dir, LOCK), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # ---------- ciclo de vida ----------
+
+    def _new_record(self, meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "meta": meta or {},
+        }
+
+    def _finish(self, record: Dict[str, Any], value: Any = None, error: Optional[str] = None) -> None:
+        """Grava o resultado e o estado final, a menos que o job tenha sido cancelado (aí grava CANCELLED)."""
+        payload = msgpack.packb(pack_value(value), use_bin_type=True) if value is not None else None
+        with self._locked():
+            if self._cancelled(record["id"]):
+                # cancelado durante a execução: descarta o resultado
+                record.update(status=CANCELLED, finished_at=time.time())
+            else:
+                if payload is not None:
+                    write_atomic(self._path(record["id"], "msgpack"), payload)
+                record.update(status=FAILED if error else DONE, error=error, finished_at=time.time())
+            self._write(record)
+
+    def _run(self, record: Dict[str, Any], fn: Callable[..., Any], args: tuple) -> None:
+        job_id = record["id"]
+        with self._locked():
+            started = not self._cancelled(job_id)  # cancelado por outro worker enquanto estava na fila
+            if started:
+                record.update(status=RUNNING, started_at=time.time())
+                self._write(record)
+        if not started:
+            with self._lock:
+                self._futures.pop(job_id, None)
+            return
+        try:
+            value, error = fn(*args), None
+        except Exception as e:
+            value, error = None, f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+        self._finish(record, value, error)
+
+    def submit(self, fn: Callable[..., Any], *args, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Enfileira fn(*args); retorna o registro do job (status queued). Fila cheia gera QueueFull."""
+        self.expire()
+        record = self._new_record(meta)
+        with self._lock:
+            if len(self._futures) >= self.max_pending:
+                raise QueueFull(f"job queue is full ({self.max_pending} pending)")
+            self._write(record)
+            self._futures[record["id"]] = self._executor.submit(self._run, dict(record), fn, args)
+        return record
+
+    def complete(self, value: Any, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Registra um job já resolvido no caminho síncrono (mesmo formato de consulta)."""
+        record = self._new_record(meta)
+        record["started_at"] = record["created_at"]
+        self._finish(record, value)
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self.expire()
+        return self._read(job_id)
+
+    def result(self, job_id: str) -> Any:
+        """Resultado de um job DONE (dicts com np.ndarray)."""
+        with open(self._path(job_id, "msgpack"), "rb") as f:
+            return unpack_value(msgpack.unpackb(f.read(), raw=False))
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancela um job ativo (ou descarta um terminado); retorna o registro final ou None."""
+        with self._locked():
+            record = self._read(job_id)
+            if record is None:
+                return None
+            if record["status"] not in ACTIVE:
+                self._remove(job_id)
+                return record
+            write_atomic(self._path(job_id, "cancel"), b"")
+            record.update(status=CANCELLED, finished_at=time.time())
+            self._write(record)
+        with self._lock:
+            fut = self._futures.pop(job_id, None)
+        if fut is not None:
+            fut.cancel()
+        return record
+
+    def expire(self) -> None:
+        """
+        Remove jobs terminados cujo último registro tem mais de `ttl` segundos. Jobs queued/running
+        (talvez em outro worker) só saem como órfãos, sem escrita há mais de `orphan_ttl` segundos.
+        """
+        now = time.time()
+        cutoff, orphan_cutoff = now - self.ttl, now - self.orphan_ttl
+        try:
+            names = os.listdir(self.job_dir)
+        except OSError:
+            return
+        for n in names:
+            if not n.endswith(".json"):
+                continue
+            job_id = n[:-5]
+            with self._lock:
+                if job_id in self._futures:
+                    continue
+            try:
+                mtime = os.stat(os.path.join(self.job_dir, n)).st_mtime
+            except OSError:
+                continue
+            if mtime >= cutoff:
+                continue
+            if mtime >= orphan_cutoff:
+                record = self._read(job_id)
+                if record is None or record["status"] in ACTIVE:
+                    continue
+            self._remove(job_id)
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._futures), "max_pending": self.max_pending}
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from voiceprint_features_144._io import write_atomic
+
+# Limites (segundos) dos buckets: de ~1 ms (estágios curtos) a 1 min (matrizes longas com YIN)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_METRIC = "voiceprint_stage_seconds"
+EXTRACT_METRIC = "voiceprint_extract_seconds"
+QUEUE_METRIC = "voiceprint_queue_wait_seconds"
+_HELP = {
+    STAGE_METRIC: "Time spent in each extraction stage (self time; nested stages excluded).",
+    EXTRACT_METRIC: "Time spent in the instrumented stages of one /api/v1/extract request.",
+    QUEUE_METRIC: "Time an extraction waited for an admission slot (outcome: admitted, rejected, timeout).",
+}
+
+_SNAPSHOT_EVERY = 1.0  # segundos entre gravações do snapshot deste worker em METRICS_DIR
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class StageMetrics:
+    """
+    Histogramas no formato de texto do Prometheus (sem dependência do prometheus_client).
+
+    Cada worker acumula os seus em memória. Com `shared_dir`, cada worker grava um snapshot
+    (<dir>/<pid>.json, no máximo 1x/s e a cada /metrics) e o /metrics de qualquer worker
+    soma os snapshots de todos, como o modo multiprocess do prometheus_client; snapshots de
+    workers encerrados continuam somando (contadores não podem voltar).
+    """
+
+    def __init__(self, enabled: bool = True, shared_dir: Optional[str] = None, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.enabled = bool(enabled)
+        self.shared_dir = shared_dir or None
+        self.buckets: List[float] = sorted(float(b) for b in buckets)
+        # (métrica, labels) -> [contagens por bucket (não cumulativas) + overflow, soma, total]
+        self._series: Dict[Tuple[str, Labels], list] = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = 0.0
+        if self.enabled and self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+
+    def observe(self, metric: str, labels: Dict[str, str], value: float) -> None:
+        key = (metric, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        idx = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def observe_timings(self, stages: Dict[str, float], mode: str, sr) -> None:
+        """Um pedido: cada estágio em voiceprint_stage_seconds e a soma em voiceprint_extract_seconds."""
+        if not self.enabled or not stages:
+            return
+        for name, seconds in stages.items():
+            self.observe(STAGE_METRIC, {"stage": name, "mode": mode, "sr": sr}, seconds)
+        self.observe(EXTRACT_METRIC, {"mode": mode, "sr": sr}, sum(stages.values()))
+        self._maybe_snapshot()
+
+    def observe_queue_wait(self, mode: str, outcome: str, seconds: float) -> None:
+        """Espera por uma vaga do controle de admissão (api.admission.Governor)."""
+        if not self.enabled:
+            return
+        self.observe(QUEUE_METRIC, {"mode": mode, "outcome": outcome}, seconds)
+        self._maybe_snapshot()
+
+    def _maybe_snapshot(self) -> None:
+        if self.shared_dir and time.monotonic() - self._last_snapshot >= _SNAPSHOT_EVERY:
+            self._snapshot()
+
+    # ---------- workers do gunicorn ----------
+
+    def _snapshot(self) -> None:
+        with self._lock:
+            doc = [[m, list(map(list, labels)), s[0], s[1], s[2]] for (m, labels), s in self._series.items()]
+            self._last_snapshot = time.monotonic()
+        try:
+            write_atomic(os.path.join(self.shared_dir, f"{os.getpid()}.json"), json.dumps(doc).encode())
+        except OSError:
+            pass
+
+    def _merged(self) -> Dict[Tuple[str, Labels], list]:
+        if not self.shared_dir:
+            with self._lock:
+                return {k: [list(v[0]), v[1], v[2]] for k, v in self._series.items()}
+        self._snapshot()
+        merged = {}
+        for n in os.listdir(self.shared_dir):
+            if not n.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, n)) as f:
+                    doc = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric, labels, counts, total, count in doc:
+                if len(counts) != len(self.buckets) + 1:
+                    continue  # snapshot com outros buckets (configuração antiga)
+                key = (metric, tuple(tuple(kv) for kv in labels))
+                acc = merged.setdefault(key, [[0] * len(counts), 0.0, 0])
+                acc[0] = [a + c for a, c in zip(acc[0], counts)]
+                acc[1] += total
+                acc[2] += count
+        return merged
+
+    def render(self) -> str:
+        """Exposição text/plain; version=0.0.4 (HELP/TYPE + _bucket/_sum/_count por série)."""
+        series = self._merged()
+        lines: List[str] = []
+        for metric in sorted({m for m, _ in series}):
+            lines.append(f"# HELP {metric} {_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (m, labels), (counts, total, count) in sorted(series.items()):
+                if m != metric:
+                    continue
+                cumulative = 0
+                for le, c in zip(self.buckets + [float("inf")], counts):
+                    cumulative += c
+                    lines.append(f"{metric}_bucket{_label_str(labels, ('le', _fmt(le)))} {cumulative}")
+                lines.append(f"{metric}_sum{_label_str(labels)} {_fmt(total)}")
+                lines.append(f"{metric}_count{_label_str(labels)} {count}")
+        return "\n".join(lines) + "\n"
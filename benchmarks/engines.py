@@ -0,0 +1,146 @@
+"""
+Benchmark dos motores de DSP (voiceprint_features_144.dsp): librosa x numpy.
+
+Para cada motor mede:
+  - cold start, num interpretador novo por motor: import do pacote + primeira extração de
+    cada modo (inclui a compilação numba do librosa), pico de RSS e quais dependências
+    pesadas (librosa, numba, llvmlite, pooch, sklearn) foram carregadas
+  - throughput de cada modo já aquecido (x tempo real, melhor de --repeat) e o desvio em
+    relação ao motor librosa: max |Δ| nos vetoriais, max |Δ| em níveis nos uint8
+
+Uso:
+    python -m benchmarks.engines --seconds 30 --json engines.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from voiceprint_features_144.dsp import use_engine
+from voiceprint_features_144.modes import ALL_MODES, extract_mode
+from voiceprint_features_144.options import ENGINES
+
+from .signals import synth_voice
+
+REFERENCE = "librosa"
+HEAVY = ("librosa", "numba", "llvmlite", "pooch", "sklearn")
+
+# Roda num interpretador novo com VOICEPRINT_ENGINE definido; imprime um JSON na última linha
+_COLD_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import numpy as np
+from voiceprint_features_144.modes import extract_mode
+t_import = time.perf_counter() - t0
+data = open(sys.argv[1], "rb").read()
+first = {}
+for mode in sys.argv[2:]:
+    t = time.perf_counter()
+    extract_mode(data, mode)
+    first[mode] = time.perf_counter() - t
+print(json.dumps({
+    "import_s": t_import,
+    "first_s": first,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+
+def _wav_bytes(sr, seconds):
+    buf = io.BytesIO()
+    sf.write(buf, synth_voice(sr, seconds, seed=sr), sr, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def cold_start(engine, wav_path, modes):
+    env = dict(os.environ, VOICEPRINT_ENGINE=engine)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", _COLD_PROBE, wav_path, *modes],
+                         capture_output=True, text=True, check=True, cwd=root, env=env)
+    r = json.loads(out.stdout.splitlines()[-1])
+    r["first_total_s"] = sum(r["first_s"].values())
+    return {"engine": engine, **r}
+
+
+def _deviation(got, ref):
+    if got.dtype == np.uint8:
+        return float(np.abs(got.astype(np.int16) - ref.astype(np.int16)).max())
+    return float(np.abs(got - ref).max())
+
+
+def throughput(engines, sr, seconds, modes, repeat=3):
+    data = _wav_bytes(sr, seconds)
+    report, refs = [], {}
+    for engine in [REFERENCE] + [e for e in engines if e != REFERENCE]:
+        with use_engine(engine):
+            for mode in modes:
+                out = extract_mode(data, mode)[0]  # aquece (numba, bases)
+                best = np.inf
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    extract_mode(data, mode)
+                    best = min(best, time.perf_counter() - t0)
+                refs.setdefault(mode, out)
+                if engine in engines:
+                    report.append({
+                        "engine": engine, "sr": sr, "seconds": seconds, "mode": mode,
+                        "wall_s": best, "rtf_x": seconds / best,
+                        "max_abs_dev": _deviation(out, refs[mode]),
+                    })
+    return report
+
+
+def run(engines, rates, seconds, modes, repeat=3, cold_sr=16000, cold_seconds=5.0):
+    wav_path = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"engines-{os.getpid()}.wav")
+    with open(wav_path, "wb") as f:
+        f.write(_wav_bytes(cold_sr, cold_seconds))
+    try:
+        cold = [cold_start(e, wav_path, modes) for e in engines]
+    finally:
+        os.remove(wav_path)
+    warm = [r for sr in rates for r in throughput(engines, sr, seconds, modes, repeat)]
+    return {"cold_start": cold, "throughput": warm}
+
+
+def _print_tables(report):
+    head = f"{'engine':<8} {'import s':>9} {'1st call s':>11} {'peak RSS MB':>12}  loaded"
+    print(head)
+    print("-" * len(head))
+    for r in report["cold_start"]:
+        print(f"{r['engine']:<8} {r['import_s']:>9.3f} {r['first_total_s']:>11.3f} {r['peak_rss_mb']:>12.1f}  "
+              f"{','.join(r['loaded']) or '-'}")
+    print()
+    head = f"{'sr':>6} {'mode':<14} {'engine':<8} {'ms':>9} {'x realtime':>11} {'max |Δ|':>10}"
+    print(head)
+    print("-" * len(head))
+    for r in report["throughput"]:
+        print(f"{r['sr']:>6} {r['mode']:<14} {r['engine']:<8} {r['wall_s'] * 1000:>9.1f} {r['rtf_x']:>11.0f} "
+              f"{r['max_abs_dev']:>10.2g}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold start, throughput and parity of the librosa and numpy DSP engines.")
+    ap.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    ap.add_argument("--rates", type=int, nargs="+", default=[16000, 48000])
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--modes", nargs="+", choices=list(ALL_MODES), default=list(ALL_MODES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="", help="Write the full report to this file")
+    args = ap.parse_args()
+
+    report = run(args.engines, args.rates, args.seconds, args.modes, args.repeat)
+    _print_tables(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
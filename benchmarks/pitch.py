@@ -0,0 +1,128 @@
+"""
+Benchmark dos estimadores de pitch do health_matrix (voiceprint_features_144.pitch).
+
+Referência: a coluna de pitch original, librosa.yin no sinal inteiro (todos os quadros).
+Para cada taxa, n_frames e estimador mede:
+  - tempo do estágio "pitch" e do extrator inteiro (melhor de --repeat, via collect_timings)
+  - speed-up do estágio em relação ao librosa.yin no sinal inteiro
+  - erro em cents nos quadros de voz do sinal sintético (envelope > 0.5, F0 >= fmin),
+    contra a coluna original e contra o F0 verdadeiro: mediana e fração de erros
+    grosseiros (> 50 cents)
+
+Uso:
+    python -m benchmarks.pitch --seconds 60 --json pitch.json
+"""
+import argparse
+import json
+import time
+import warnings
+
+import numpy as np
+import librosa
+
+from voiceprint_features_144.analysis import AudioAnalysis
+from voiceprint_features_144.common_adaptive import safe_voice_band
+from voiceprint_features_144.extract_health_matrix import extract_health_matrix
+from voiceprint_features_144.pitch import PITCH_ESTIMATORS, estimate_pitch, voiced_frames
+from voiceprint_features_144.timing import collect_timings
+
+from .signals import synth_voice, voice_envelope, voice_f0
+
+PRE_EMPHASIS = 0.97
+FMIN, FMAX = 100, 7200
+GROSS_CENTS = 50.0
+
+
+def _cents(f, ref):
+    return np.abs(1200.0 * np.log2(np.maximum(f, 1e-6) / np.maximum(ref, 1e-6)))
+
+
+def _errors(f, ref):
+    c = _cents(f, ref)
+    return {"median_cents": float(np.median(c)), "gross": float(np.mean(c > GROSS_CENTS))} if c.size else {}
+
+
+def run(rates, seconds, estimators, n_frames_list, repeat=3):
+    report = []
+    for sr in rates:
+        y = synth_voice(sr, seconds, seed=sr)
+        an = AudioAnalysis.from_array(y, sr)
+        fmin, fmax = safe_voice_band(an.sr, FMIN, FMAX)
+        ye = an.signal(PRE_EMPHASIS)
+        an.magnitude(PRE_EMPHASIS)  # STFT fora da medição (comum a todos os estimadores)
+
+        yin_args = dict(fmin=fmin, fmax=min(fmax, an.sr // 2 - 1), sr=an.sr, frame_length=an.n_fft, hop_length=an.hop)
+        librosa.yin(ye[: an.sr], **yin_args)  # compila o numba fora da medição
+        ref_s = np.inf
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            ref = librosa.yin(ye, **yin_args)
+            ref_s = min(ref_s, time.perf_counter() - t0)
+
+        rms = librosa.feature.rms(y=ye, frame_length=an.n_fft, hop_length=an.hop, center=False)[0]
+        t = np.arange(len(ref)) * an.hop / an.sr
+        truth = voice_f0(t)
+        # quadros de voz de fato (envelope > 0.5) com F0 alcançável (>= fmin) entram no erro
+        scored = (voice_envelope(t) > 0.5) & (truth >= fmin)
+
+        for n_frames in n_frames_list:
+            n_keep = min(len(rms), len(ref), n_frames or len(ref))
+            voiced = voiced_frames(rms[:n_keep])
+            trackable = voiced[scored[voiced]]
+            for est in estimators:
+                wall = {"pitch": np.inf, "total": np.inf}
+                for _ in range(repeat):
+                    with collect_timings() as timer:
+                        extract_health_matrix(an, target_frames=n_keep, pitch=est)
+                    wall["pitch"] = min(wall["pitch"], timer.stages["pitch"])
+                    wall["total"] = min(wall["total"], timer.total())
+                f0 = dict(zip(voiced.tolist(), estimate_pitch(an, voiced, est, fmin, fmax, PRE_EMPHASIS)))
+                got = np.array([f0[i] for i in trackable.tolist()])
+                report.append({
+                    "sr": sr,
+                    "seconds": seconds,
+                    "n_frames": n_keep,
+                    "estimator": est,
+                    "voiced_frames": int(len(voiced)),
+                    "pitch_s": wall["pitch"],
+                    "extractor_s": wall["total"],
+                    "reference_yin_s": ref_s,
+                    "speedup": ref_s / wall["pitch"],
+                    "vs_reference": _errors(got, ref[trackable]),
+                    "vs_truth": _errors(got, truth[trackable]),
+                })
+    return report
+
+
+def _print_table(report):
+    head = (f"{'sr':>6} {'frames':>7} {'estimator':<14} {'pitch ms':>9} {'speedup':>8} {'total ms':>9} "
+            f"{'ref med¢':>9} {'ref >50¢':>9} {'true med¢':>10} {'true >50¢':>10}")
+    print(head)
+    print("-" * len(head))
+    for r in report:
+        ref, tru = r["vs_reference"], r["vs_truth"]
+        print(f"{r['sr']:>6} {r['n_frames']:>7} {r['estimator']:<14} {r['pitch_s'] * 1000:>9.1f} {r['speedup']:>7.1f}x "
+              f"{r['extractor_s'] * 1000:>9.1f} {ref.get('median_cents', np.nan):>9.2f} {ref.get('gross', np.nan):>9.3f} "
+              f"{tru.get('median_cents', np.nan):>10.2f} {tru.get('gross', np.nan):>10.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Speed-up and error of each health_matrix pitch estimator vs. full-signal YIN.")
+    ap.add_argument("--rates", type=int, nargs="+", default=[8000, 16000, 48000])
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--estimators", nargs="+", choices=list(PITCH_ESTIMATORS), default=list(PITCH_ESTIMATORS))
+    ap.add_argument("--n-frames", type=int, nargs="+", default=[400, 0], help="Kept frames (0 = all frames)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="", help="Write the full report to this file")
+    args = ap.parse_args()
+
+    warnings.filterwarnings("ignore", message="Empty filters detected")
+    report = run(args.rates, args.seconds, args.estimators, args.n_frames, args.repeat)
+    _print_table(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
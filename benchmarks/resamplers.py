@@ -0,0 +1,90 @@
+"""
+Benchmark dos motores de reamostragem (voiceprint_features_144.resample).
+
+Para cada taxa de entrada e motor mede:
+  - throughput da reamostragem para 16 kHz (x tempo real e Msamples/s, melhor de --repeat)
+  - desvio dos vetores 144D (mfcc, logmel, bio_mean144, bio_mm72) em relação ao
+    kaiser_best (padrão antigo): max |Δ|, erro relativo L2 e similaridade de cosseno
+
+Uso:
+    python -m benchmarks.resamplers --seconds 30 --json resamplers.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from voiceprint_features_144.modes import VECTOR_MODES, extract_modes
+from voiceprint_features_144.resample import RESAMPLERS, resample
+
+from .signals import synth_voice
+
+REFERENCE = "kaiser_best"
+
+
+def _time_resample(y, sr, engine, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        resample(y, sr, 16000, engine)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _drift(vec, ref):
+    diff = vec.astype(np.float64) - ref
+    return {
+        "max_abs": float(np.abs(diff).max()),
+        "rel_l2": float(np.linalg.norm(diff) / max(np.linalg.norm(ref), 1e-12)),
+        "cosine": float(vec @ ref / max(np.linalg.norm(vec) * np.linalg.norm(ref), 1e-12)),
+    }
+
+
+def run(rates, seconds, engines, repeat=3):
+    report = []
+    for sr in rates:
+        y = synth_voice(sr, seconds, seed=sr)
+        ref = {m: v[0].astype(np.float64) for m, v in extract_modes((y, sr), VECTOR_MODES, resampler=REFERENCE).items()}
+        for engine in engines:
+            wall = _time_resample(y, sr, engine, repeat)
+            feats = extract_modes((y, sr), VECTOR_MODES, resampler=engine)
+            report.append({
+                "sr": sr,
+                "engine": engine,
+                "seconds": seconds,
+                "resample_s": wall,
+                "x_realtime": seconds / wall,
+                "msamples_per_s": len(y) / wall / 1e6,
+                "drift": {m: _drift(feats[m][0], ref[m]) for m in VECTOR_MODES},
+            })
+    return report
+
+
+def _print_table(report):
+    head = f"{'sr':>6} {'engine':<12} {'resample':>10} {'x RT':>9} " + " ".join(f"{m + ' maxΔ':>16}" for m in VECTOR_MODES)
+    print(head)
+    print("-" * len(head))
+    for r in report:
+        cols = " ".join(f"{r['drift'][m]['max_abs']:>16.4g}" for m in VECTOR_MODES)
+        print(f"{r['sr']:>6} {r['engine']:<12} {r['resample_s'] * 1000:>8.1f}ms {r['x_realtime']:>9.0f} {cols}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Throughput and 144D feature drift of each resampling engine.")
+    ap.add_argument("--rates", type=int, nargs="+", default=[22050, 32000, 44100, 48000])
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--engines", nargs="+", choices=list(RESAMPLERS), default=list(RESAMPLERS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="", help="Write the full report (drift: max_abs, rel_l2, cosine) to this file")
+    args = ap.parse_args()
+
+    report = run(args.rates, args.seconds, args.engines, args.repeat)
+    _print_table(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Sinais sintéticos determinísticos para os benchmarks (não dependem de arquivos de áudio)."""
+import io
+
+import numpy as np
+import soundfile as sf
+
+
+def voice_f0(t: np.ndarray) -> np.ndarray:
+    """F0 verdadeiro (Hz) do synth_voice nos instantes t (s): 150 ± 60 Hz a 0.3 Hz, vibrato de 5.5 Hz."""
+    return 150 + 60 * np.sin(2 * np.pi * 0.3 * t) + 5 * np.sin(2 * np.pi * 5.5 * t)
+
+
+def voice_envelope(t: np.ndarray) -> np.ndarray:
+    """Envelope do synth_voice: sílabas a ~4 Hz (meia onda) e pausas; 0 = só ruído de fundo."""
+    env = np.clip(np.sin(2 * np.pi * 4.0 * t), 0, None) ** 0.5
+    return env * (np.sin(2 * np.pi * 0.25 * t) > -0.6)  # pausas
+
+
+def synth_voice(sr: int, seconds: float, seed: int = 0, chunk_seconds: float = 10.0) -> np.ndarray:
+    """
+    Sinal "tipo voz" float32: fundamental de 90–220 Hz com vibrato e harmônicos até ~7 kHz,
+    envelope silábico (~4 Hz), pausas e ruído de fundo leve.
+    Gerado em blocos (fase contínua) para que 30 min a 48 kHz não precisem de vários
+    arrays float64 do tamanho do sinal inteiro.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(round(sr * seconds))
+    out = np.empty(n, dtype=np.float32)
+    n_harm = [k for k in range(1, 40) if k * 220 < min(7000, 0.45 * sr)]
+    step = max(1, int(chunk_seconds * sr))
+    phase0 = 0.0
+    for start in range(0, n, step):
+        t = np.arange(start, min(n, start + step)) / sr
+        f0 = voice_f0(t)
+        phase = phase0 + 2 * np.pi * np.cumsum(f0) / sr
+        phase0 = phase[-1]
+        y = np.zeros(t.size)
+        for k in n_harm:
+            y += np.sin(k * phase) / k
+        out[start:start + t.size] = 0.1 * y * voice_envelope(t) + 0.003 * rng.normal(size=t.size)
+    return out
+
+
+def wav_bytes(y: np.ndarray, sr: int, subtype: str = "PCM_16") -> bytes:
+    """Codifica o sinal como .wav em memória (entrada do estágio de decode)."""
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype=subtype)
+    return buf.getvalue()
@@ -0,0 +1,269 @@
+"""
+Suíte de benchmark: tempo, fator de tempo real (RTF), pico de RSS e alocações por estágio
+para os seis modos, em sinais sintéticos de 8/16/44.1/48 kHz e durações de 1 s a 30 min.
+
+Estágios medidos por caso (sr, duração, modo):
+  decode    sf.read do .wav (PCM 16 bits em memória)
+  resample  mono + float32 + reamostragem para 16 kHz (AudioAnalysis.from_array)
+  stft      |STFT| com a pré-ênfase usada pelo modo
+  features  restante do extrator (Mel/PCEN/dB, DCT, deltas, YIN, pooling/normalização)
+
+Cada caso roda num processo filho novo (pico de RSS isolado). O tempo é o melhor de
+--repeat execuções sem tracemalloc; as alocações (pico e saldo do tracemalloc, que enxerga
+os buffers do NumPy) vêm de uma execução extra instrumentada.
+
+Uso:
+    python -m benchmarks.suite --preset quick --json bench.json
+    python -m benchmarks.suite --preset full --json bench.json --baseline baseline.json
+Com --baseline, casos mais lentos (ou com mais RSS) que baseline × (1 + --tolerance)
+são listados e o processo sai com código 1.
+"""
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from voiceprint_features_144.analysis import AudioAnalysis, audio_input
+from voiceprint_features_144.modes import ALL_MODES, extract_mode
+from voiceprint_features_144.resample import DEFAULT_RESAMPLER
+
+from .signals import synth_voice, wav_bytes
+
+PRESETS = {
+    "quick": {"rates": [8000, 16000, 44100, 48000], "seconds": [1.0, 10.0]},
+    "full": {"rates": [8000, 16000, 44100, 48000], "seconds": [1.0, 10.0, 60.0, 300.0, 1800.0]},
+}
+STAGES = ("decode", "resample", "stft", "features")
+
+# Pré-ênfase do espectrograma de cada modo (o estágio stft aquece o mesmo cache que o extrator usa)
+PRE_EMPHASIS = {
+    "mfcc": 0.97, "mfcc_matrix": 0.97, "health_matrix": 0.97,
+    "logmel": None, "bio_mean144": None, "bio_mm72": None,
+}
+
+# Diferenças absolutas abaixo disso não contam como regressão (ruído de medição)
+MIN_WALL_DELTA_S = 0.005
+MIN_RSS_DELTA_MB = 5.0
+
+
+def _rss_mb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Zera o VmHWM do processo (Linux >= 4.0); sem isso o pico inclui o estado herdado."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    hwm = _rss_mb("VmHWM")
+    if hwm is not None:
+        return hwm
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _stages(data: bytes, mode: str, resampler: str):
+    """Executa o pipeline estágio a estágio; gera (nome, função) para medição externa."""
+    state: Dict[str, Any] = {}
+
+    def decode():
+        state["y"], state["sr"] = sf.read(audio_input(data), always_2d=False)
+
+    def resample():
+        state["an"] = AudioAnalysis.from_array(state["y"], state["sr"], resampler=resampler)
+
+    def stft():
+        state["an"].magnitude(PRE_EMPHASIS[mode])
+
+    def features():
+        state["out"] = extract_mode(state["an"], mode, resampler=resampler)
+
+    return [("decode", decode), ("resample", resample), ("stft", stft), ("features", features)]
+
+
+def run_case(sr: int, seconds: float, mode: str, repeat: int = 3, resampler: Optional[str] = None) -> Dict[str, Any]:
+    """Mede um caso no processo atual (use run_cases para isolar o RSS por caso)."""
+    resampler = resampler or DEFAULT_RESAMPLER
+    # 144 bandas Mel a 8 kHz deixam filtros vazios: esperado, não polui a tabela
+    warnings.filterwarnings("ignore", message="Empty filters detected")
+    data = wav_bytes(synth_voice(sr, seconds, seed=sr), sr)
+    base_rss = _rss_mb("VmRSS")
+    hwm_reset = _reset_peak_rss()
+
+    wall = {s: math.inf for s in STAGES}
+    for _ in range(max(1, repeat)):
+        for name, fn in _stages(data, mode, resampler):
+            t0 = time.perf_counter()
+            fn()
+            wall[name] = min(wall[name], time.perf_counter() - t0)
+    peak_rss = _peak_rss_mb()
+
+    alloc: Dict[str, Dict[str, float]] = {}
+    tracemalloc.start()
+    try:
+        for name, fn in _stages(data, mode, resampler):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            after, peak = tracemalloc.get_traced_memory()
+            alloc[name] = {"peak_mb": (peak - before) / 2**20, "net_mb": (after - before) / 2**20}
+    finally:
+        tracemalloc.stop()
+
+    total = sum(wall.values())
+    return {
+        "sr": sr,
+        "seconds": seconds,
+        "mode": mode,
+        "resampler": resampler,
+        "wall_s": total,
+        "rtf": total / seconds,
+        "peak_rss_mb": peak_rss,
+        "peak_rss_delta_mb": peak_rss - base_rss if (hwm_reset and base_rss is not None) else None,
+        "stages": {s: {"wall_s": wall[s], "alloc_peak_mb": alloc[s]["peak_mb"], "alloc_net_mb": alloc[s]["net_mb"]}
+                   for s in STAGES},
+    }
+
+
+def _run_case_star(args):
+    return run_case(*args)
+
+
+def run_cases(rates, seconds_list, modes, repeat=3, resampler=None, isolate=True) -> List[Dict[str, Any]]:
+    """Roda todos os casos; com isolate=True cada caso usa um processo filho novo."""
+    cases = []
+    for sr in rates:
+        for seconds in seconds_list:
+            # Sinais longos: menos repetições (o melhor de 3 só importa para casos curtos)
+            reps = max(1, min(repeat, math.ceil(60.0 / seconds)))
+            for mode in modes:
+                cases.append((sr, seconds, mode, reps, resampler))
+    if not isolate:
+        return [run_case(*c) for c in cases]
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    with mp.get_context(method).Pool(1, maxtasksperchild=1) as pool:
+        results = []
+        for r in pool.imap(_run_case_star, cases):
+            _print_row(r)
+            results.append(r)
+        return results
+
+
+def _key(r: Dict[str, Any]) -> str:
+    return f"{r['mode']}@{r['sr']}Hz/{r['seconds']:g}s"
+
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float = 0.15) -> List[Dict[str, Any]]:
+    """Casos cujo tempo total, tempo de algum estágio ou pico de RSS pioraram além da tolerância."""
+    base = {_key(r): r for r in baseline}
+    regressions = []
+
+    def check(key, metric, cur, ref, min_delta):
+        if ref is None or cur is None:
+            return
+        if cur > ref * (1.0 + tolerance) and cur - ref > min_delta:
+            regressions.append({"case": key, "metric": metric, "baseline": ref, "current": cur, "ratio": cur / ref})
+
+    for r in current:
+        key = _key(r)
+        ref = base.get(key)
+        if ref is None:
+            continue
+        check(key, "wall_s", r["wall_s"], ref["wall_s"], MIN_WALL_DELTA_S)
+        for s in STAGES:
+            check(key, f"stages.{s}.wall_s", r["stages"][s]["wall_s"], ref["stages"][s]["wall_s"], MIN_WALL_DELTA_S)
+        check(key, "peak_rss_mb", r["peak_rss_mb"], ref["peak_rss_mb"], MIN_RSS_DELTA_MB)
+    return regressions
+
+
+def _meta(preset: str, resampler: str) -> Dict[str, Any]:
+    import librosa
+    import scipy
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "preset": preset,
+        "resampler": resampler,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "librosa": librosa.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _print_row(r: Dict[str, Any]) -> None:
+    st = " ".join(f"{r['stages'][s]['wall_s'] * 1000:>9.1f}" for s in STAGES)
+    print(f"{r['mode']:<14} {r['sr']:>6} {r['seconds']:>7g}s {r['wall_s'] * 1000:>10.1f} {r['rtf']:>8.4f} "
+          f"{r['peak_rss_mb']:>9.1f} {st}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Wall time, RTF, peak RSS and per-stage allocations for every mode.")
+    ap.add_argument("--preset", choices=list(PRESETS), default="quick")
+    ap.add_argument("--rates", type=int, nargs="+", default=None, help="Override the preset sample rates")
+    ap.add_argument("--seconds", type=float, nargs="+", default=None, help="Override the preset durations")
+    ap.add_argument("--modes", nargs="+", choices=list(ALL_MODES), default=list(ALL_MODES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--resampler", default=None, help=f"Resampling engine (default: {DEFAULT_RESAMPLER})")
+    ap.add_argument("--no-isolate", action="store_true", help="Run every case in this process (RSS is cumulative)")
+    ap.add_argument("--json", default="", help="Write results to this JSON file")
+    ap.add_argument("--baseline", default="", help="Compare against a previous --json output")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs. baseline (0.15 = 15%%)")
+    args = ap.parse_args()
+
+    preset = PRESETS[args.preset]
+    rates = args.rates or preset["rates"]
+    seconds = args.seconds or preset["seconds"]
+    resampler = args.resampler or DEFAULT_RESAMPLER
+
+    print(f"{'mode':<14} {'sr':>6} {'dur':>8} {'wall ms':>10} {'RTF':>8} {'RSS MB':>9} "
+          + " ".join(f"{s:>9}" for s in STAGES))
+    results = run_cases(rates, seconds, args.modes, args.repeat, resampler, isolate=not args.no_isolate)
+    if args.no_isolate:
+        for r in results:
+            _print_row(r)
+
+    doc = {"meta": _meta(args.preset, resampler), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(doc, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for reg in regressions:
+            print(f"REGRESSION {reg['case']} {reg['metric']}: {reg['baseline']:.4g} -> {reg['current']:.4g} "
+                  f"(x{reg['ratio']:.2f})")
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions vs. {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
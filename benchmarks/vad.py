@@ -0,0 +1,121 @@
+"""
+Benchmark do VAD dos modos vetoriais (voiceprint_features_144.vad).
+
+Sinal: trechos de 2 s do synth_voice intercalados com silêncio (só o ruído de fundo), numa
+fração de silêncio fixa. Para cada taxa, fração de silêncio e modo mede, com e sem vad=True
+(melhor de --repeat, via collect_timings):
+  - tempo do extrator depois do STFT (mel/pcen/db/dct/delta/pooling + o próprio vad) e total
+  - fração de quadros com voz e quanto do pós-STFT foi economizado
+  - distância de cosseno entre o vetor com VAD e o vetor sem VAD só da fala (referência:
+    o mesmo extrator nos trechos de fala concatenados, sem os silêncios)
+
+Uso:
+    python -m benchmarks.vad --seconds 120 --json vad.json
+"""
+import argparse
+import json
+import warnings
+
+import numpy as np
+
+from voiceprint_features_144.analysis import AudioAnalysis
+from voiceprint_features_144.modes import VECTOR_MODES, extract_mode
+from voiceprint_features_144.timing import collect_timings
+
+from .signals import synth_voice
+
+SEGMENT_S = 2.0
+FRONT_END = ("decode", "resample", "pre_emphasis", "stft")
+
+
+def speech_with_silence(sr: int, seconds: float, silence: float, seed: int = 0):
+    """(sinal, só_fala): trechos de SEGMENT_S de fala separados por silêncio (fração `silence` do total)."""
+    rng = np.random.default_rng(seed)
+    speech = synth_voice(sr, seconds * (1.0 - silence), seed=seed)
+    seg = int(SEGMENT_S * sr)
+    gap = int(round(seg * silence / (1.0 - silence)))
+    parts = []
+    for start in range(0, len(speech), seg):
+        parts.append(speech[start:start + seg])
+        if gap:
+            parts.append((0.003 * rng.normal(size=gap)).astype(np.float32))
+    return np.concatenate(parts), speech
+
+
+def _cosine(a, b):
+    return float(1.0 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def _measure(y, sr, mode, vad, repeat):
+    best = {"features": np.inf, "total": np.inf}
+    for _ in range(repeat):
+        an = AudioAnalysis.from_array(y, sr)
+        with collect_timings() as timer:
+            feats, _, _ = extract_mode(an, mode, vad=vad)
+        after_stft = sum(v for k, v in timer.stages.items() if k not in FRONT_END)
+        best["features"] = min(best["features"], after_stft)
+        best["total"] = min(best["total"], timer.total())
+        best["vad_s"] = timer.stages.get("vad", 0.0)
+    return feats, an.voiced_fraction, best
+
+
+def run(rates, seconds, silences, modes, repeat=3):
+    report = []
+    for sr in rates:
+        for silence in silences:
+            y, speech = speech_with_silence(sr, seconds, silence, seed=sr)
+            for mode in modes:
+                plain, _, t_plain = _measure(y, sr, mode, False, repeat)
+                gated, voiced, t_vad = _measure(y, sr, mode, True, repeat)
+                speech_only = extract_mode(AudioAnalysis.from_array(speech, sr), mode)[0]
+                report.append({
+                    "sr": sr,
+                    "seconds": seconds,
+                    "silence": silence,
+                    "mode": mode,
+                    "voiced_fraction": voiced,
+                    "features_s": t_plain["features"],
+                    "features_vad_s": t_vad["features"],
+                    "vad_s": t_vad["vad_s"],
+                    "total_s": t_plain["total"],
+                    "total_vad_s": t_vad["total"],
+                    "saved": 1.0 - t_vad["features"] / t_plain["features"],
+                    "cos_dist_plain": _cosine(plain, speech_only),
+                    "cos_dist_vad": _cosine(gated, speech_only),
+                })
+    return report
+
+
+def _print_table(report):
+    head = (f"{'sr':>6} {'silence':>7} {'mode':<12} {'voiced':>7} {'feat ms':>8} {'+vad ms':>8} {'vad ms':>7} "
+            f"{'saved':>6} {'total ms':>9} {'+vad ms':>8} {'cos plain':>10} {'cos vad':>9}")
+    print(head)
+    print("-" * len(head))
+    for r in report:
+        print(f"{r['sr']:>6} {r['silence']:>7.2f} {r['mode']:<12} {r['voiced_fraction']:>7.2f} "
+              f"{r['features_s'] * 1000:>8.1f} {r['features_vad_s'] * 1000:>8.1f} {r['vad_s'] * 1000:>7.1f} "
+              f"{r['saved']:>6.0%} {r['total_s'] * 1000:>9.1f} {r['total_vad_s'] * 1000:>8.1f} "
+              f"{r['cos_dist_plain']:>10.2e} {r['cos_dist_vad']:>9.2e}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compute saved by the vector-mode VAD and its feature drift.")
+    ap.add_argument("--rates", type=int, nargs="+", default=[16000])
+    ap.add_argument("--seconds", type=float, default=120.0)
+    ap.add_argument("--silence", type=float, nargs="+", default=[0.0, 0.5, 0.8],
+                    help="Fraction of the signal that is silence (background noise only)")
+    ap.add_argument("--modes", nargs="+", choices=list(VECTOR_MODES), default=list(VECTOR_MODES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="", help="Write the full report to this file")
+    args = ap.parse_args()
+
+    warnings.filterwarnings("ignore", message="Empty filters detected")
+    report = run(args.rates, args.seconds, args.silence, args.modes, args.repeat)
+    _print_table(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# gunicorn.conf.py — `gunicorn -c gunicorn.conf.py api.wsgi:app`
+import os
+
+# O app é importado (e aquecido) uma vez no master antes do fork: os workers herdam o código
+# já compilado pelo numba e respondem /health pronto desde o primeiro request.
+preload_app = True
+# Thread de aquecimento não sobrevive ao fork: com preload, aquece de forma síncrona no master.
+os.environ.setdefault("WARMUP", "sync")
+
+bind = f"0.0.0.0:{os.getenv('FLASK_PORT', '8000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+
+def post_fork(server, worker):
+    # Pools nativos (BLAS/OpenMP) limitados em cada worker: o limite aplicado no master (create_app
+    # com preload) não sobrevive a pools recriados depois do fork
+    from api.admission import native_threads, pin_native_threads
+    from api.config import Config
+
+    pin_native_threads(native_threads(Config.NATIVE_THREADS, workers, Config.ADMISSION_MAX_WEIGHT))
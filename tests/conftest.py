@@ -8,3 +8,5 @@ if ROOT not in sys.path:
 # opcional: evitar inicialização CUDA etc.
 os.environ.setdefault("NUMBA_DISABLE_CUDA", "1")
 os.environ.setdefault("MPLBACKEND", "Agg")
+# create_app sem aquecimento nos testes (coberto em test_warmup.py)
+os.environ.setdefault("WARMUP", "0")
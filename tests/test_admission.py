@@ -0,0 +1,125 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from threadpoolctl import threadpool_info
+
+from api.admission import Governor, Overloaded, native_threads, parse_weights
+from api.app import create_app
+from api.config import Config
+
+
+def test_governor_weights_queue_and_timeouts():
+    seen, lock_free = [], []
+
+    def try_lock():
+        if gov._cond.acquire(blocking=False):
+            gov._cond.release()
+            lock_free.append(True)
+        else:
+            lock_free.append(False)
+
+    def observe(*a):
+        # observe roda fora do lock: outra thread consegue admitir/liberar enquanto as métricas gravam
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        seen.append(a)
+
+    gov = Governor(3, max_queue=1, timeout=0.2, retry_after=7, observe=observe)
+    assert gov.weight(["health_matrix"]) == 3 and gov.weight(["mfcc", "mfcc_matrix"]) == 3
+    assert gov.weight(["health_matrix", "mfcc_matrix"]) == 3  # acima da capacidade: roda sozinho
+
+    release, order = threading.Event(), []
+
+    def heavy():
+        with gov.admit(3, "health_matrix"):
+            release.wait()
+
+    def queued(label, w):
+        with gov.admit(w, label, bounded=False):
+            order.append(label)
+
+    t = threading.Thread(target=heavy)
+    t.start()
+    while gov.in_flight < 3:
+        time.sleep(0.001)
+    # sem vaga e fila vazia: espera até o timeout -> 503
+    with pytest.raises(Overloaded) as exc:
+        with gov.admit(1, "mfcc"):
+            pass
+    assert (exc.value.status, exc.value.retry_after) == (503, 7)
+
+    # um pedido em fila (sem limite de tempo): o próximo encontra a fila cheia -> 429
+    waiter = threading.Thread(target=queued, args=("mfcc_matrix", 2))
+    waiter.start()
+    while gov.info()["queued"] < 1:
+        time.sleep(0.001)
+    with pytest.raises(Overloaded) as exc:
+        with gov.admit(1, "mfcc"):
+            pass
+    assert exc.value.status == 429
+
+    release.set()
+    t.join()
+    waiter.join()
+    assert order == ["mfcc_matrix"] and gov.in_flight == 0
+    info = gov.info()
+    assert (info["admitted"], info["rejected"], info["timeout"]) == (2, 1, 1)
+    assert {outcome for _, outcome, _ in seen} == {"admitted", "rejected", "timeout"}
+    assert lock_free and all(lock_free)
+    assert max(s for label, outcome, s in seen if outcome == "timeout") >= 0.2
+
+    assert parse_weights("health_matrix=5")["health_matrix"] == 5
+    with pytest.raises(ValueError):
+        parse_weights("mfcc=0")
+    assert native_threads("auto", 64, 64) == 1 and native_threads("3", 2, 4) == 3
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "ADMISSION_MAX_WEIGHT", 2)
+    monkeypatch.setattr(Config, "ADMISSION_MAX_QUEUE", 0)
+    monkeypatch.setattr(Config, "NATIVE_THREADS", "1")
+    monkeypatch.setattr(Config, "STAGE_METRICS", "1")
+    app = create_app()
+    app.config.update(TESTING=True)
+    yield app
+    app.extensions["jobs"].shutdown(wait=True)
+
+
+def _wav(tmp_path, freq):
+    t = np.arange(8000) / 16000
+    path = tmp_path / f"tone{freq}.wav"
+    sf.write(str(path), (0.2 * np.sin(2 * np.pi * freq * t)).astype(np.float32), 16000)
+    return path
+
+
+def test_api_rejects_without_slot_and_serves_cache_hits(app, tmp_path):
+    client = app.test_client()
+    gov = app.extensions["governor"]
+    assert all(p["num_threads"] == 1 for p in threadpool_info())
+
+    def post(freq):
+        with open(_wav(tmp_path, freq), "rb") as f:
+            return client.post("/api/v1/extract?mode=mfcc", data={"file": (f, "a.wav")},
+                               content_type="multipart/form-data")
+
+    assert post(220).status_code == 200
+    with gov.admit(2, "test"):
+        resp = post(330)
+        assert resp.status_code == 429 and resp.headers["Retry-After"] == str(Config.ADMISSION_RETRY_AFTER)
+        assert resp.get_json()["admission"]["in_flight"] == 2
+        # acerto do cache não ocupa vaga
+        resp = post(220)
+        assert resp.status_code == 200 and resp.headers["X-Cache"] == "HIT"
+    assert post(330).status_code == 200
+
+    health = client.get("/health").get_json()
+    assert health["native_threads"] == 1 and health["admission"]["rejected"] == 1
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'voiceprint_queue_wait_seconds_count{mode="mfcc",outcome="rejected"} 1' in text
+    assert 'voiceprint_queue_wait_seconds_count{mode="mfcc",outcome="admitted"} 2' in text
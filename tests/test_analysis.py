@@ -0,0 +1,109 @@
+import numpy as np
+import soundfile as sf
+
+from voiceprint_features_144 import AudioAnalysis, extract_modes, extract_mode
+
+
+def _make_test_wav(tmp_path, sr=16000, secs=0.8, freq=200.0):
+    rng = np.random.default_rng(7)
+    t = np.arange(int(sr * secs)) / sr
+    sig = (0.2 * np.sin(2 * np.pi * freq * t) + 0.01 * rng.normal(size=t.size)).astype(np.float32)
+    wav_path = tmp_path / "analysis.wav"
+    sf.write(str(wav_path), sig, sr)
+    return wav_path
+
+
+def test_shared_analysis_matches_single_mode(tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=44100)
+    modes = ["mfcc", "logmel", "bio_mm72", "mfcc_matrix", "health_matrix"]
+
+    shared = extract_modes(str(wav_path), modes, use_pcen=True, n_frames=50)
+
+    for m in modes:
+        single, sr, band = extract_mode(str(wav_path), m, use_pcen=True, n_frames=50)
+        assert shared[m][1] == sr == 16000
+        assert tuple(shared[m][2]) == tuple(band)
+        np.testing.assert_array_equal(shared[m][0], single)
+
+
+def test_analysis_reuses_spectrogram(tmp_path):
+    wav_path = _make_test_wav(tmp_path)
+    an = AudioAnalysis.from_file(str(wav_path))
+
+    assert an.magnitude() is an.magnitude()
+    assert an.magnitude(0.97) is not an.magnitude()
+    mel = an.melspectrogram(48, 100, 7200)
+    assert mel.shape == (48, an.magnitude().shape[1])
+    assert an.melspectrogram(48, 100, 7200) is mel
+
+
+def test_in_memory_sources_match_path(tmp_path):
+    import io
+
+    wav_path = _make_test_wav(tmp_path, sr=22050)
+    data = wav_path.read_bytes()
+    y, sr = sf.read(str(wav_path), always_2d=False)
+    ref, ref_sr, _ = extract_mode(str(wav_path), "logmel")
+
+    for source in (data, io.BytesIO(data), (y, sr)):
+        feats, out_sr, _ = extract_mode(source, "logmel")
+        assert out_sr == ref_sr == 16000
+        np.testing.assert_array_equal(feats, ref)
+
+    # streaming relê o file-like (duas passadas no mfcc)
+    s_path, _, _ = extract_mode(str(wav_path), "mfcc", stream=True)
+    s_mem, _, _ = extract_mode(io.BytesIO(data), "mfcc", stream=True)
+    np.testing.assert_array_equal(s_mem, s_path)
+
+
+def test_blockwise_stft_magnitude_matches_librosa():
+    import librosa
+
+    from voiceprint_features_144.analysis import stft_magnitude
+    from voiceprint_features_144.bases import stft_window
+    from voiceprint_features_144.dsp import use_engine
+
+    rng = np.random.default_rng(3)
+    w = stft_window(512)
+    for n in (1000, 160 * 600 + 7, 16000 * 12 + 11):  # bloco único, bordas e vários blocos
+        y = rng.normal(size=n).astype(np.float32)
+        ref = np.abs(librosa.stft(y, n_fft=512, hop_length=160, window=w))
+        with use_engine("librosa"):
+            got = stft_magnitude(y, 512, 160, w)
+        assert got.dtype == np.float32
+        np.testing.assert_array_equal(got, ref)
+
+
+def test_float32_pipeline_and_peak_memory():
+    import io
+    import tracemalloc
+
+    from voiceprint_features_144.modes import ALL_MODES
+
+    sr, secs = 48000, 20.0
+    rng = np.random.default_rng(5)
+    t = np.arange(int(sr * secs)) / sr
+    mono = 0.2 * np.sin(2 * np.pi * 180 * t) + 0.01 * rng.normal(size=t.size)
+    buf = io.BytesIO()
+    sf.write(buf, np.stack([mono, 0.5 * mono], axis=1), sr, format="WAV", subtype="PCM_16")
+    data = buf.getvalue()
+    signal_bytes = int(sr * secs) * 4  # float32 mono na taxa original
+
+    an = AudioAnalysis.from_file(io.BytesIO(data))
+    feats = extract_modes(an, ALL_MODES, n_frames=64)
+    for m in ALL_MODES:
+        assert feats[m][0].dtype == (np.uint8 if m.endswith("_matrix") else np.float32), m
+    assert an.y.dtype == np.float32
+    for key, arr in an._cache.items():
+        if isinstance(arr, np.ndarray) and arr.dtype.kind == "f":
+            assert arr.dtype == np.float32, key
+
+    # pico de alocação por extrator, em múltiplos do sinal mono float32 decodificado (~1.5-3.2x;
+    # com decodificação estéreo inteira e cópias float64 passava de 7x)
+    extract_mode(data, "mfcc")
+    for m in ALL_MODES:
+        tracemalloc.start()
+        extract_mode(data, m)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < 4 * signal_bytes, (m, peak / signal_bytes)
@@ -195,3 +195,312 @@ def test_extract_health_matrix_ok(client, tmp_path):
     assert all(isinstance(row, list) and len(row) == 144 for row in payload["features"])
     assert payload["band"] == [fmin, fmax]
 
+
+
+def test_extract_multi_mode_ok(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=22050, secs=0.7, freq=440.0)
+
+    with open(wav_path, "rb") as f:
+        data = {"file": (f, "sample.wav")}
+        resp = client.post(
+            "/api/v1/extract?modes=mfcc,logmel,health_matrix&n_frames=64&pcen=1",
+            data=data,
+            content_type="multipart/form-data",
+        )
+
+    assert resp.status_code == 200, resp.data
+    payload = resp.get_json()
+    assert payload["modes"] == ["mfcc", "logmel", "health_matrix"]
+    assert payload["sr"] == 16000
+    results = payload["results"]
+    assert results["mfcc"]["shape"] == [144] and results["mfcc"]["pcen"] is False
+    assert results["logmel"]["shape"] == [144] and results["logmel"]["pcen"] is True
+    assert results["health_matrix"]["shape"] == [64, 144]
+    assert len(results["health_matrix"]["features"]) == 64
+
+
+def test_multi_mode_mfcc_matrix_is_always_16k(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=48000, secs=0.7, freq=440.0)
+
+    def post(query):
+        with open(wav_path, "rb") as f:
+            resp = client.post(f"/api/v1/extract?{query}", data={"file": (f, "sample.wav")},
+                               content_type="multipart/form-data")
+        assert resp.status_code == 200, resp.data
+        return resp.get_json()
+
+    single = post("mode=mfcc_matrix&n_frames=64")
+    multi = post("modes=mfcc,mfcc_matrix&n_frames=64&down16k=0")
+    assert multi["sr"] == 48000 and "sr" not in multi["results"]["mfcc"]
+    assert multi["results"]["mfcc_matrix"]["sr"] == single["sr"] == 16000
+    assert multi["results"]["mfcc_matrix"]["features"] == single["features"]
+
+
+def test_extract_multi_mode_unknown(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path)
+    with open(wav_path, "rb") as f:
+        data = {"file": (f, "sample.wav")}
+        resp = client.post("/api/v1/extract?modes=mfcc,nope", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    assert "unknown mode" in resp.get_json()["error"]
+
+
+def test_matrix_without_padding_reports_valid_frames(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.5, freq=440.0)  # 51 quadros
+
+    for pad, expected_rows in (("0", 51), ("1", 300)):
+        with open(wav_path, "rb") as f:
+            resp = client.post(
+                f"/api/v1/extract?mode=mfcc_matrix&n_frames=300&pad={pad}",
+                data={"file": (f, "sample.wav")},
+                content_type="multipart/form-data",
+            )
+        assert resp.status_code == 200, resp.data
+        payload = resp.get_json()
+        assert payload["n_valid_frames"] == 51
+        assert payload["shape"] == [expected_rows, 144]
+        assert len(payload["features"]) == expected_rows
+
+
+def _post(client, wav_path, query, **kw):
+    with open(wav_path, "rb") as f:
+        return client.post(
+            f"/api/v1/extract?{query}",
+            data={"file": (f, "sample.wav")},
+            content_type="multipart/form-data",
+            **kw,
+        )
+
+
+def test_binary_formats_match_json(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.7, freq=440.0)
+    ref = np.asarray(_post(client, wav_path, "mode=logmel").get_json()["features"], dtype=np.float32)
+
+    resp = _post(client, wav_path, "mode=logmel&format=npy")
+    assert resp.status_code == 200, resp.data
+    assert resp.mimetype == "application/x-npy"
+    assert resp.headers["X-Mode"] == "logmel"
+    arr = np.load(io.BytesIO(resp.data))
+    assert arr.dtype == np.float32 and arr.shape == (144,)
+    np.testing.assert_array_equal(arr, ref)
+
+    resp = _post(client, wav_path, "mode=logmel&format=raw&dtype=float16")
+    assert resp.status_code == 200, resp.data
+    assert resp.headers["X-Dtype"] == "<f2" and resp.headers["X-Shape"] == "144"
+    arr = np.frombuffer(resp.data, dtype="<f2")
+    np.testing.assert_allclose(arr, ref, rtol=1e-3, atol=1e-3)
+
+
+def test_msgpack_via_accept_header(client, tmp_path):
+    import msgpack
+    from api.encoders import unpack_array
+
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.7, freq=440.0)
+    resp = _post(client, wav_path, "modes=mfcc,health_matrix&n_frames=64",
+                 headers={"Accept": "application/x-msgpack"})
+    assert resp.status_code == 200, resp.data
+    assert resp.mimetype == "application/x-msgpack"
+    doc = msgpack.unpackb(resp.data, raw=False)
+    assert doc["modes"] == ["mfcc", "health_matrix"]
+    assert unpack_array(doc["results"]["mfcc"]["features"]).shape == (144,)
+    hm = unpack_array(doc["results"]["health_matrix"]["features"])
+    assert hm.dtype == np.uint8 and hm.shape == (64, 144)
+
+
+def test_matrix_ndjson_stream_matches_json(client, tmp_path, monkeypatch):
+    from api.config import Config
+
+    monkeypatch.setattr(Config, "STREAM_CHUNK_ROWS", 16)
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.7, freq=196.0)
+    ref = _post(client, wav_path, "mode=health_matrix&n_frames=50").get_json()
+
+    resp = _post(client, wav_path, "mode=health_matrix&n_frames=50", headers={"Accept": "application/x-ndjson"})
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.data.decode().splitlines()]
+    header, chunks, trailer = lines[0], lines[1:-1], lines[-1]
+    assert header["shape"] == [50, 144] and header["dtype"] == "uint8" and header["chunk_rows"] == 16
+    assert header["n_valid_frames"] == ref["n_valid_frames"] and header["band"] == ref["band"]
+    assert [c["offset"] for c in chunks] == [0, 16, 32, 48]
+    assert sum((c["rows"] for c in chunks), []) == ref["features"]
+    assert trailer == {"done": True, "rows": 50}
+
+    # ndjson só nos modos temporais; */* (curl) continua json
+    assert _post(client, wav_path, "mode=mfcc&format=ndjson").status_code == 400
+    assert _post(client, wav_path, "mode=mfcc", headers={"Accept": "*/*"}).mimetype == "application/json"
+
+
+def test_unsupported_format(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path)
+    assert _post(client, wav_path, "mode=mfcc&format=xml").status_code == 400
+    # npy/raw carregam um único array
+    assert _post(client, wav_path, "modes=mfcc,logmel&format=npy").status_code == 400
+
+
+def test_upload_is_decoded_in_memory(client, tmp_path, monkeypatch):
+    """Nenhum arquivo é gravado: o extrator recebe o stream do upload."""
+    import api.app as app_module
+
+    seen = []
+    orig = app_module.extract_mode
+
+    def spy(source, *args, **kw):
+        seen.append(source)
+        return orig(source, *args, **kw)
+
+    monkeypatch.setattr(app_module, "extract_mode", spy)
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.7, freq=523.0)  # conteúdo inédito: sem cache
+    resp = _post(client, wav_path, "mode=mfcc")
+    assert resp.status_code == 200, resp.data
+    assert len(seen) == 1 and hasattr(seen[0], "read")
+
+
+def test_resampler_param(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=48000, secs=0.5, freq=330.0)
+    resp = _post(client, wav_path, "mode=mfcc&resampler=polyphase")
+    assert resp.status_code == 200, resp.data
+    assert resp.get_json()["sr"] == 16000
+    assert _post(client, wav_path, "mode=mfcc&resampler=linear").status_code == 400
+
+
+def test_result_cache_and_etag(tmp_path, monkeypatch):
+    from api.config import Config
+
+    monkeypatch.setattr(Config, "RESULT_CACHE_DIR", str(tmp_path / "cache"))
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.6, freq=610.0)
+    client = create_app().test_client()
+
+    first = _post(client, wav_path, "mode=logmel&pcen=1")
+    again = _post(client, wav_path, "mode=logmel&pcen=1")
+    assert first.status_code == again.status_code == 200
+    assert (first.headers["X-Cache"], again.headers["X-Cache"]) == ("MISS", "HIT")
+    assert first.get_json()["features"] == again.get_json()["features"]
+    etag = first.headers["ETag"]
+    assert etag == again.headers["ETag"]
+
+    # outros parâmetros -> outra entrada; pcen não conta em mfcc
+    assert _post(client, wav_path, "mode=logmel&pcen=0").headers["X-Cache"] == "MISS"
+    assert _post(client, wav_path, "mode=mfcc&pcen=1").headers["ETag"] == _post(client, wav_path, "mode=mfcc").headers["ETag"]
+
+    # revalidação
+    resp = _post(client, wav_path, "mode=logmel&pcen=1", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and not resp.data
+
+    stats = client.get("/api/v1/cache").get_json()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert 0 < stats["hit_ratio"] < 1
+
+    # camada em disco compartilhada: outro "worker" (outra app) acha o resultado
+    other = create_app().test_client()
+    resp = _post(other, wav_path, "mode=logmel&pcen=1&format=npy")
+    assert resp.headers["X-Cache"] == "HIT"
+    np.testing.assert_array_equal(np.load(io.BytesIO(resp.data)), np.float32(first.get_json()["features"]))
+    assert other.get("/api/v1/cache").get_json()["disk_hits"] == 1
+
+
+def test_result_cache_evicts_by_size():
+    from api.cache import ResultCache
+
+    cache = ResultCache(max_bytes=3 * (144 * 4 + 512))
+    for i in range(5):
+        cache.put(str(i), {"features": np.zeros(144, dtype=np.float32)})
+    assert cache.get("0") is None and cache.get("4") is not None
+    info = cache.info()
+    assert info["evictions"] == 2 and info["entries"] == 3
+
+
+def test_stage_timings_and_metrics(tmp_path, monkeypatch):
+    from api.config import Config
+
+    assert create_app().test_client().get("/metrics").status_code == 404  # desligado por padrão
+    monkeypatch.setattr(Config, "STAGE_METRICS", "1")
+    client = create_app().test_client()  # histogramas zerados
+    wav_path = _make_test_wav(tmp_path, sr=22050, secs=0.7, freq=587.0)
+
+    resp = _post(client, wav_path, "mode=health_matrix&n_frames=50&timings=1")
+    assert resp.status_code == 200, resp.data
+    timings = resp.get_json()["timings"]
+    for name in ("upload", "hash", "decode", "resample", "stft", "pitch"):
+        assert name in timings["stages_ms"], name
+    assert timings["total_ms"] >= max(timings["stages_ms"].values())
+    assert "encode;dur=" in resp.headers["Server-Timing"]
+
+    # sem ?timings=1 o payload não muda; npy leva os tempos só no Server-Timing
+    assert "timings" not in _post(client, wav_path, "mode=health_matrix&n_frames=50").get_json()
+    resp = _post(client, wav_path, "mode=logmel&format=npy&timings=1")
+    assert resp.status_code == 200 and "decode;dur=" in resp.headers["Server-Timing"]
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE voiceprint_stage_seconds histogram" in text
+    assert 'voiceprint_stage_seconds_bucket{mode="health_matrix",sr="22050",stage="pitch",le="+Inf"}' in text
+    assert 'voiceprint_extract_seconds_count{mode="logmel",sr="22050"} 1' in text
+
+
+def test_pitch_param(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.7, freq=196.0)
+    resp = _post(client, wav_path, "mode=health_matrix&n_frames=40&pitch=acf")
+    assert resp.status_code == 200, resp.data
+    assert resp.get_json()["shape"] == [40, 144]
+    assert _post(client, wav_path, "mode=health_matrix&pitch=crepe").status_code == 400
+
+
+def test_vad_param(client, tmp_path):
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.8, freq=180.0)
+    resp = _post(client, wav_path, "mode=logmel&vad=1")
+    assert resp.status_code == 200, resp.data
+    body = resp.get_json()
+    assert 0 < body["voiced_fraction"] <= 1 and len(body["features"]) == 144
+    assert "voiced_fraction" not in _post(client, wav_path, "mode=logmel").get_json()
+
+    multi = _post(client, wav_path, "modes=mfcc,health_matrix&vad=1&n_frames=20").get_json()
+    assert "voiced_fraction" in multi["results"]["mfcc"]
+    assert "voiced_fraction" not in multi["results"]["health_matrix"]
+
+
+def test_batch_extract_stacked_and_streamed(client, tmp_path, monkeypatch):
+    import msgpack
+    from api.config import Config
+    from api.encoders import unpack_array
+
+    wavs = []
+    for i, freq in enumerate((180.0, 260.0, 340.0)):
+        d = tmp_path / f"w{i}"
+        d.mkdir()
+        wavs.append(_make_test_wav(d, sr=22050, secs=0.5, freq=freq))
+    refs = [np.asarray(_post(client, w, "mode=mfcc").get_json()["features"], dtype=np.float32) for w in wavs]
+
+    def files():
+        parts = [(open(w, "rb"), f"clip{i}.wav") for i, w in enumerate(wavs)]
+        parts.insert(1, (io.BytesIO(b"x"), "notes.txt"))
+        return {"file": parts}
+
+    resp = client.post("/api/v1/extract/batch?mode=mfcc", data=files(), content_type="multipart/form-data")
+    assert resp.status_code == 200, resp.data
+    body = resp.get_json()
+    assert (body["n_files"], body["ok"], body["failed"], body["shape"]) == (4, 3, 1, [3, 144])
+    assert [f["status"] for f in body["files"]] == ["ok", "error", "ok", "ok"]
+    assert [f.get("row") for f in body["files"]] == [0, None, 1, 2]
+    assert body["files"][0]["sr"] == 16000 and body["files"][0]["cache"] == "HIT"
+    np.testing.assert_array_equal(np.asarray(body["features"], dtype=np.float32), np.stack(refs))
+
+    resp = client.post("/api/v1/extract/batch?mode=health_matrix&n_frames=32", data=files(),
+                       content_type="multipart/form-data", headers={"Accept": "application/x-msgpack"})
+    doc = msgpack.unpackb(resp.data, raw=False)
+    hm = unpack_array(doc["features"])
+    assert hm.dtype == np.uint8 and hm.shape == (3, 32, 144) and doc["n_frames"] == 32
+
+    # acima de BATCH_STREAM_MIN_FILES: NDJSON em streaming, linhas por arquivo na ordem de conclusão
+    monkeypatch.setattr(Config, "BATCH_STREAM_MIN_FILES", 2)
+    resp = client.post("/api/v1/extract/batch?mode=mfcc", data=files(), content_type="multipart/form-data")
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.data.decode().splitlines()]
+    assert lines[0]["mode"] == "mfcc" and lines[0]["n_files"] == 4
+    assert lines[-1]["done"] and (lines[-1]["ok"], lines[-1]["failed"]) == (3, 1)
+    by_index = {r["index"]: r for r in lines[1:-1]}
+    assert sorted(by_index) == [0, 1, 2, 3] and by_index[1]["status"] == "error"
+    for i, ref in zip((0, 2, 3), refs):
+        np.testing.assert_array_equal(np.asarray(by_index[i]["features"], dtype=np.float32), ref)
+
+    monkeypatch.setattr(Config, "BATCH_MAX_FILES", 3)
+    assert client.post("/api/v1/extract/batch", data=files(), content_type="multipart/form-data").status_code == 400
+    assert client.post("/api/v1/extract/batch?modes=mfcc,logmel", data={"file": (open(wavs[0], "rb"), "a.wav")},
+                       content_type="multipart/form-data").status_code == 400
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from api.app import create_app
+from api.config import Config
+from api.jobs import CANCELLED, DONE, JobManager, QueueFull
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    app = create_app()
+    app.config.update(TESTING=True)
+    yield app.test_client()
+    app.extensions["jobs"].shutdown(wait=True)
+
+
+def _post(client, tmp_path, query, secs=0.7):
+    sr = 16000
+    t = np.arange(int(sr * secs)) / sr
+    wav_path = tmp_path / "job.wav"
+    sf.write(str(wav_path), (0.2 * np.sin(2 * np.pi * 300 * t)).astype(np.float32), sr)
+    with open(wav_path, "rb") as f:
+        return client.post(f"/api/v1/jobs?{query}", data={"file": (f, "job.wav")}, content_type="multipart/form-data")
+
+
+def _wait(client, job_id, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        view = client.get(f"/api/v1/jobs/{job_id}").get_json()
+        if view["status"] not in ("queued", "running"):
+            return view
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_matrix_mode_runs_as_background_job(client, tmp_path):
+    resp = _post(client, tmp_path, "mode=health_matrix&n_frames=64&pcen=1")
+    assert resp.status_code == 202, resp.data
+    job = resp.get_json()
+    assert job["status"] == "queued" and resp.headers["Location"] == f"/api/v1/jobs/{job['id']}"
+
+    view = _wait(client, job["id"])
+    assert view["status"] == DONE
+    assert view["result"]["shape"] == [64, 144] and view["result"]["mode"] == "health_matrix"
+
+    resp = client.get(f"/api/v1/jobs/{job['id']}?format=npy")
+    import io
+    assert np.load(io.BytesIO(resp.data)).shape == (64, 144)
+
+    # descartar o resultado
+    assert client.delete(f"/api/v1/jobs/{job['id']}").status_code == 200
+    assert client.get(f"/api/v1/jobs/{job['id']}").status_code == 404
+
+
+def test_vector_mode_stays_synchronous(client, tmp_path):
+    resp = _post(client, tmp_path, "mode=mfcc")
+    assert resp.status_code == 200, resp.data
+    job = resp.get_json()
+    assert job["status"] == DONE and len(job["result"]["features"]) == 144
+    assert client.get(f"/api/v1/jobs/{job['id']}").get_json()["status"] == DONE
+
+
+def test_unknown_job(client):
+    assert client.get("/api/v1/jobs/deadbeef").status_code == 404
+    assert client.delete("/api/v1/jobs/deadbeef").status_code == 404
+
+
+def test_bounded_queue_cancel_and_ttl(tmp_path):
+    jobs = JobManager(str(tmp_path), workers=1, max_pending=2, ttl=600)
+    gate = threading.Event()
+    running = jobs.submit(lambda: gate.wait(10) and {"ok": np.ones(3)})
+    queued = jobs.submit(lambda: {"ok": np.zeros(3)})
+    with pytest.raises(QueueFull):
+        jobs.submit(lambda: None)
+
+    assert jobs.cancel(queued["id"])["status"] == CANCELLED
+    # outro worker (mesmo diretório) enxerga o mesmo estado
+    other = JobManager(str(tmp_path))
+    assert other.get(queued["id"])["status"] == CANCELLED
+
+    gate.set()
+    jobs.shutdown(wait=True)
+    assert other.get(running["id"])["status"] == DONE
+    np.testing.assert_array_equal(other.result(running["id"])["ok"], np.ones(3))
+
+    other.ttl = 0.0
+    time.sleep(0.01)
+    assert other.get(running["id"]) is None
+
+
+def test_other_worker_cancel_and_expire_respect_running_jobs(tmp_path):
+    jobs = JobManager(str(tmp_path), workers=1, ttl=600)
+    other = JobManager(str(tmp_path), ttl=0.0, orphan_ttl=600)  # outro worker, TTL já vencido
+    started, gate = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        gate.wait(10)
+        return {"ok": np.ones(3)}
+
+    job = jobs.submit(slow)
+    started.wait(10)
+    time.sleep(0.01)
+    # em execução em outro worker: não expira pelo TTL dos terminados
+    assert other.get(job["id"])["status"] == "running"
+
+    # cancelado por outro worker durante a execução: o resultado não sobrescreve o CANCELLED
+    assert other.cancel(job["id"])["status"] == CANCELLED
+    gate.set()
+    jobs.shutdown(wait=True)
+    assert jobs._read(job["id"])["status"] == CANCELLED
+    assert not (tmp_path / f"{job['id']}.msgpack").exists()
+
+    # órfão (queued/running sem escrita há mais de orphan_ttl) é removido
+    orphan = jobs._new_record(None)
+    jobs._write(orphan)
+    time.sleep(0.01)
+    assert other.get(orphan["id"])["status"] == "queued"
+    other.orphan_ttl = 0.0
+    assert other.get(orphan["id"]) is None
@@ -0,0 +1,31 @@
+import numpy as np
+import scipy.fft
+import librosa
+
+from voiceprint_features_144.bases import bases_cache_info, dct_matrix, mel_basis, stft_window
+
+
+def test_bases_match_librosa_and_scipy():
+    np.testing.assert_array_equal(
+        mel_basis(16000, 512, 48, 100, 7200),
+        librosa.filters.mel(sr=16000, n_fft=512, n_mels=48, fmin=100, fmax=7200),
+    )
+    S = np.random.default_rng(0).normal(size=(64, 30)).astype(np.float32)
+    np.testing.assert_allclose(
+        dct_matrix(24, 64) @ S,
+        scipy.fft.dct(S, axis=0, type=2, norm="ortho")[:24],
+        rtol=1e-5, atol=1e-5,
+    )
+    assert stft_window(512).shape == (512,)
+
+
+def test_bases_cache_counts_hits():
+    mel_basis(8000, 256, 48, 100, 3600)
+    before = bases_cache_info()
+    basis = mel_basis(8000, 256, 48, 100, 3600)
+    after = bases_cache_info()
+
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert after["size"] <= after["maxsize"]
+    assert not basis.flags.writeable
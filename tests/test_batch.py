@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+from voiceprint_features_144 import extract_batch, extract_mfcc_144, iter_batch
+from voiceprint_features_144.cli import expand_inputs
+
+
+def _make_wavs(tmp_path, n=3, sr=16000, secs=0.5):
+    paths = []
+    for i in range(n):
+        t = np.arange(int(sr * secs)) / sr
+        sig = (0.2 * np.sin(2 * np.pi * (150 + 50 * i) * t)).astype(np.float32)
+        p = tmp_path / f"clip{i}.wav"
+        sf.write(str(p), sig, sr)
+        paths.append(str(p))
+    return paths
+
+
+def test_extract_batch_stacks_and_isolates_errors(tmp_path):
+    paths = _make_wavs(tmp_path)
+    bad = tmp_path / "broken.wav"
+    bad.write_bytes(b"not a wav")
+    paths.insert(1, str(bad))
+
+    res = extract_batch(paths, mode="mfcc", workers=2, chunksize=1)
+
+    assert res.features.shape == (4, 144)
+    assert res.ok.tolist() == [True, False, True, True]
+    assert np.isnan(res.features[1]).all()
+    assert list(res.errors) == [str(bad)]
+    np.testing.assert_array_equal(res.features[0], extract_mfcc_144(paths[0])[0])
+
+
+def test_iter_batch_ordered_matrix_mode(tmp_path):
+    paths = _make_wavs(tmp_path)
+    items = list(iter_batch(paths, mode="health_matrix", workers=1, n_frames=20))
+    assert [it.index for it in items] == [0, 1, 2]
+    assert all(it.features.shape == (20, 144) for it in items)
+
+
+def test_cli_batch_from_directory_and_manifest(tmp_path):
+    paths = _make_wavs(tmp_path, n=2)
+    manifest = tmp_path / "list.txt"
+    manifest.write_text("clip1.wav\nclip0.wav\n")
+
+    assert expand_inputs([str(tmp_path)]) == sorted(paths)
+    assert expand_inputs([str(manifest)]) == [paths[1], paths[0]]
+
+    out = subprocess.run(
+        [sys.executable, "-m", "voiceprint_features_144.cli", str(tmp_path), "--mode", "logmel", "--workers", "1"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    recs = [json.loads(line) for line in out.stdout.splitlines()]
+    assert [r["path"] for r in recs] == sorted(paths)
+    assert all(r["shape"] == [144] for r in recs)
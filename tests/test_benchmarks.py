@@ -0,0 +1,22 @@
+import copy
+
+from benchmarks.suite import STAGES, compare, run_case
+
+
+def test_run_case_reports_stages():
+    r = run_case(16000, 0.5, "mfcc", repeat=1)
+    assert set(r["stages"]) == set(STAGES)
+    assert r["wall_s"] > 0 and r["rtf"] == r["wall_s"] / 0.5
+    assert r["peak_rss_mb"] > 0
+    assert all(st["alloc_peak_mb"] >= 0 for st in r["stages"].values())
+
+
+def test_compare_flags_regressions():
+    base = run_case(16000, 0.5, "logmel", repeat=1)
+    assert compare([base], [base]) == []
+
+    slow = copy.deepcopy(base)
+    slow["wall_s"] = base["wall_s"] * 2 + 0.01
+    slow["stages"]["stft"]["wall_s"] += 0.01
+    flagged = {r["metric"] for r in compare([slow], [base], tolerance=0.15)}
+    assert flagged == {"wall_s", "stages.stft.wall_s"}
@@ -0,0 +1,157 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import scipy.signal
+import soundfile as sf
+
+from voiceprint_features_144 import dsp
+from voiceprint_features_144.analysis import stft_magnitude
+from voiceprint_features_144.dsp import use_engine
+from voiceprint_features_144.modes import ALL_MODES, PCEN_MODES, VECTOR_MODES, extract_mode
+from voiceprint_features_144.pitch import yin_frames
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tolerâncias do motor numpy em relação ao librosa:
+#  - banco Mel, dB, PCEN, deltas, autocorrelação e YIN: mesmas contas (iguais até o arredondamento)
+#  - |STFT|: janela e FFT em float32 (o librosa usa float64 e arredonda): |Δ| <= 1e-6 · max|X|
+#  - vetores 144D: |Δ| <= 1e-4 (dB/PCEN/MFCC da ordem de 1–100)
+#  - matrizes uint8: no máximo 1 nível, em até 0,1% das células
+VECTOR_ATOL = 1e-4
+MATRIX_LEVELS, MATRIX_FRACTION = 1, 1e-3
+
+
+def _voice(sr, secs=3.0, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * secs)) / sr
+    f0 = 150 + 20 * np.sin(2 * np.pi * 1.3 * t)
+    y = 0.2 * np.sin(2 * np.pi * np.cumsum(f0) / sr) * (1 + 0.5 * np.sin(2 * np.pi * 0.7 * t))
+    return (y + 0.02 * rng.normal(size=t.size)).astype(np.float32)
+
+
+def _both(fn):
+    out = {}
+    for engine in ("librosa", "numpy"):
+        with use_engine(engine):
+            out[engine] = fn()
+    return out["numpy"], out["librosa"]
+
+
+def test_numpy_ops_match_librosa():
+    rng = np.random.default_rng(0)
+    y = _voice(16000)
+    S = np.abs(rng.normal(size=(48, 300))).astype(np.float32)
+    w = scipy.signal.get_window("hann", 512)
+
+    for args in ((16000, 512, 48, 100, 7200, False), (16000, 512, 64, 100, 7000, True), (48000, 2048, 144, 100, 7200, False)):
+        got, ref = _both(lambda: dsp.mel_filters(*args))
+        assert got.dtype == np.float32
+        np.testing.assert_array_equal(got, ref)
+
+    got, ref = _both(lambda: np.abs(dsp.stft(y, 512, 160, w)))
+    assert got.dtype == ref.dtype == np.float32 and got.shape == ref.shape
+    assert np.abs(got - ref).max() <= 1e-6 * ref.max()
+
+    checks = {
+        "power_to_db": lambda: dsp.power_to_db(S**2, ref=np.max),
+        "pcen": lambda: dsp.pcen(S * 2**31, time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0),
+        "pcen_b": lambda: dsp.pcen(S, time_constant=0.06, eps=1e-6, b=0.5),
+        "delta1": lambda: dsp.delta(S, order=1),
+        "delta2": lambda: dsp.delta(S, order=2),
+        "rms": lambda: dsp.rms(y, 512, 160),
+        "autocorrelate": lambda: dsp.autocorrelate(y[:4000].reshape(8, 500).astype(np.float64), 300),
+        "yin": lambda: yin_frames(y[:16000].reshape(40, 400).astype(np.float64), 16000, 60, 500),
+    }
+    for name, fn in checks.items():
+        got, ref = _both(fn)
+        assert got.dtype == ref.dtype and got.shape == ref.shape, name
+        np.testing.assert_allclose(got, ref, rtol=1e-5, atol=1e-9, err_msg=name)
+
+    # estado do PCEN entre blocos igual ao do sinal inteiro
+    with use_engine("numpy"):
+        whole = dsp.pcen(S, time_constant=0.06, b=0.5)
+        a, zf = dsp.pcen(S[:, :100], time_constant=0.06, b=0.5, return_zf=True)
+        b = dsp.pcen(S[:, 100:], time_constant=0.06, b=0.5, zi=zf)
+        np.testing.assert_allclose(np.concatenate([a, b], axis=1), whole, rtol=1e-12)
+        with pytest.raises(ValueError):
+            dsp.delta(S[:, :8])
+        # |STFT| em blocos igual ao do sinal inteiro
+        y_long = np.random.default_rng(1).normal(size=16000 * 12 + 11).astype(np.float32)
+        np.testing.assert_array_equal(stft_magnitude(y_long, 512, 160, w), np.abs(dsp.stft(y_long, 512, 160, w)))
+
+    with pytest.raises(ValueError):
+        dsp.set_engine("torch")
+
+
+@pytest.mark.parametrize("sr", [16000, 48000])
+def test_numpy_engine_modes_match_librosa(sr):
+    buf = io.BytesIO()
+    sf.write(buf, _voice(sr), sr, format="WAV", subtype="PCM_16")
+    data = buf.getvalue()
+
+    for mode in ALL_MODES:
+        for pcen in ((False, True) if mode in PCEN_MODES else (False,)):
+            for vad in ((False, True) if mode in VECTOR_MODES else (False,)):
+                got, ref = _both(lambda: extract_mode(data, mode, use_pcen=pcen, vad=vad)[0])
+                label = f"{sr}/{mode}/pcen={pcen}/vad={vad}"
+                assert got.dtype == ref.dtype and got.shape == ref.shape, label
+                if mode in VECTOR_MODES:
+                    np.testing.assert_allclose(got, ref, rtol=0, atol=VECTOR_ATOL, err_msg=label)
+                else:
+                    diff = np.abs(got.astype(np.int16) - ref.astype(np.int16))
+                    assert diff.max() <= MATRIX_LEVELS and np.mean(diff > 0) <= MATRIX_FRACTION, label
+
+    got, ref = _both(lambda: extract_mode(data, "logmel", use_pcen=True, stream=True)[0])
+    np.testing.assert_allclose(got, ref, rtol=0, atol=VECTOR_ATOL)
+
+
+def test_numpy_engine_never_imports_librosa():
+    code = (
+        "import io, json, sys\n"
+        "import numpy as np, soundfile as sf\n"
+        "from voiceprint_features_144 import LiveExtractor, get_engine\n"
+        "from voiceprint_features_144.modes import ALL_MODES, extract_mode\n"
+        "t = np.arange(48000 * 2) / 48000\n"
+        "buf = io.BytesIO()\n"
+        "sf.write(buf, (0.2 * np.sin(2 * np.pi * 180 * t)).astype(np.float32), 48000, format='WAV')\n"
+        "for mode in ALL_MODES:\n"
+        "    extract_mode(buf.getvalue(), mode, use_pcen=True)\n"
+        "extract_mode(buf.getvalue(), 'mfcc', stream=True)\n"
+        "for resampler in ('soxr_hq', 'polyphase'):\n"
+        "    extract_mode(buf.getvalue(), 'mfcc', resampler=resampler)\n"
+        "live = LiveExtractor(16000, layout='health_matrix', use_pcen=True)\n"
+        "live.push(np.zeros(16000, np.float32)); live.flush(); live.summary()\n"
+        "print(json.dumps([get_engine()] + [m for m in ('librosa', 'numba', 'llvmlite', 'pooch', 'sklearn') if m in sys.modules]))\n"
+    )
+    env = dict(os.environ, VOICEPRINT_ENGINE="numpy")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT, env=env)
+    assert json.loads(out.stdout.splitlines()[-1]) == ["numpy"]
+
+
+def test_api_engine_from_config(tmp_path, monkeypatch):
+    from api.app import create_app
+    from api.config import Config
+
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "FEATURE_ENGINE", "numpy")
+    previous = dsp.get_engine()
+    try:
+        app = create_app()
+        client = app.test_client()
+        assert client.get("/health").get_json()["engine"] == "numpy"
+        buf = io.BytesIO()
+        sf.write(buf, _voice(16000, secs=1.0), 16000, format="WAV")
+        resp = client.post("/api/v1/extract?mode=mfcc", data={"file": (io.BytesIO(buf.getvalue()), "a.wav")},
+                           content_type="multipart/form-data")
+        assert resp.status_code == 200
+        with use_engine("librosa"):
+            ref = extract_mode(buf.getvalue(), "mfcc")[0]
+        np.testing.assert_allclose(resp.get_json()["features"], ref, rtol=0, atol=VECTOR_ATOL)
+        app.extensions["jobs"].shutdown(wait=True)
+    finally:
+        dsp.set_engine(previous)
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from voiceprint_features_144 import extract_mfcc_144
+from voiceprint_features_144.export import export_dataset, file_sha256, open_shards, read_manifest
+
+
+def _make_wavs(tmp_path, n=7, sr=16000, secs=0.4):
+    paths = []
+    for i in range(n):
+        t = np.arange(int(sr * secs)) / sr
+        p = tmp_path / "wavs" / f"clip{i}.wav"
+        p.parent.mkdir(exist_ok=True)
+        sf.write(str(p), (0.2 * np.sin(2 * np.pi * (150 + 40 * i) * t)).astype(np.float32), sr)
+        paths.append(str(p))
+    return paths
+
+
+class Interrupt(Exception):
+    pass
+
+
+def test_export_shards_manifest_and_resume(tmp_path):
+    paths = _make_wavs(tmp_path)
+    bad = tmp_path / "wavs" / "broken.wav"
+    bad.write_bytes(b"not a wav")
+    paths.insert(2, str(bad))
+    out = str(tmp_path / "out")
+
+    def stop_after_first_shard(state):
+        if state["shards"] == 1:
+            raise Interrupt
+
+    with pytest.raises(Interrupt):
+        export_dataset(paths, out, mode="mfcc", shard_rows=3, workers=2, chunksize=1, progress=stop_after_first_shard)
+    assert len(read_manifest(out)) == 3 and len(open_shards(out)) == 1
+
+    with pytest.raises(ValueError):
+        export_dataset(paths, out, mode="logmel", shard_rows=3)
+
+    # memmaps deixados por execuções interrompidas em shards anteriores
+    for stale in ("shard-00000.npy.partial", "shard-00001.npy.partial", "shard-00002.npy.tmp"):
+        with open(os.path.join(out, stale), "wb") as f:
+            f.write(b"\0" * 64)
+
+    state = export_dataset(paths, out, mode="mfcc", workers=1)
+    assert not [n for n in os.listdir(out) if n.endswith((".partial", ".tmp"))]
+    assert state["complete"] and (state["rows"], state["shards"], state["failed"]) == (7, 3, 1)
+    shards = open_shards(out)
+    assert [s.shape for s in shards] == [(3, 144), (3, 144), (1, 144)]
+
+    X = np.concatenate(shards)
+    records = read_manifest(out)
+    assert [r["row"] for r in records] == list(range(7))
+    assert [r["path"] for r in records] == [p for p in paths if p != str(bad)]
+    for r in records:
+        np.testing.assert_array_equal(X[r["row"]], extract_mfcc_144(r["path"])[0])
+        np.testing.assert_array_equal(shards[r["shard"]][r["offset"]], X[r["row"]])
+        assert r["sha256"] == file_sha256(r["path"])
+        assert r["sr"] == 16000
+    with open(os.path.join(out, "errors.jsonl")) as f:
+        assert [json.loads(line)["path"] for line in f] == [str(bad)]
+
+    # concluída: rodar de novo não refaz nada
+    assert export_dataset(paths, out, mode="mfcc")["rows"] == 7
+
+
+def test_cli_export_matrix_mode(tmp_path):
+    _make_wavs(tmp_path, n=3)
+    out = tmp_path / "out"
+    res = subprocess.run(
+        [sys.executable, "-m", "voiceprint_features_144.cli", "export", str(tmp_path / "wavs"), "--out", str(out),
+         "--mode", "health_matrix", "--n-frames", "64", "--shard-rows", "2", "--workers", "1"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    summary = json.loads(res.stdout)
+    assert (summary["rows"], summary["shards"], summary["row_shape"]) == (3, 2, [64, 144])
+    X = np.concatenate(open_shards(str(out)))
+    assert X.shape == (3, 64, 144) and X.dtype == np.uint8
+    assert all(r["n_valid_frames"] <= 64 for r in read_manifest(str(out)))
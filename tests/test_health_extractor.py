@@ -1,3 +1,5 @@
+import warnings
+
 import numpy as np
 import soundfile as sf
 
@@ -44,3 +46,67 @@ def test_health_matrix_handles_nan_pitch_without_zeroing_frames(tmp_path):
     # nenhuma linha deve ser zerada pela normalização.
     assert mat.shape == (32, 144)
     assert not np.any(np.all(mat == 0, axis=1))
+
+
+def test_matrix_modes_without_padding(tmp_path):
+    from voiceprint_features_144.extract_mfcc_matrix import extract_mfcc_matrix
+
+    wav_path = _make_test_wav(tmp_path, sr=16000, secs=0.5, freq=300.0)
+
+    padded, _, _ = extract_health_matrix(str(wav_path), target_frames=200)
+    valid, _, _ = extract_health_matrix(str(wav_path), target_frames=200, pad=False)
+    n_valid = valid.shape[0]
+    assert 0 < n_valid < 200 and valid.shape[1] == 144
+    np.testing.assert_array_equal(padded[:n_valid], valid)
+    assert not padded[n_valid:].any()
+
+    mat, _, _ = extract_mfcc_matrix(str(wav_path), target_frames=20, pad=False)
+    assert mat.shape == (20, 144)
+
+
+def test_normalize_rows_matches_row_loop():
+    from voiceprint_features_144.common_adaptive import normalize_rows_uint8
+
+    rng = np.random.default_rng(5)
+    X = rng.normal(size=(40, 144)).astype(np.float32) * 30
+    X[3] = 7.0  # linha constante
+    X[5, 10] = np.nan
+    X[6, 20], X[6, 21] = np.inf, -np.inf
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # sem "invalid value encountered in cast"
+        out = normalize_rows_uint8(X)
+    for i, row in enumerate(X):
+        if i in (5, 6):
+            continue
+        lo, hi = row.min(), row.max()
+        expected = np.zeros(144, np.uint8) if hi == lo else np.round((row - lo) / (hi - lo) * 255).astype(np.uint8)
+        np.testing.assert_array_equal(out[i], expected)
+    assert not out[3].any()
+    assert out[5][np.isfinite(X[5])].max() == 255
+    assert out[5, 10] == 0 and out[6, 20] == 255 and out[6, 21] == 0
+
+
+def test_matrix_modes_read_only_needed_span(tmp_path):
+    from voiceprint_features_144 import AudioAnalysis, extract_mode
+    from voiceprint_features_144.analysis import ensure_analysis, span_samples
+    from voiceprint_features_144.common_adaptive import span_frames
+
+    rng = np.random.default_rng(11)
+    sr = 44100
+    t = np.arange(sr * 6) / sr
+    # pico no fim do arquivo, fora dos quadros mantidos
+    sig = (0.05 + 0.9 * (t > 5)) * np.sin(2 * np.pi * 180 * t) + 0.005 * rng.normal(size=t.size)
+    wav_path = tmp_path / "long.wav"
+    sf.write(str(wav_path), sig.astype(np.float32), sr)
+
+    an = ensure_analysis(str(wav_path), max_frames=span_frames(50))
+    assert an.orig_sr == sr and len(an.y) == span_samples(16000, span_frames(50))
+
+    full = AudioAnalysis.from_file(str(wav_path))
+    for mode, kw in (("mfcc_matrix", {}), ("health_matrix", {}), ("health_matrix", {"use_pcen": True})):
+        for n_frames in (1, 50, 300):
+            span, _, _ = extract_mode(str(wav_path), mode, n_frames=n_frames, **kw)
+            ref, _, _ = extract_mode(full, mode, n_frames=n_frames, **kw)
+            assert span.shape == (n_frames, 144)
+            np.testing.assert_array_equal(span, ref)
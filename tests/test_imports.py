@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("numpy", "scipy", "librosa", "soundfile", "numba", "soxr")
+
+
+def _loaded_after(code):
+    """Módulos pesados presentes em sys.modules depois de rodar `code` num interpretador novo."""
+    probe = code + f"\nimport json, sys\nprint(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def test_package_import_is_lazy():
+    assert _loaded_after("import voiceprint_features_144") == []
+    # o primeiro acesso a um nome público carrega o submódulo
+    assert "numpy" in _loaded_after("import voiceprint_features_144 as v; v.extract_mfcc_144")
+
+
+def test_cli_help_does_not_load_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "from voiceprint_features_144 import cli\n"
+        "for argv in (['--help'], ['export', '--help']):\n"
+        "    try:\n"
+        "        cli.main(argv)\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+    )
+    assert _loaded_after(code) == []
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from api.app import create_app
+from api.config import Config
+from voiceprint_features_144.index import EmbeddingIndex, normalize_rows
+
+
+def _brute_force(V, alive, q, k):
+    S = normalize_rows(q) @ normalize_rows(V).T
+    S[:, alive == 0] = -np.inf
+    return np.argsort(-S, axis=1, kind="stable")[:, :k]
+
+
+def test_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    V = rng.normal(size=(1000, 144)).astype(np.float32)
+    index = EmbeddingIndex(str(tmp_path / "ix"), block_rows=128)  # vários blocos
+    index.append(V[:600], [f"s{i % 50}" for i in range(600)])
+    index.append(V[600:], [f"s{i % 50}" for i in range(600, 1000)])
+    assert len(index) == 1000
+
+    q = rng.normal(size=(7, 144)).astype(np.float32)
+    scores, rows = index.search(q, k=10)
+    alive = np.ones(1000, dtype=np.uint8)
+    np.testing.assert_array_equal(rows, _brute_force(V, alive, q, 10))
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+    # consulta igual a uma linha: ela mesma com cosseno 1
+    s, r = index.search(V[123], k=1)
+    assert r[0, 0] == 123 and s[0, 0] == pytest.approx(1.0, abs=1e-5)
+    speaker, score, row = index.identify(V[123], k=3)[0]
+    assert (speaker, row) == ("s23", 123) and score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_identify_finds_k_speakers_when_one_has_many_rows(tmp_path):
+    rng = np.random.default_rng(2)
+    alice = rng.normal(size=144).astype(np.float32)
+    V = np.vstack([alice + 0.01 * rng.normal(size=(20, 144)), rng.normal(size=(5, 144))]).astype(np.float32)
+    index = EmbeddingIndex(str(tmp_path / "ix"), block_rows=8)
+    index.append(V, ["alice"] * 20 + [f"s{i}" for i in range(5)])
+
+    found = index.identify(alice, k=5)
+    assert [sp for sp, _, _ in found][0] == "alice" and len({sp for sp, _, _ in found}) == 5
+    # melhor linha de cada locutor, em ordem decrescente de score
+    S = normalize_rows(alice) @ normalize_rows(V).T
+    assert [row for _, _, row in found[1:]] == [20 + i for i in np.argsort(-S[0, 20:])[:4]]
+    assert len(index.identify(alice, k=10)) == 6
+
+
+def test_delete_and_compact_are_shared_between_instances(tmp_path):
+    rng = np.random.default_rng(1)
+    V = rng.normal(size=(300, 144)).astype(np.float32)
+    labels = [f"s{i % 3}" for i in range(300)]
+    writer = EmbeddingIndex(str(tmp_path / "ix"), tag="mfcc")
+    reader = EmbeddingIndex(str(tmp_path / "ix"), tag="mfcc")  # outro worker no mesmo diretório
+    writer.append(V, labels)
+    assert len(reader) == 300
+
+    assert writer.delete("s1") == 100 and writer.delete("s1") == 0
+    alive = np.array([lb != "s1" for lb in labels], dtype=np.uint8)
+    q = rng.normal(size=(4, 144)).astype(np.float32)
+    np.testing.assert_array_equal(reader.search(q, 5)[1], _brute_force(V, alive, q, 5))
+    assert "s1" not in {sp for sp, _, _ in reader.identify(V[1], k=3)}
+
+    assert writer.maybe_compact(0.5) == 0 and writer.maybe_compact(0.25) == 100
+    info = reader.info()
+    assert (info["rows"], info["active"], info["deleted"], info["speakers"]) == (200, 200, 0, 2)
+    # depois da compactação as linhas mudam de índice, os vizinhos não
+    keep = np.flatnonzero(alive)
+    np.testing.assert_array_equal(keep[reader.search(q, 5)[1]], _brute_force(V, alive, q, 5))
+
+    with pytest.raises(ValueError):
+        EmbeddingIndex(str(tmp_path / "ix"), tag="logmel")
+    with pytest.raises(ValueError):
+        writer.append(V[:2, :72], ["a", "b"])
+
+
+def test_compaction_keeps_previous_epoch_for_lagging_readers(tmp_path):
+    rng = np.random.default_rng(3)
+    V = rng.normal(size=(40, 144)).astype(np.float32)
+    path = tmp_path / "ix"
+    writer = EmbeddingIndex(str(path))
+    writer.append(V, [f"s{i % 4}" for i in range(40)])
+    reader = EmbeddingIndex(str(path))
+    stale = reader._read_header()  # cabeçalho lido antes das compactações
+
+    writer.delete("s0")
+    writer.compact()
+    assert (path / "vectors.0.f32").exists()  # época anterior ainda disponível
+    writer.delete("s1")
+    writer.compact()
+    assert not (path / "vectors.0.f32").exists() and (path / "vectors.1.f32").exists()
+
+    # o leitor que ainda tinha o cabeçalho da época 0 relê o cabeçalho e mapeia a época 2
+    headers = iter([stale])
+    read_header = reader._read_header
+    reader._read_header = lambda: next(headers, None) or read_header()
+    reader._stamp = None
+    assert reader.refresh() and reader._header["epoch"] == 2
+    assert sorted(set(reader.speakers())) == ["s2", "s3"]
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "INDEX_DIR", str(tmp_path / "index"))
+    app = create_app()
+    app.config.update(TESTING=True)
+    yield app.test_client()
+    app.extensions["jobs"].shutdown(wait=True)
+
+
+def _voice(tmp_path, name, f0, secs=1.0, sr=16000):
+    t = np.arange(int(sr * secs)) / sr
+    y = sum(np.sin(2 * np.pi * f0 * h * t) / h**1.5 for h in range(1, 15)) * 0.1
+    path = tmp_path / f"{name}.wav"
+    sf.write(str(path), y.astype(np.float32), sr)
+    return open(path, "rb"), f"{name}.wav"
+
+
+def test_enroll_identify_delete(client, tmp_path):
+    for speaker, f0 in (("ana", 110), ("bia", 220), ("caio", 330)):
+        resp = client.post(f"/api/v1/enroll?speaker={speaker}", content_type="multipart/form-data",
+                           data={"file": [_voice(tmp_path, f"{speaker}1", f0), _voice(tmp_path, f"{speaker}2", f0 * 1.02)]})
+        assert resp.status_code == 201, resp.data
+        body = resp.get_json()
+        assert body["speaker"] == speaker and len(body["rows"]) == 2 and len(body["voiced_fraction"]) == 2
+    assert client.get("/api/v1/index").get_json()["active"] == 6
+
+    resp = client.post("/api/v1/identify?k=2", data={"file": _voice(tmp_path, "q", 223)},
+                       content_type="multipart/form-data")
+    assert resp.status_code == 200, resp.data
+    matches = resp.get_json()["matches"]
+    assert len(matches) == 2 and matches[0]["speaker"] == "bia"
+    assert matches[0]["score"] >= matches[1]["score"]
+
+    assert client.delete("/api/v1/speakers/bia").get_json()["deleted"] == 2
+    assert client.delete("/api/v1/speakers/bia").status_code == 404
+    resp = client.post("/api/v1/identify", data={"file": _voice(tmp_path, "q", 223)},
+                       content_type="multipart/form-data")
+    assert "bia" not in [m["speaker"] for m in resp.get_json()["matches"]]
+
+    assert client.post("/api/v1/enroll", data={"file": _voice(tmp_path, "x", 150)},
+                       content_type="multipart/form-data").status_code == 400
+    assert client.post("/api/v1/identify?k=0", data={"file": _voice(tmp_path, "x", 150)},
+                       content_type="multipart/form-data").status_code == 400
@@ -0,0 +1,68 @@
+import numpy as np
+import librosa
+import pytest
+
+from voiceprint_features_144.analysis import AudioAnalysis
+from voiceprint_features_144.pitch import PITCH_ESTIMATORS, estimate_pitch
+
+
+def _harmonic(sr=16000, secs=1.0, f0=180.0):
+    t = np.arange(int(sr * secs)) / sr
+    y = sum(np.sin(2 * np.pi * k * f0 * t) / k for k in range(1, 8))
+    return (0.1 * y).astype(np.float32), sr
+
+
+@pytest.mark.parametrize("sr", [8000, 16000, 22050])
+def test_yin_on_selected_frames_matches_librosa(sr):
+    y, _ = _harmonic(sr)
+    y += 0.01 * np.random.default_rng(0).normal(size=y.size).astype(np.float32)
+    an = AudioAnalysis.from_array(y, sr, force_down_to_16k=False)
+    ref = librosa.yin(an.signal(0.97), fmin=100, fmax=min(7200, sr // 2 - 1), sr=sr,
+                      frame_length=an.n_fft, hop_length=an.hop)
+    frames = np.array([0, 1, 7, 20, len(ref) - 1])
+    np.testing.assert_allclose(estimate_pitch(an, frames, "yin", 100, 7200, 0.97), ref[frames], rtol=1e-6)
+
+
+@pytest.mark.parametrize("method", PITCH_ESTIMATORS)
+def test_estimators_track_a_harmonic_tone(method):
+    y, sr = _harmonic(f0=180.0)
+    an = AudioAnalysis.from_array(y, sr)
+    f0 = estimate_pitch(an, np.arange(5, 95), method, 100, 7200, 0.97)
+    cents = np.abs(1200 * np.log2(f0 / 180.0))
+    assert np.median(cents) < 10 and np.mean(cents > 50) < 0.05
+
+
+def test_health_matrix_pitch_only_on_kept_voiced_frames(monkeypatch):
+    import importlib
+    hm = importlib.import_module("voiceprint_features_144.extract_health_matrix")  # o pacote reexporta a função com o mesmo nome
+
+    y, sr = _harmonic(secs=2.0)
+    y[4000:9000] = 0.0  # silêncio digital (quadros ~25 a ~56)
+    an = AudioAnalysis.from_array(y, sr)
+    seen = []
+
+    def spy(an_, frames, *args):
+        seen.append(np.asarray(frames))
+        return estimate_pitch(an_, frames, *args)
+
+    monkeypatch.setattr(hm, "estimate_pitch", spy)
+    for m in PITCH_ESTIMATORS:
+        mat, _, _ = hm.extract_health_matrix(an, target_frames=80, pitch=m)
+        assert mat.shape == (80, 144)
+    for frames in seen:
+        assert frames.max() < 80  # só quadros mantidos
+        assert not np.any((frames >= 30) & (frames <= 50))  # nem os silenciosos
+    with pytest.raises(ValueError):
+        hm.extract_health_matrix(an, pitch="crepe")
+
+
+@pytest.mark.parametrize("sr", [16000, 44100])
+def test_yin_decimated_last_frame_matches_whole_signal(sr):
+    y, _ = _harmonic(sr, f0=210.0)
+    y += 0.01 * np.random.default_rng(1).normal(size=y.size).astype(np.float32)
+    an = AudioAnalysis.from_array(y, sr, force_down_to_16k=False)
+    n = 1 + len(y) // an.hop
+    whole = estimate_pitch(an, np.arange(n), "yin_decimated", 100, 7200, 0.97)
+    for last in (10, 40, n - 30):
+        frames = np.array([0, last // 2, last])
+        np.testing.assert_array_equal(estimate_pitch(an, frames, "yin_decimated", 100, 7200, 0.97), whole[frames])
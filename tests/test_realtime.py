@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from api.app import create_app
+from voiceprint_features_144 import extract_streaming
+from voiceprint_features_144.extract_health_matrix import extract_health_matrix
+from voiceprint_features_144.extract_mfcc_matrix import extract_mfcc_matrix
+from voiceprint_features_144.realtime import FrameRing, LiveExtractor
+
+
+def _voice(sr=16000, secs=3.0):
+    rng = np.random.default_rng(3)
+    t = np.arange(int(sr * secs)) / sr
+    f0 = 150 + 20 * np.sin(2 * np.pi * 1.3 * t)
+    y = 0.2 * np.sin(2 * np.pi * np.cumsum(f0) / sr) * (1 + 0.5 * np.sin(2 * np.pi * 0.7 * t))
+    return (y + 0.02 * rng.normal(size=t.size)).astype(np.float32)
+
+
+def _run(y, bounds, **kw):
+    live = LiveExtractor(16000, **kw)
+    rows = [live.push(y[a:b]) for a, b in zip(bounds[:-1], bounds[1:])] + [live.flush()]
+    return np.concatenate(rows).astype(int), live
+
+
+def test_live_rows_match_file_extractors_for_any_chunking(tmp_path):
+    y = _voice()
+    wav = str(tmp_path / "voice.wav")
+    sf.write(wav, y, 16000)
+    rng = np.random.default_rng(0)
+    chunked = [0, *sorted(set(rng.integers(1, len(y), 150))), len(y)]
+
+    for layout, kw, ref in (
+        ("mfcc_matrix", {}, extract_mfcc_matrix(wav, pad=False)[0]),
+        ("health_matrix", {"use_pcen": True}, extract_health_matrix(wav, use_pcen=True, pad=False, target_frames=1000)[0]),
+    ):
+        whole, live = _run(y, [0, len(y)], layout=layout, **kw)
+        parts, live_parts = _run(y, chunked, layout=layout, **kw)
+        assert whole.shape == parts.shape == ref.shape
+        assert np.abs(whole - parts).max() <= 1
+        assert np.abs(whole - ref).max() <= 1
+        np.testing.assert_allclose(live.summary(), live_parts.summary(), atol=1e-4)
+
+    stream = extract_streaming(wav, "mfcc", exact_floor=False)[0]
+    np.testing.assert_allclose(live.summary(), stream, atol=1e-3)
+    _, live = _run(y, chunked, layout="mfcc_matrix", summary="logmel")
+    np.testing.assert_allclose(live.summary(), extract_streaming(wav, "logmel")[0], atol=0.02)
+
+
+def test_live_state_is_bounded():
+    rng = np.random.default_rng(1)
+    live = LiveExtractor(48000, layout="health_matrix")
+    chunk = (rng.normal(size=(4800, 2)) * 3000).astype(np.int16)  # 100 ms, estéreo s16
+    n_rows = 0
+    for _ in range(300):
+        n_rows += live.push(chunk).shape[0]
+    assert live.seconds == pytest.approx(30.0)
+    assert live.ring.buf.size == live.ring.n_fft + 64 * live.ring.hop
+    assert max(len(p) for p in live.pending) <= 8
+    assert live.deltas[0]._buf.shape[1] <= 9
+    n_rows += live.flush().shape[0]
+    assert n_rows == live.n_rows == 1 + (30 * 16000 - live.n_fft) // live.hop
+    assert live.summary().shape == (144,)
+
+    # menos de 9 quadros: sem deltas, sem linhas
+    short = LiveExtractor(16000, layout="mfcc_matrix")
+    assert short.push(np.zeros(400, np.float32)).shape == (0, 144)
+    assert short.flush().shape == (0, 144)
+    with pytest.raises(ValueError):
+        short.push(np.zeros(10, np.float32))
+    with pytest.raises(ValueError):
+        LiveExtractor(16000, pitch="yin_decimated")
+
+
+def test_frame_ring_matches_librosa_framing():
+    import librosa
+
+    y = np.random.default_rng(2).normal(size=3001).astype(np.float32)
+    for center in (True, False):
+        ring = FrameRing(512, 160, center=center, block=2)
+        frames = np.concatenate([ring.add(y[i:i + 333]) for i in range(0, len(y), 333)] + [ring.flush()])
+        ref = np.pad(y, 256) if center else y
+        np.testing.assert_array_equal(frames, librosa.util.frame(ref, frame_length=512, hop_length=160, axis=0))
+
+
+@pytest.fixture()
+def client():
+    app = create_app()
+    app.config.update(TESTING=True)
+    return app.test_client()
+
+
+def test_live_endpoint_streams_rows_and_summary(client):
+    y = _voice(secs=2.5)
+    pcm = (y * 32767).astype("<i2").tobytes()
+    resp = client.post("/api/v1/live?sr=16000&layout=mfcc_matrix", data=pcm + b"\x01",
+                       content_type="application/octet-stream")
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    header, done = lines[0], lines[-1]
+    assert (header["layout"], header["analysis_sr"], header["encoding"]) == ("mfcc_matrix", 16000, "s16le")
+    chunks = [r for r in lines if "rows" in r and "offset" in r]
+    rows = np.concatenate([np.array(c["rows"]) for c in chunks])
+    assert [c["offset"] for c in chunks] == list(np.cumsum([0] + [len(c["rows"]) for c in chunks[:-1]]))
+    assert rows.shape == (done["rows"], 144) and done["done"] and done["seconds"] == pytest.approx(2.5)
+    assert len([r for r in lines if "t" in r]) == 2
+
+    ref, live = _run(np.frombuffer(pcm, "<i2") / np.float32(32768), [0, len(y)], layout="mfcc_matrix")
+    assert rows.shape == ref.shape and np.abs(rows - ref).max() <= 1
+    np.testing.assert_allclose(done["summary"], live.summary(), atol=1e-4)
+
+    assert client.post("/api/v1/live", data=pcm).status_code == 400
+    assert client.post("/api/v1/live?sr=16000&encoding=mp3", data=pcm).status_code == 400
+    assert client.post("/api/v1/live?sr=16000&pitch=yin_decimated", data=pcm).status_code == 400
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import librosa
+
+from voiceprint_features_144 import extract_mode
+from voiceprint_features_144.resample import RESAMPLERS, check_resampler, resample
+
+
+def _tone(sr, secs=0.5):
+    t = np.arange(int(sr * secs)) / sr
+    return (0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("engine", RESAMPLERS)
+@pytest.mark.parametrize("sr", [22050, 44100, 48000])
+def test_engines_produce_16k(engine, sr):
+    y = _tone(sr)
+    out = resample(y, sr, 16000, engine)
+    assert out.dtype == np.float32
+    assert out.shape == (int(np.ceil(len(y) * 16000 / sr)),)
+    # energia da senoide preservada (440 Hz está longe da borda da banda)
+    assert abs(np.sqrt(np.mean(out[800:-800] ** 2)) - 0.2 / np.sqrt(2)) < 1e-3
+
+
+def test_polyphase_matches_librosa():
+    y = _tone(48000)
+    ref = librosa.resample(y, orig_sr=48000, target_sr=16000, res_type="polyphase")
+    np.testing.assert_allclose(resample(y, 48000, 16000, "polyphase"), ref, atol=1e-6)
+
+
+def test_resampler_selection():
+    assert check_resampler(None) in RESAMPLERS
+    with pytest.raises(ValueError):
+        check_resampler("linear")
+
+    y = _tone(44100)
+    a, sr, _ = extract_mode((y, 44100), "logmel", resampler="soxr_hq")
+    b, _, _ = extract_mode((y, 44100), "logmel", resampler="kaiser_best")
+    assert sr == 16000
+    assert not np.array_equal(a, b)
+    np.testing.assert_allclose(a, b, atol=1.0)  # dB: desvio pequeno entre motores
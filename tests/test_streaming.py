@@ -0,0 +1,57 @@
+import numpy as np
+import soundfile as sf
+import librosa
+
+from voiceprint_features_144 import extract_logmel_144, extract_mfcc_144, extract_streaming
+from voiceprint_features_144.streaming import QuantileSketch, RunningStats, StreamingDelta, StreamingSTFT
+
+
+def _make_test_wav(tmp_path, sr=16000, secs=3.0):
+    rng = np.random.default_rng(3)
+    t = np.arange(int(sr * secs)) / sr
+    sig = (0.2 * np.sin(2 * np.pi * 190 * t) * (1 + 0.5 * np.sin(2 * np.pi * 0.7 * t))
+           + 0.02 * rng.normal(size=t.size)).astype(np.float32)
+    sig[: sr // 2] = 0.0  # silêncio inicial: exercita o piso top_db global
+    wav_path = tmp_path / "long.wav"
+    sf.write(str(wav_path), sig, sr)
+    return wav_path
+
+
+def test_streaming_matches_in_memory_within_tolerance(tmp_path):
+    wav_path = str(_make_test_wav(tmp_path))
+
+    ref, sr, band = extract_mfcc_144(wav_path)
+    vec, sr_s, band_s = extract_streaming(wav_path, "mfcc", block_seconds=0.3)
+    assert (sr_s, band_s) == (sr, band)
+    np.testing.assert_allclose(vec, ref, atol=1e-3, rtol=1e-4)
+
+    ref, _, _ = extract_logmel_144(wav_path)
+    vec, _, _ = extract_streaming(wav_path, "logmel", block_seconds=0.3)
+    np.testing.assert_allclose(vec[:96], ref[:96], atol=1e-3)   # mean/std
+    np.testing.assert_allclose(vec[96:], ref[96:], atol=0.02)   # mediana: resolução do sketch
+
+
+def test_streaming_building_blocks_match_librosa():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=5000).astype(np.float32)
+
+    stft = StreamingSTFT(512, 160)
+    parts = [stft.push(y[i:i + 777]) for i in range(0, len(y), 777)] + [stft.flush()]
+    np.testing.assert_allclose(
+        np.concatenate(parts, axis=1), np.abs(librosa.stft(y, n_fft=512, hop_length=160)), rtol=1e-4, atol=1e-4
+    )
+
+    X = rng.normal(size=(6, 40))
+    for order in (1, 2):
+        d = StreamingDelta(order)
+        out = np.concatenate([d.push(X[:, i:i + 3]) for i in range(0, 40, 3)] + [d.flush()], axis=1)
+        np.testing.assert_allclose(out, librosa.feature.delta(X, order=order), atol=1e-10)
+
+    stats, sketch = RunningStats(6), QuantileSketch(6, resolution=1e-3, max_bins=512)
+    for i in range(0, 40, 7):
+        stats.update(X[:, i:i + 7])
+        sketch.update(X[:, i:i + 7])
+    np.testing.assert_allclose(stats.mean, X.mean(axis=1))
+    np.testing.assert_allclose(stats.std(), X.std(axis=1, ddof=1))
+    assert sketch.n_bins <= 512
+    np.testing.assert_allclose(sketch.median(), np.median(X, axis=1), atol=2 * sketch.res)
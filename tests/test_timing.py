@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from voiceprint_features_144.analysis import AudioAnalysis
+from voiceprint_features_144.modes import extract_mode
+from voiceprint_features_144.timing import collect_timings, stage
+
+
+def _signal(sr=22050, secs=1.0):
+    t = np.arange(int(sr * secs)) / sr
+    return (0.2 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), sr
+
+
+def test_stage_is_noop_without_collector():
+    # sem collect_timings ativo, stage() devolve sempre o mesmo context manager nulo
+    assert stage("a") is stage("b")
+
+
+def test_nested_stages_count_self_time():
+    with collect_timings() as t:
+        with stage("outer"):
+            with stage("inner"):
+                time.sleep(0.02)
+            time.sleep(0.01)
+    assert set(t.stages) == {"outer", "inner"}
+    assert t.stages["inner"] >= 0.02
+    assert 0.01 <= t.stages["outer"] < 0.02
+
+
+def test_extractor_stages_and_cached_front_end():
+    y, sr = _signal()
+    an = AudioAnalysis.from_array(y, sr)
+    with collect_timings() as t:
+        extract_mode(an, "health_matrix")
+    for name in ("pre_emphasis", "stft", "mel", "db", "delta", "rms", "pitch", "normalize"):
+        assert name in t.stages, name
+
+    # segundo modo sobre o mesmo AudioAnalysis: o STFT com pré-ênfase vem do cache
+    with collect_timings() as t2:
+        extract_mode(an, "mfcc")
+    assert "stft" in t2.stages  # potência |S|**2 ainda não calculada
+    assert "pre_emphasis" not in t2.stages
+
+    with collect_timings() as t3:
+        extract_mode((y, sr), "logmel")
+    assert t3.notes["orig_sr"] == sr
+    assert {"resample", "stft", "mel", "db", "pooling"} <= set(t3.stages)
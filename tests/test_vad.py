@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from voiceprint_features_144 import AudioAnalysis, extract_mode
+from voiceprint_features_144.vad import voice_activity
+
+
+def _speech_and_silence(sr=16000):
+    """1 s de tom harmônico, 1 s só de ruído leve, 1 s de tom: (sinal, máscara verdadeira por amostra)."""
+    rng = np.random.default_rng(3)
+    t = np.arange(sr) / sr
+    tone = sum(np.sin(2 * np.pi * 180 * k * t) / k for k in range(1, 12)) * 0.1
+    noise = 0.002 * rng.normal(size=3 * sr)
+    y = noise.copy()
+    y[:sr] += tone
+    y[2 * sr:] += tone
+    return y.astype(np.float32), sr
+
+
+def test_voice_activity_drops_silence_only():
+    y, sr = _speech_and_silence()
+    an = AudioAnalysis.from_array(y, sr)
+    secs = np.arange(an.magnitude().shape[1]) * an.hop / sr
+
+    for pre in (None, 0.97):
+        mask = an.voice_mask(pre)
+        assert mask[(secs < 0.9) | (secs > 2.1)].all()
+        assert not mask[(secs > 1.2) & (secs < 1.8)].any()
+        assert an.voiced_fraction == pytest.approx(mask.mean())
+
+    # só ruído: sem quadros com voz suficientes, nada é descartado
+    noise = np.random.default_rng(0).normal(scale=0.01, size=(257, 300)).astype(np.float32)
+    assert voice_activity(np.abs(noise), sr, an.hop).all()
+
+
+def test_vad_features_use_voiced_frames():
+    y, sr = _speech_and_silence()
+    an = AudioAnalysis.from_array(y, sr)
+    mask = an.voice_mask()
+
+    mel = an.melspectrogram(48, 100, 7200, vad=True)
+    np.testing.assert_allclose(mel, an.melspectrogram(48, 100, 7200)[:, mask], rtol=1e-5)
+
+    for mode in ("mfcc", "logmel", "bio_mean144", "bio_mm72"):
+        plain, _, _ = extract_mode(an, mode)
+        gated, _, _ = extract_mode(an, mode, vad=True)
+        assert gated.shape == plain.shape == (144,)
+        assert np.isfinite(gated).all() and not np.allclose(gated, plain)
+
+    with pytest.raises(ValueError):
+        extract_mode(y.tobytes(), "mfcc", stream=True, vad=True)
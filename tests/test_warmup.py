@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+import api.app as app_module
+from api.app import create_app
+from api.config import Config
+from voiceprint_features_144.warmup import warmup
+
+
+def test_warmup_runs_every_mode():
+    timings = warmup(rates=(16000, 22050), seconds=0.3)
+    for name in ("16000/front_end", "16000/mfcc", "16000/logmel+pcen+vad", "16000/health_matrix/yin",
+                 "22050/soxr_hq/front_end", "22050/soxr_hq/mfcc_matrix", "22050/stream"):
+        assert name in timings and timings[name] >= 0
+
+
+@pytest.fixture()
+def blocked_warmup(tmp_path, monkeypatch):
+    """create_app com WARMUP=background e um aquecimento que só termina quando o teste libera."""
+    release = threading.Event()
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "WARMUP", "background")
+    monkeypatch.setattr(app_module, "warmup", lambda **kw: release.wait(10))
+    app = create_app()
+    yield app, release
+    release.set()
+    app.extensions["jobs"].shutdown(wait=True)
+
+
+def test_health_reports_ready_after_warmup(blocked_warmup):
+    app, release = blocked_warmup
+    client = app.test_client()
+    resp = client.get("/health")
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+    assert resp.get_json()["status"] == "warming_up"
+
+    release.set()
+    assert app.extensions["readiness"].done.wait(10)
+    resp = client.get("/health")
+    assert resp.status_code == 200 and resp.get_json()["status"] == "ok" and "warmup_s" in resp.get_json()
+
+
+def test_failed_warmup_still_becomes_ready(tmp_path, monkeypatch):
+    def broken(**kw):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(Config, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "WARMUP", "sync")
+    monkeypatch.setattr(app_module, "warmup", broken)
+    app = create_app()
+    body = app.test_client().get("/health").get_json()
+    assert body["status"] == "ok" and body["warmup_error"] == "RuntimeError: boom"
+    app.extensions["jobs"].shutdown(wait=True)
@@ -1,4 +1,53 @@
-from .mfcc144 import extract_mfcc_144
-from .mel144 import extract_logmel_144
-from .extract_health_matrix import extract_health_matrix
-from .extract_mfcc_matrix import extract_mfcc_matrix
+"""
+Extratores 144D para biometria de voz. Os nomes públicos são carregados no primeiro acesso
+(PEP 562): `import voiceprint_features_144` não importa numpy/scipy/librosa/soundfile.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# nome público -> submódulo que o define
+_LAZY = {
+    "extract_mfcc_144": ".mfcc144",
+    "extract_logmel_144": ".mel144",
+    "extract_health_matrix": ".extract_health_matrix",
+    "extract_mfcc_matrix": ".extract_mfcc_matrix",
+    "AudioAnalysis": ".analysis",
+    "extract_mode": ".modes",
+    "extract_modes": ".modes",
+    "extract_batch": ".batch",
+    "iter_batch": ".batch",
+    "extract_streaming": ".streaming",
+    "LiveExtractor": ".realtime",
+    "collect_timings": ".timing",
+    "set_engine": ".dsp",
+    "get_engine": ".dsp",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value  # próximos acessos não passam por aqui
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:  # analisadores estáticos / IDEs veem os imports de sempre
+    from .mfcc144 import extract_mfcc_144
+    from .mel144 import extract_logmel_144
+    from .extract_health_matrix import extract_health_matrix
+    from .extract_mfcc_matrix import extract_mfcc_matrix
+    from .analysis import AudioAnalysis
+    from .modes import extract_mode, extract_modes
+    from .batch import extract_batch, iter_batch
+    from .streaming import extract_streaming
+    from .realtime import LiveExtractor
+    from .timing import collect_timings
+    from .dsp import get_engine, set_engine
@@ -0,0 +1,24 @@
+"""Gravação atômica de arquivos, compartilhada pelo índice, pelo export e pelos caches/jobs da API."""
+import os
+import tempfile
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Grava via arquivo temporário no mesmo diretório + fsync + os.replace: outro processo nunca lê
+    um arquivo pela metade, e após uma queda fica o conteúdo antigo ou o novo inteiro.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
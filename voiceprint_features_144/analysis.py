@@ -0,0 +1,322 @@
+import io
+import math
+import os
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+import numpy as np
+import soundfile as sf
+from . import dsp
+from .bases import dct_matrix, mel_basis, stft_window
+from .common_adaptive import to_mono, stft_params_from_sr
+from .resample import resample
+from .timing import note, stage
+from .vad import voice_activity
+
+
+# Entradas aceitas pelos extratores (além de um AudioAnalysis já carregado; ver ensure_analysis)
+AudioSource = Union[str, os.PathLike, BinaryIO, bytes, Tuple[np.ndarray, int], "AudioAnalysis"]
+
+# |STFT| calculado em blocos de colunas: o complexo de cada bloco ocupa até STFT_BLOCK_BYTES
+# (o librosa.stft do sinal inteiro materializa a matriz complexa toda, 2x o tamanho do |STFT|)
+STFT_BLOCK_BYTES = 1 << 20
+
+# Quadros decodificados por bloco na mixagem para mono: o arquivo multicanal nunca fica inteiro na memória
+DECODE_BLOCK_FRAMES = 1 << 16
+
+# Amostras extras (em segundos) lidas além do trecho necessário quando há reamostragem: cobre o
+# suporte do filtro de todos os motores, e as amostras do trecho saem iguais às do arquivo inteiro
+RESAMPLE_MARGIN_S = 0.1
+
+
+def stft_magnitude(y: np.ndarray, n_fft: int, hop: int, window: np.ndarray) -> np.ndarray:
+    """
+    |librosa.stft(y, center=True, pad_mode="constant")| em float32, igual coluna a coluna, mas
+    calculado em blocos que escrevem direto na saída: o pico de memória é o |STFT| mais um bloco.
+    """
+    half = n_fft // 2
+    n_cols = 1 + (len(y) + 2 * half - n_fft) // hop
+    block = max(16, STFT_BLOCK_BYTES // (8 * (half + 1)))
+    if n_cols <= block:
+        return np.abs(dsp.stft(y, n_fft, hop, window))
+    out = np.empty((half + 1, n_cols), dtype=np.float32)
+    for c0 in range(0, n_cols, block):
+        c1 = min(c0 + block, n_cols)
+        # amostras dos quadros c0..c1-1 (quadro t começa em t * hop - n_fft//2); fora do sinal = zeros
+        lo, hi = c0 * hop - half, (c1 - 1) * hop - half + n_fft
+        if lo >= 0 and hi <= len(y):
+            seg = y[lo:hi]
+        else:
+            seg = np.zeros(hi - lo, dtype=y.dtype)
+            a, b = max(lo, 0), min(hi, len(y))
+            seg[a - lo:b - lo] = y[a:b]
+        np.abs(dsp.stft(seg, n_fft, hop, window, center=False), out=out[:, c0:c1])
+    return out
+
+
+def read_mono(f: sf.SoundFile, frames: int = -1) -> np.ndarray:
+    """
+    Lê até `frames` quadros (-1: todos) de um SoundFile aberto como float32 mono.
+    Multicanal é decodificado em blocos de DECODE_BLOCK_FRAMES e mixado (to_mono) direto no vetor
+    de saída; o resultado é igual a to_mono(f.read(...)).
+    """
+    if f.channels == 1 or f.frames <= 0:
+        return to_mono(f.read(frames=frames, dtype="float32", always_2d=False))
+    n = f.frames - f.tell() if frames < 0 else min(frames, f.frames - f.tell())
+    out = np.empty(n, dtype=np.float32)
+    pos = 0
+    for block in f.blocks(blocksize=DECODE_BLOCK_FRAMES, frames=n, dtype="float32", always_2d=True):
+        out[pos:pos + len(block)] = to_mono(block)
+        pos += len(block)
+    return out[:pos]
+
+
+def analysis_sr(sr: int, force_down_to_16k: bool = True) -> int:
+    """Taxa do AudioAnalysis para um áudio em `sr` (nunca upsample; 16 kHz se sr > 16k e force_down_to_16k)."""
+    return 16000 if force_down_to_16k and sr > 16000 else int(sr)
+
+
+def span_samples(sr: int, n_frames: int) -> int:
+    """
+    Amostras (em `sr`) que cobrem os quadros [0, n_frames) do STFT (center=True) e também
+    os do RMS com center=False, que vão até t * hop + n_fft.
+    """
+    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    return (max(1, n_frames) - 1) * hop + n_fft
+
+
+def input_span(orig_sr: int, n_frames: int, force_down_to_16k: bool = True) -> int:
+    """Amostras do arquivo (em orig_sr) a decodificar para que os n_frames primeiros quadros saiam exatos."""
+    sr = analysis_sr(orig_sr, force_down_to_16k)
+    n = span_samples(sr, n_frames)
+    if sr == orig_sr:
+        return n
+    return math.ceil(n * orig_sr / sr) + math.ceil(RESAMPLE_MARGIN_S * orig_sr)
+
+
+class AudioAnalysis:
+    """
+    Front-end de análise compartilhado entre os extratores.
+
+    Decodifica, converte para mono e reamostra o áudio uma única vez; a
+    pré-ênfase, o espectrograma (magnitude/potência) e as projeções Mel são
+    calculados sob demanda e guardados, de modo que pedir vários modos para
+    a mesma gravação não repete decode/resample/STFT.
+    """
+
+    def __init__(self, y: np.ndarray, sr: int, orig_sr: Optional[int] = None):
+        self.y = y
+        self.sr = int(sr)
+        self.orig_sr = int(orig_sr if orig_sr is not None else sr)
+        self.n_fft, self.hop = stft_params_from_sr(self.sr, 25.0, 10.0)
+        self._cache: Dict[tuple, np.ndarray] = {}
+        self.voiced_fraction: Optional[float] = None  # fração de quadros com voz do último voice_mask
+
+    @classmethod
+    def from_file(
+        cls,
+        wav_path,
+        force_down_to_16k: bool = True,
+        resampler: Optional[str] = None,
+        max_frames: Optional[int] = None,
+    ) -> "AudioAnalysis":
+        """
+        Decodifica um caminho, objeto file-like (upload, BytesIO) ou bytes com o conteúdo do .wav.
+        max_frames: decodifica só o início do arquivo necessário para os max_frames primeiros
+        quadros (ver input_span); esses quadros saem iguais aos do arquivo inteiro.
+        """
+        with stage("decode"):
+            with sf.SoundFile(audio_input(wav_path)) as f:
+                sr = f.samplerate
+                y = read_mono(f, -1 if max_frames is None else input_span(sr, max_frames, force_down_to_16k))
+        return cls.from_array(y, sr, force_down_to_16k=force_down_to_16k, resampler=resampler, max_frames=max_frames)
+
+    @classmethod
+    def from_array(
+        cls,
+        y: np.ndarray,
+        sr: int,
+        force_down_to_16k: bool = True,
+        resampler: Optional[str] = None,
+        max_frames: Optional[int] = None,
+    ) -> "AudioAnalysis":
+        """
+        Amostras já decodificadas (n,) ou (n, canais). resampler: ver resample.RESAMPLERS.
+        max_frames: mantém só as amostras necessárias para os max_frames primeiros quadros.
+        Tudo segue em float32: uma entrada float32 mono não é copiada (self.y é o próprio array).
+        """
+        note("orig_sr", int(sr))
+        with stage("resample"):
+            y = np.asarray(y)
+            if max_frames is not None:
+                y = y[: input_span(sr, max_frames, force_down_to_16k)]
+            y = to_mono(np.asarray(y, dtype=np.float32))
+            orig_sr = sr
+
+            # Padroniza SR (opcional). Nunca upsample; apenas downsample se sr > 16k.
+            if force_down_to_16k and sr > 16000:
+                y = resample(y, sr, 16000, resampler)
+                sr = 16000
+            if max_frames is not None:
+                y = y[: span_samples(sr, max_frames)]
+
+        return cls(y, sr, orig_sr=orig_sr)
+
+    def _cached(self, key: tuple, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def signal(self, pre_emphasis: Optional[float] = None) -> np.ndarray:
+        """Sinal (opcionalmente pré-enfatizado: y[t] = x[t] - coef * x[t-1])."""
+        if not pre_emphasis:
+            return self.y
+
+        def _pre():
+            y = self.y
+            if len(y) > 1:
+                with stage("pre_emphasis"):
+                    # um único buffer float32: out[1:] = -coef * x[:-1], depois += x[1:]
+                    out = np.empty_like(y)
+                    out[0] = y[0]
+                    np.multiply(y[:-1], -pre_emphasis, out=out[1:])
+                    out[1:] += y[1:]
+                    y = out
+            return y
+
+        return self._cached(("signal", float(pre_emphasis)), _pre)
+
+    def magnitude(self, pre_emphasis: Optional[float] = None) -> np.ndarray:
+        """|STFT| (n_fft//2 + 1, T) com janela/hop adaptativos ao sr."""
+
+        def _mag():
+            y = self.signal(pre_emphasis)
+            with stage("stft"):
+                return stft_magnitude(y, self.n_fft, self.hop, stft_window(self.n_fft))
+
+        return self._cached(("magnitude", float(pre_emphasis or 0.0)), _mag)
+
+    def power(self, pre_emphasis: Optional[float] = None) -> np.ndarray:
+        """Espectrograma de potência |STFT|**2."""
+
+        def _pow():
+            S = self.magnitude(pre_emphasis)
+            with stage("stft"):
+                return S ** 2
+
+        return self._cached(("power", float(pre_emphasis or 0.0)), _pow)
+
+    def voice_mask(self, pre_emphasis: Optional[float] = None) -> np.ndarray:
+        """
+        Quadros com voz (T,) do |STFT| com essa pré-ênfase (ver vad.voice_activity).
+        Atualiza self.voiced_fraction a cada chamada.
+        """
+
+        def _mask():
+            S = self.magnitude(pre_emphasis)
+            with stage("vad"):
+                return voice_activity(S, self.sr, self.hop, pre_emphasis)
+
+        mask = self._cached(("vad", float(pre_emphasis or 0.0)), _mask)
+        self.voiced_fraction = float(mask.mean()) if mask.size else 0.0
+        return mask
+
+    def melspectrogram(
+        self,
+        n_mels: int,
+        fmin: int,
+        fmax: int,
+        power: float = 1.0,
+        htk: bool = False,
+        pre_emphasis: Optional[float] = None,
+        vad: bool = False,
+    ) -> np.ndarray:
+        """
+        Projeção Mel (n_mels, T) do espectrograma de magnitude (power=1) ou potência (power=2),
+        como produto de matriz com o banco de filtros em cache (bases.mel_basis).
+        vad=True projeta só os quadros de voice_mask (n_mels, T_voz).
+        """
+
+        def _mel():
+            if vad:
+                S = self.magnitude(pre_emphasis)[:, self.voice_mask(pre_emphasis)]
+                if power != 1.0:
+                    S = S ** power
+            elif power == 1.0:
+                S = self.magnitude(pre_emphasis)
+            elif power == 2.0:
+                S = self.power(pre_emphasis)
+            else:
+                S = self.magnitude(pre_emphasis) ** power
+            with stage("mel"):
+                return mel_basis(self.sr, self.n_fft, n_mels, fmin, fmax, htk) @ S
+
+        key = ("mel", n_mels, fmin, fmax, float(power), bool(htk), float(pre_emphasis or 0.0), bool(vad))
+        if vad:
+            self.voice_mask(pre_emphasis)  # voiced_fraction também em acerto do cache
+        return self._cached(key, _mel)
+
+    def mfcc(
+        self,
+        n_mfcc: int,
+        n_mels: int,
+        fmin: int,
+        fmax: int,
+        pre_emphasis: Optional[float] = None,
+        floor_frames: Optional[int] = None,
+        vad: bool = False,
+    ) -> np.ndarray:
+        """
+        MFCC (n_mfcc, T), equivalente a librosa.feature.mfcc(..., htk=True).
+        floor_frames: o piso top_db=80 do power_to_db usa o pico só dos floor_frames primeiros
+        quadros (e não do sinal inteiro), para que eles não dependam do áudio depois deles.
+        vad=True: só os quadros de voice_mask (n_mfcc, T_voz).
+        """
+
+        def _mfcc():
+            S = self.melspectrogram(n_mels, fmin, fmax, power=2.0, htk=True, pre_emphasis=pre_emphasis, vad=vad)
+            with stage("dct"):
+                if floor_frames is None:
+                    return dct_matrix(n_mfcc, n_mels) @ dsp.power_to_db(S)
+                S_db = dsp.power_to_db(S, top_db=None)
+                return dct_matrix(n_mfcc, n_mels) @ np.maximum(S_db, S_db[:, :floor_frames].max() - 80.0)
+
+        key = ("mfcc", n_mfcc, n_mels, fmin, fmax, float(pre_emphasis or 0.0), floor_frames, bool(vad))
+        if vad:
+            self.voice_mask(pre_emphasis)
+        return self._cached(key, _mfcc)
+
+
+def audio_input(source):
+    """
+    Normaliza a entrada para o soundfile: caminhos e objetos file-like passam direto;
+    bytes/bytearray/memoryview (conteúdo do .wav) viram um BytesIO, sem tocar o disco.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        return source
+    raise TypeError(f"unsupported audio source: {type(source).__name__}")
+
+
+def ensure_analysis(
+    source,
+    force_down_to_16k: bool = True,
+    resampler: Optional[str] = None,
+    max_frames: Optional[int] = None,
+) -> AudioAnalysis:
+    """
+    Aceita:
+      - AudioAnalysis já carregado (a reamostragem dele prevalece; force_down_to_16k/resampler/max_frames são ignorados)
+      - (y, sr): amostras já decodificadas (np.ndarray) e sua taxa de amostragem
+      - caminho de .wav, objeto file-like ou bytes com o conteúdo do arquivo
+    max_frames: só os max_frames primeiros quadros do STFT serão usados (decode/resample só do trecho necessário).
+    """
+    if isinstance(source, AudioAnalysis):
+        return source
+    common = {"force_down_to_16k": force_down_to_16k, "resampler": resampler, "max_frames": max_frames}
+    if isinstance(source, tuple):
+        y, sr = source
+        return AudioAnalysis.from_array(y, sr, **common)
+    if isinstance(source, np.ndarray):
+        raise TypeError("ndarray input needs its sample rate: pass (y, sr)")
+    return AudioAnalysis.from_file(source, **common)
+
@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+from . import dsp
+
+
+class BoundedCache:
+    """
+    Cache LRU limitado, seguro entre threads, com contadores de hit/miss/eviction.
+    Os valores guardados são arrays somente leitura (compartilhados entre requisições).
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = build()
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# Cache do processo inteiro: (sr, n_fft, n_mels, fmin, fmax, htk) se repetem entre requisições
+_BASES = BoundedCache(int(os.getenv("VOICEPRINT_BASES_CACHE_SIZE", "64")))
+
+
+def mel_basis(sr: int, n_fft: int, n_mels: int, fmin: float, fmax: float, htk: bool = False) -> np.ndarray:
+    """Banco de filtros Mel (n_mels, 1 + n_fft//2) float32, igual a librosa.filters.mel (montado pelo motor atual)."""
+    key = ("mel", dsp.get_engine(), int(sr), int(n_fft), int(n_mels), float(fmin), float(fmax), bool(htk))
+    return _BASES.get_or_build(key, lambda: dsp.mel_filters(sr, n_fft, n_mels, fmin, fmax, htk))
+
+
+def dct_matrix(n_mfcc: int, n_mels: int) -> np.ndarray:
+    """Matriz DCT-II ortonormal (n_mfcc, n_mels): M = D @ S equivale a scipy.fft.dct(S, axis=0, norm='ortho')[:n_mfcc]."""
+    key = ("dct", int(n_mfcc), int(n_mels))
+    return _BASES.get_or_build(
+        key,
+        lambda: scipy.fft.dct(np.eye(n_mels, dtype=np.float32), type=2, norm="ortho", axis=0)[:n_mfcc].copy(),
+    )
+
+
+def stft_window(n_fft: int) -> np.ndarray:
+    """Janela de Hann periódica (n_fft,), a mesma que librosa.stft usa com window='hann'."""
+    key = ("window", int(n_fft))
+    return _BASES.get_or_build(key, lambda: scipy.signal.get_window("hann", n_fft, fftbins=True))
+
+
+def resample_filter(up: int, down: int) -> np.ndarray:
+    """FIR anti-aliasing padrão do scipy.signal.resample_poly (Kaiser β=5, 20 lobos por fase) para up/down."""
+    key = ("resample", int(up), int(down))
+    max_rate = max(int(up), int(down))
+    return _BASES.get_or_build(
+        key, lambda: scipy.signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    )
+
+
+def bases_cache_info() -> Dict[str, int]:
+    """Contadores do cache de bases (hits, misses, evictions, size, maxsize)."""
+    return _BASES.info()
+
+
+def clear_bases_cache() -> None:
+    _BASES.clear()
@@ -0,0 +1,148 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+from .modes import ALL_MODES, VECTOR_MODES, extract_mode
+
+
+class BatchItem(NamedTuple):
+    """Resultado de um arquivo do lote; `error` != None indica falha isolada daquele arquivo."""
+    index: int
+    path: str
+    features: Optional[np.ndarray]
+    sr: Optional[int]
+    band: Optional[Tuple[int, int]]
+    error: Optional[str]
+
+
+class BatchResult(NamedTuple):
+    """
+    features: (N, 144) float32 empilhado nos modos vetoriais (linhas com falha = NaN);
+              None nos modos temporais (use `items`).
+    items:    um BatchItem por arquivo, na ordem de `paths`.
+    """
+    features: Optional[np.ndarray]
+    items: List[BatchItem]
+
+    @property
+    def ok(self) -> np.ndarray:
+        return np.array([it.error is None for it in self.items], dtype=bool)
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        return {it.path: it.error for it in self.items if it.error is not None}
+
+
+def _extract_one(index: int, path: str, mode: str, params: dict) -> BatchItem:
+    try:
+        feats, sr, band = extract_mode(path, mode, **params)
+        return BatchItem(index, path, feats, int(sr), (int(band[0]), int(band[1])), None)
+    except Exception as e:  # erro isolado por arquivo
+        return BatchItem(index, path, None, None, None, f"{type(e).__name__}: {e}")
+
+
+def _run_chunk(fn: Callable, chunk: Sequence[Tuple[int, str]], *args) -> List[Any]:
+    return [fn(i, p, *args) for i, p in chunk]
+
+
+def _init_worker() -> None:
+    # Um processo por núcleo: evita que BLAS/FFT de cada worker abram mais threads
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def iter_batch(
+    paths: Iterable[str],
+    mode: str = "mfcc",
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    ordered: bool = True,
+    **params,
+) -> Iterator[BatchItem]:
+    """
+    Extrai `mode` de vários arquivos em um pool de processos, em blocos de
+    `chunksize` arquivos por tarefa. Gera BatchItem na ordem de `paths`
+    (ordered=True) ou conforme os blocos terminam (ordered=False).
+    `params` são repassados a extract_mode (use_pcen, force_down_to_16k, n_frames, fmin, fmax).
+    workers<=1 executa no processo atual.
+    """
+    if mode not in ALL_MODES:
+        raise ValueError(f"unknown mode: {mode}")
+    indexed = list(enumerate(str(p) for p in paths))
+    if not indexed:
+        return
+    yield from pool_map(_extract_one, indexed, (mode, params), workers, chunksize, ordered)
+
+
+def pool_map(
+    fn: Callable,
+    indexed: Sequence[Tuple[int, str]],
+    args: tuple = (),
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    ordered: bool = True,
+) -> Iterator[Any]:
+    """
+    Aplica fn(índice, caminho, *args) a cada item de `indexed` num pool de processos, em blocos
+    de `chunksize` itens por tarefa, e gera os resultados na ordem de `indexed` (ordered=True)
+    ou conforme os blocos terminam. `fn` precisa ser uma função de módulo (vai por pickle).
+    No máximo 4 blocos por worker ficam em andamento: a memória de resultados não lidos
+    não cresce com o tamanho do lote.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(indexed)))
+    if workers == 1:
+        for i, p in indexed:
+            yield fn(i, p, *args)
+        return
+
+    if chunksize is None:
+        # ~4 blocos por worker equilibra carga sem pagar IPC por arquivo
+        chunksize = max(1, math.ceil(len(indexed) / (workers * 4)))
+    chunks = (indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+        pending = deque(ex.submit(_run_chunk, fn, c, *args) for c in _take(chunks, workers * 4))
+        while pending:
+            if ordered:
+                fut = pending.popleft()
+            else:
+                fut = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                pending.remove(fut)
+            results = fut.result()
+            pending.extend(ex.submit(_run_chunk, fn, c, *args) for c in _take(chunks, 1))
+            yield from results
+
+
+def _take(it: Iterator, n: int) -> List[Any]:
+    return [c for _, c in zip(range(n), it)]
+
+
+def extract_batch(
+    paths: Iterable[str],
+    mode: str = "mfcc",
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    **params,
+) -> BatchResult:
+    """
+    Versão "coletada" de iter_batch: retorna BatchResult com os vetores
+    empilhados (N, 144) nos modos vetoriais e os itens por arquivo.
+    """
+    items = sorted(
+        iter_batch(paths, mode=mode, workers=workers, chunksize=chunksize, ordered=False, **params),
+        key=lambda it: it.index,
+    )
+    if mode not in VECTOR_MODES:
+        return BatchResult(None, items)
+
+    X = np.full((len(items), 144), np.nan, dtype=np.float32)
+    for it in items:
+        if it.error is None:
+            X[it.index] = it.features
+    return BatchResult(X, items)
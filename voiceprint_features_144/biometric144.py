@@ -1,56 +1,59 @@
 # biometric144.py
 import json
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
-import soundfile as sf
-import librosa
-from .common_adaptive import to_mono, stft_params_from_sr, safe_voice_band
+from . import dsp
+from .analysis import AudioAnalysis, AudioSource, ensure_analysis
+from .common_adaptive import safe_voice_band
+from .timing import stage
 
-def _logmel(y, sr, n_bands: int, use_pcen: bool, fmin: int, fmax: int, n_fft: int, hop: int):
+def _logmel(an: AudioAnalysis, n_bands: int, use_pcen: bool, fmin: int, fmax: int, vad: bool = False):
     # Espectrograma Mel (magnitude)
-    S = librosa.feature.melspectrogram(
-        y=y, sr=sr, n_mels=n_bands, n_fft=n_fft, hop_length=hop,
-        fmin=fmin, fmax=fmax, power=1.0
-    )
+    S = an.melspectrogram(n_bands, fmin, fmax, power=1.0, vad=vad)
     if use_pcen:
-        X = librosa.pcen(S * (2**31), time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0)
+        with stage("pcen"):
+            # o filtro IIR do PCEN roda em float64; volta para float32 uma vez, na saída
+            X = dsp.pcen(S * (2**31), time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0)
+            X = X.astype(np.float32)
     else:
-        X = librosa.power_to_db(S**2 + 1e-12, ref=np.max)
+        with stage("db"):
+            S2 = np.square(S)
+            S2 += 1e-12
+            X = dsp.power_to_db(S2, ref=np.max)
     return X  # shape: (n_bands, T)
 
 def extract_biometric_144(
-    wav_path: str,
+    wav_path: AudioSource,
     mode: str = "mean144",         # "mean144" (padrão) ou "mean_median_72"
     use_pcen: bool = False,
-    force_down_to_16k: bool = True
+    force_down_to_16k: bool = True,
+    resampler: Optional[str] = None,
+    vad: bool = False,
 ) -> Tuple[np.ndarray, int, Tuple[int, int]]:
     """
     Extrai um vetor 144D sem derivadas e SEM variância/desvio:
       - mode="mean144": Log-Mel 144 bandas + média no tempo -> (144,)
       - mode="mean_median_72": Log-Mel 72 bandas + [média, mediana] -> (144,)
     Retorna: (features[144], sr, (fmin,fmax))
+    vad=True: Mel/PCEN/dB e estatísticas só nos quadros com voz (ver vad.py).
     """
-    y, sr = sf.read(wav_path, always_2d=False)
-    y = to_mono(y).astype(np.float32)
-
     # Downsample consistente (não faz upsample)
-    if force_down_to_16k and sr > 16000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=16000, res_type="kaiser_best")
-        sr = 16000
-
-    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    an = ensure_analysis(wav_path, force_down_to_16k, resampler)
+    sr = an.sr
     fmin, fmax = safe_voice_band(sr, 100, 7200)
 
     if mode == "mean_median_72":
-        X = _logmel(y, sr, n_bands=72, use_pcen=use_pcen, fmin=fmin, fmax=fmax, n_fft=n_fft, hop=hop)
-        mean = X.mean(axis=1)
-        med  = np.median(X, axis=1)
-        feat = np.concatenate([mean, med], axis=0).astype(np.float32)  # 72*2 = 144
+        X = _logmel(an, n_bands=72, use_pcen=use_pcen, fmin=fmin, fmax=fmax, vad=vad)
+        with stage("pooling"):
+            mean = X.mean(axis=1)
+            med  = np.median(X, axis=1)
+            feat = np.concatenate([mean, med], axis=0, dtype=np.float32)  # 72*2 = 144
     else:
         # default: mean144
-        X = _logmel(y, sr, n_bands=144, use_pcen=use_pcen, fmin=fmin, fmax=fmax, n_fft=n_fft, hop=hop)
-        mean = X.mean(axis=1)
-        feat = mean.astype(np.float32)  # 144*1 = 144
+        X = _logmel(an, n_bands=144, use_pcen=use_pcen, fmin=fmin, fmax=fmax, vad=vad)
+        with stage("pooling"):
+            mean = X.mean(axis=1)
+            feat = np.asarray(mean, dtype=np.float32)  # 144*1 = 144
 
     assert feat.shape[0] == 144
     return feat, sr, (fmin, fmax)
@@ -1,51 +1,177 @@
-import argparse, json
-from .mfcc144 import extract_mfcc_144
-from .mel144 import extract_logmel_144
-from .extract_health_matrix import extract_health_matrix
-
-def main():
-    ap = argparse.ArgumentParser(description="Extract 144D audio features (vector or per-frame matrix).")
-    ap.add_argument("wav", help="Path to .wav file")
-    ap.add_argument("--mode", choices=["mfcc", "logmel", "health_matrix"], default="mfcc")
-    ap.add_argument("--pcen", action="store_true", help="Use PCEN (logmel or health_matrix)")
+import argparse, csv, glob, json, os, sys
+# Só nomes/padrões aqui: numpy/scipy/librosa são importados depois do parse (--help fica barato)
+from .options import (
+    ALL_MODES, DEFAULT_PITCH, DEFAULT_RESAMPLER, MATRIX_MODES, PCEN_MODES, PITCH_ESTIMATORS, RESAMPLERS,
+)
+
+MANIFEST_EXTS = (".txt", ".lst", ".csv")
+
+def expand_inputs(specs):
+    """
+    Expande as entradas do CLI em uma lista de .wav:
+      - diretório  -> todos os .wav (recursivo, ordenados)
+      - glob       -> padrões com * ? [ ] (aceita **)
+      - manifesto  -> .txt/.lst (um caminho por linha) ou .csv (primeira coluna);
+                      caminhos relativos são resolvidos a partir do manifesto
+      - arquivo    -> ele mesmo
+    """
+    paths = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            found = glob.glob(os.path.join(spec, "**", "*.wav"), recursive=True)
+            found += glob.glob(os.path.join(spec, "**", "*.WAV"), recursive=True)
+            paths += sorted(set(found))
+        elif any(c in spec for c in "*?["):
+            paths += sorted(glob.glob(spec, recursive=True))
+        elif spec.lower().endswith(MANIFEST_EXTS):
+            base = os.path.dirname(os.path.abspath(spec))
+            with open(spec, newline="") as f:
+                rows = csv.reader(f) if spec.lower().endswith(".csv") else ([ln] for ln in f)
+                for row in rows:
+                    p = row[0].strip() if row else ""
+                    if not p or p.startswith("#") or p.lower() == "path":
+                        continue
+                    paths.append(p if os.path.isabs(p) else os.path.join(base, p))
+        else:
+            paths.append(spec)
+    return paths
+
+def build_payload(mode, feats, sr, band, pcen, voiced_fraction=None):
+    payload = {"sr": int(sr), "band": [int(band[0]), int(band[1])], "mode": mode}
+    if mode in PCEN_MODES:
+        payload["pcen"] = bool(pcen)
+    if voiced_fraction is not None:
+        payload["voiced_fraction"] = round(voiced_fraction, 4)
+    payload["shape"] = list(feats.shape)
+    payload["features"] = feats.tolist()
+    return payload
+
+def add_extraction_args(ap):
+    """Opções de extração comuns ao comando principal e ao `export`."""
+    ap.add_argument("--mode", choices=list(ALL_MODES), default="mfcc")
+    ap.add_argument("--pcen", action="store_true", help="Use PCEN (logmel, bio_* or health_matrix)")
     ap.add_argument("--no-down16k", action="store_true", help="Do not force downsample to 16 kHz when sr>16k")
-    ap.add_argument("--n-frames", type=int, default=400, help="Target frames for health_matrix (default: 400)")
-    ap.add_argument("--fmin", type=int, default=100, help="Min frequency (health_matrix)")
-    ap.add_argument("--fmax", type=int, default=7200, help="Max frequency (health_matrix)")
-    ap.add_argument("--out", default="", help="Save JSON to file instead of printing")
-    args = ap.parse_args()
-
-    if args.mode == "mfcc":
-        vec, sr, band = extract_mfcc_144(args.wav, force_down_to_16k=not args.no_down16k)
-        payload = {"sr": int(sr), "band": band, "mode": args.mode, "shape": [144], "features": list(map(float, vec))}
-    elif args.mode == "logmel":
-        vec, sr, band = extract_logmel_144(args.wav, use_pcen=args.pcen, force_down_to_16k=not args.no_down16k)
-        payload = {"sr": int(sr), "band": band, "mode": args.mode, "pcen": bool(args.pcen), "shape": [144], "features": list(map(float, vec))}
-    else:
-        mat, sr, band = extract_health_matrix(
-            args.wav,
-            target_frames=args.n_frames,
-            use_pcen=args.pcen,
-            force_down_to_16k=not args.no_down16k,
-            fmin=args.fmin,
-            fmax=args.fmax,
-        )
-        payload = {
-            "sr": int(sr),
-            "band": band,
-            "mode": args.mode,
-            "pcen": bool(args.pcen),
-            "shape": [int(args.n_frames), 144],
-            "features": mat.tolist(),
-        }
-
-    text = json.dumps(payload)
-
-    if args.out:
-        with open(args.out, "w") as f:
-            f.write(text)
-    else:
-        print(text)
+    ap.add_argument("--resampler", choices=list(RESAMPLERS), default=DEFAULT_RESAMPLER,
+                    help=f"Resampling engine when sr>16k (default: {DEFAULT_RESAMPLER})")
+    ap.add_argument("--n-frames", type=int, default=None, help="Target frames for matrix modes (default: 400 health_matrix, 20000 mfcc_matrix)")
+    ap.add_argument("--fmin", type=int, default=None, help="Min frequency (matrix modes, default: 100)")
+    ap.add_argument("--fmax", type=int, default=None, help="Max frequency (matrix modes, default: 7200 health_matrix, 7000 mfcc_matrix)")
+    ap.add_argument("--pitch", choices=list(PITCH_ESTIMATORS), default=DEFAULT_PITCH,
+                    help=f"Pitch estimator for health_matrix (default: {DEFAULT_PITCH})")
+    ap.add_argument("--vad", action="store_true",
+                    help="Vector modes: drop silent frames (energy/spectral flatness) before pooling")
+    ap.add_argument("--stream", action="store_true", help="Bounded-memory block streaming for long recordings (vector modes)")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes for batch input (default: CPU count)")
+
+def extraction_params(ap, args):
+    """kwargs de extract_mode a partir das opções de add_extraction_args (opções inválidas -> ap.error)."""
+    params = {"use_pcen": args.pcen, "force_down_to_16k": not args.no_down16k, "resampler": args.resampler}
+    if args.stream:
+        if args.mode in MATRIX_MODES:
+            ap.error("--stream is only available for vector modes")
+        params["stream"] = True
+    if args.vad:
+        if args.mode in MATRIX_MODES or args.stream:
+            ap.error("--vad is only available for vector modes without --stream")
+        params["vad"] = True
+    if args.mode in MATRIX_MODES:
+        params.update(n_frames=args.n_frames, fmin=args.fmin, fmax=args.fmax)
+    if args.mode == "health_matrix":
+        params["pitch"] = args.pitch
+    return params
+
+def export_main(argv):
+    """`export`: features de muitos .wav em shards .npy de tamanho fixo + manifesto (ver export.py)."""
+    ap = argparse.ArgumentParser(
+        prog="voiceprint_features_144.cli export",
+        description="Export features of many .wav files into fixed-size .npy shards plus a manifest (resumable).",
+    )
+    ap.add_argument("wav", nargs="+", help="Directory / glob / manifest (.txt/.csv) / .wav files")
+    ap.add_argument("--out", required=True, help="Output directory (re-run with the same inputs to resume)")
+    add_extraction_args(ap)
+    ap.add_argument("--shard-rows", type=int, default=None, help="Rows per shard (default: ~256 MB per shard)")
+    ap.add_argument("--chunksize", type=int, default=None, help="Files per worker task (default: 8)")
+    args = ap.parse_args(argv)
+    params = extraction_params(ap, args)
+    from .export import export_dataset
+
+    paths = expand_inputs(args.wav)
+
+    def report(state):
+        print(f"shard {state['shards']:>5}: {state['rows']} rows, {state['consumed']}/{state['n_inputs']} files, "
+              f"{state['failed']} failed", file=sys.stderr, flush=True)
+
+    extra = {"chunksize": args.chunksize} if args.chunksize else {}
+    try:
+        state = export_dataset(paths, args.out, mode=args.mode, shard_rows=args.shard_rows, workers=args.workers,
+                               progress=report, **extra, **params)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(json.dumps({k: state[k] for k in ("mode", "rows", "shards", "shard_rows", "row_shape", "dtype", "failed")}))
+    if state["failed"]:
+        raise SystemExit(f"{state['failed']} of {len(paths)} files failed (see {os.path.join(args.out, 'errors.jsonl')})")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "export":
+        return export_main(argv[1:])
+
+    ap = argparse.ArgumentParser(
+        description="Extract 144D audio features (vector or per-frame matrix).",
+        epilog="Subcommand: `export` writes many files into sharded .npy arrays (see `export --help`).",
+    )
+    ap.add_argument("wav", nargs="+", help="Path to .wav file, or directory / glob / manifest (.txt/.csv) for batch")
+    add_extraction_args(ap)
+    ap.add_argument("--no-pad", action="store_true", help="Matrix modes: return only valid frames instead of zero-padding to --n-frames")
+    ap.add_argument("--chunksize", type=int, default=None, help="Files per worker task in batch mode")
+    ap.add_argument("--as-completed", action="store_true", help="Batch: emit results as they finish instead of input order")
+    ap.add_argument("--out", default="", help="Save JSON to file instead of printing (JSON lines in batch mode)")
+    args = ap.parse_args(argv)
+
+    params = extraction_params(ap, args)
+    if args.mode in MATRIX_MODES:
+        params["pad"] = not args.no_pad
+    from .analysis import AudioAnalysis
+    from .batch import iter_batch
+    from .modes import extract_mode
+
+    single = len(args.wav) == 1 and os.path.isfile(args.wav[0]) and not args.wav[0].lower().endswith(MANIFEST_EXTS)
+    if single:
+        source = args.wav[0]
+        if args.vad:
+            source = AudioAnalysis.from_file(source, force_down_to_16k=not args.no_down16k, resampler=args.resampler)
+        feats, sr, band = extract_mode(source, args.mode, **params)
+        voiced = source.voiced_fraction if args.vad else None
+        text = json.dumps(build_payload(args.mode, feats, sr, band, args.pcen, voiced))
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(text)
+        else:
+            print(text)
+        return
+
+    # Lote: um registro JSON por linha, extração em pool de processos
+    paths = expand_inputs(args.wav)
+    out = open(args.out, "w") if args.out else None
+    n_err = 0
+    try:
+        for it in iter_batch(paths, mode=args.mode, workers=args.workers, chunksize=args.chunksize,
+                             ordered=not args.as_completed, **params):
+            if it.error is None:
+                rec = {"path": it.path, **build_payload(args.mode, it.features, it.sr, it.band, args.pcen)}
+            else:
+                n_err += 1
+                rec = {"path": it.path, "error": it.error}
+            line = json.dumps(rec)
+            if out:
+                out.write(line + "\n")
+            else:
+                print(line, flush=True)
+    finally:
+        if out:
+            out.close()
+    if n_err:
+        raise SystemExit(f"{n_err} of {len(paths)} files failed")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,10 @@
 import numpy as np
 
 def to_mono(y):
-    return y if y.ndim == 1 else y.mean(axis=1)
+    """Média dos canais (n, c) -> (n,); acumula no próprio dtype quando float (float32 não vira float64)."""
+    if y.ndim == 1:
+        return y
+    return y.mean(axis=1, dtype=y.dtype if y.dtype.kind == "f" else None)
 
 def _next_pow2(n):
     return 1 << int(np.ceil(np.log2(max(1, n))))
@@ -11,7 +14,81 @@ def stft_params_from_sr(sr: int, win_ms: float = 25.0, hop_ms: float = 10.0):
     hop   = max(1, int(sr * (hop_ms / 1000.0)))
     return n_fft, hop
 
+# Largura padrão de librosa.feature.delta (mode="interp")
+DELTA_WIDTH = 9
+
+def span_frames(target_frames: int) -> int:
+    """
+    Quadros do STFT a calcular para que os target_frames primeiros (e seus deltas) saiam
+    iguais aos do áudio inteiro: o delta de um quadro usa DELTA_WIDTH // 2 quadros à frente,
+    e o ajuste das bordas (mode="interp") precisa de pelo menos DELTA_WIDTH quadros.
+    """
+    return max(target_frames + DELTA_WIDTH // 2, DELTA_WIDTH)
+
+def fill_columns(parts, n_rows: int, width: int = 144) -> np.ndarray:
+    """
+    Matriz (n_rows, width) float32 com as colunas de `parts` (arrays (≥ n_rows, k)) lado a lado,
+    repetidas em ciclo até `width` (igual a np.tile(concatenação, ...)[:, :width]), num só buffer.
+    """
+    out = np.empty((n_rows, width), dtype=np.float32)
+    col = 0
+    for p in parts:
+        w = min(p.shape[1], width - col)
+        out[:, col:col + w] = p[:n_rows, :w]
+        col += w
+        if col == width:
+            return out
+    filled = col
+    while col < width:
+        w = min(filled, width - col)
+        out[:, col:col + w] = out[:, :w]
+        col += w
+    return out
+
 def safe_voice_band(sr: int, fmin: int = 100, fmax_safe: int = 7200):
     # clamp abaixo de Nyquist com margem
     fmax = min(fmax_safe, int(0.45 * sr))
     return fmin, fmax
+
+def normalize_rows_uint8(X: np.ndarray) -> np.ndarray:
+    """
+    Normaliza cada linha de X (T, D) para [0, 255] em uint8 numa única operação vetorizada.
+    min/max consideram só valores finitos; linhas constantes (ou sem valores finitos) viram zeros.
+    Células não finitas: NaN e -inf viram 0, +inf vira 255.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    finite = np.isfinite(X)
+    all_finite = bool(finite.all())
+    if all_finite:
+        mn = X.min(axis=1, keepdims=True)
+        mx = X.max(axis=1, keepdims=True)
+    else:
+        mn = np.where(finite, X, np.inf).min(axis=1, keepdims=True)
+        mx = np.where(finite, X, -np.inf).max(axis=1, keepdims=True)
+    rng = mx - mn
+    ok = (np.isfinite(rng) & (rng != 0))[:, 0]
+
+    out = np.zeros(X.shape, dtype=np.uint8)
+    if ok.any():
+        # um único temporário float32, operado no lugar (mesma ordem de operações: resultado idêntico)
+        sel = slice(None) if ok.all() else ok
+        norm = np.subtract(X[sel], mn[sel])
+        norm /= rng[sel]
+        norm *= 255
+        np.round(norm, out=norm)
+        if not all_finite:
+            np.nan_to_num(norm, copy=False, nan=0.0, posinf=255.0, neginf=0.0)
+        out[sel] = norm
+    return out
+
+def fit_frames(X: np.ndarray, target_frames: int, pad: bool = True) -> np.ndarray:
+    """
+    Corta X (T, D) em target_frames linhas; com pad=True completa com zeros até target_frames.
+    Com pad=False devolve só os quadros válidos (min(T, target_frames) linhas).
+    """
+    X = X[:target_frames]
+    if pad and X.shape[0] < target_frames:
+        out = np.zeros((target_frames,) + X.shape[1:], dtype=X.dtype)
+        out[: X.shape[0]] = X
+        return out
+    return X
@@ -0,0 +1,192 @@
+"""
+Operações de DSP dos extratores (STFT, banco Mel, dB, PCEN, deltas, RMS, autocorrelação) com
+motor selecionável.
+
+  - librosa  (padrão) delega ao librosa: são as saídas de referência
+  - numpy    NumPy/SciPy puro (scipy.fft sobre quadros em float32, banco Mel montado aqui,
+             savgol_filter para os deltas, lfilter para o PCEN): não importa librosa, e com
+             ele numba/llvmlite, pooch e scikit-learn, o que reduz a memória e o cold start
+
+As assinaturas dos extract_* não mudam: o motor é do processo (VOICEPRINT_ENGINE, set_engine
+ou Config.FEATURE_ENGINE na API). O librosa só é importado na primeira operação do motor
+librosa. Tolerâncias entre os dois motores: tests/test_engine.py; cold start e throughput:
+benchmarks/engines.py.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple, Union
+import numpy as np
+import scipy.fft
+import scipy.signal
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .options import DEFAULT_ENGINE, ENGINES
+
+# Taxa/salto que o librosa.pcen assume ao converter time_constant no coeficiente b
+_PCEN_SR, _PCEN_HOP = 22050, 512
+
+
+def check_engine(engine: Optional[str]) -> str:
+    """Resolve None para o padrão do processo e valida o nome do motor."""
+    name = (engine or DEFAULT_ENGINE).strip().lower()
+    if name not in ENGINES:
+        raise ValueError(f"unknown feature engine: {name} (use one of {', '.join(ENGINES)})")
+    return name
+
+
+_engine = check_engine(None)
+
+
+def get_engine() -> str:
+    return _engine
+
+
+def set_engine(engine: Optional[str]) -> str:
+    """Troca o motor do processo (None = VOICEPRINT_ENGINE) e devolve o anterior."""
+    global _engine
+    previous, _engine = _engine, check_engine(engine)
+    return previous
+
+
+@contextmanager
+def use_engine(engine: str) -> Iterator[str]:
+    """Motor `engine` durante o bloco (testes e benchmarks; não é isolado entre threads)."""
+    previous = set_engine(engine)
+    try:
+        yield _engine
+    finally:
+        set_engine(previous)
+
+
+def _librosa():
+    import librosa
+
+    return librosa
+
+
+def stft(y: np.ndarray, n_fft: int, hop: int, window: np.ndarray, center: bool = True) -> np.ndarray:
+    """
+    STFT complexa (1 + n_fft//2, T), como librosa.stft(pad_mode="constant").
+    numpy: janela e FFT na precisão do sinal (float32 -> complex64); o librosa aplica a janela
+    em float64 e arredonda a saída para complex64.
+    """
+    if _engine == "librosa":
+        return _librosa().stft(y, n_fft=n_fft, hop_length=hop, window=window, center=center)
+    if center:
+        y = np.pad(y, n_fft // 2)
+    frames = sliding_window_view(y, n_fft)[::hop]
+    return scipy.fft.rfft(frames * window.astype(y.dtype, copy=False), axis=1).T
+
+
+def _hz_to_mel(f: np.ndarray, htk: bool) -> np.ndarray:
+    f = np.asarray(f, dtype=np.float64)
+    if htk:
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+    # Slaney: linear até 1 kHz, logarítmica acima
+    f_sp, min_log_hz, logstep = 200.0 / 3, 1000.0, np.log(6.4) / 27.0
+    log_part = min_log_hz / f_sp + np.log(np.maximum(f, min_log_hz) / min_log_hz) / logstep
+    return np.where(f >= min_log_hz, log_part, f / f_sp)
+
+
+def _mel_to_hz(m: np.ndarray, htk: bool) -> np.ndarray:
+    if htk:
+        return 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+    f_sp, min_log_hz, logstep = 200.0 / 3, 1000.0, np.log(6.4) / 27.0
+    min_log_mel = min_log_hz / f_sp
+    return np.where(m >= min_log_mel, min_log_hz * np.exp(logstep * (m - min_log_mel)), f_sp * m)
+
+
+def mel_filters(sr: int, n_fft: int, n_mels: int, fmin: float, fmax: float, htk: bool = False) -> np.ndarray:
+    """Banco de filtros Mel triangulares (n_mels, 1 + n_fft//2) float32 com norma slaney (librosa.filters.mel)."""
+    if _engine == "librosa":
+        return _librosa().filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax, htk=htk)
+    fftfreqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    mel_f = _mel_to_hz(np.linspace(_hz_to_mel(fmin, htk), _hz_to_mel(fmax, htk), n_mels + 2), htk)
+    fdiff = np.diff(mel_f)
+    ramps = mel_f[:, None] - fftfreqs[None, :]
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    # triângulos arredondados para float32 antes da norma slaney, na mesma ordem do librosa
+    weights = np.maximum(0, np.minimum(lower, upper)).astype(np.float32)
+    weights *= (2.0 / (mel_f[2:] - mel_f[:-2]))[:, None]
+    return weights
+
+
+def power_to_db(
+    S: np.ndarray,
+    ref: Union[float, Callable[[np.ndarray], float]] = 1.0,
+    amin: float = 1e-10,
+    top_db: Optional[float] = 80.0,
+) -> np.ndarray:
+    """10·log10(S / ref), com S limitado por baixo a `amin` e piso top_db abaixo do máximo (librosa.power_to_db)."""
+    if _engine == "librosa":
+        return _librosa().power_to_db(S, ref=ref, amin=amin, top_db=top_db)
+    ref_value = ref(S) if callable(ref) else np.abs(ref)
+    log_spec = 10.0 * np.log10(np.maximum(amin, S))
+    log_spec -= 10.0 * np.log10(np.maximum(amin, ref_value))
+    if top_db is not None:
+        log_spec = np.maximum(log_spec, log_spec.max() - top_db)
+    return log_spec
+
+
+def pcen(
+    S: np.ndarray,
+    time_constant: float = 0.4,
+    eps: float = 1e-6,
+    power: float = 0.5,
+    gain: float = 0.98,
+    bias: float = 2.0,
+    b: Optional[float] = None,
+    zi: Optional[np.ndarray] = None,
+    return_zf: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """
+    PCEN no eixo do tempo (librosa.pcen com sr/hop padrão, max_size=1). zi/return_zf carregam o
+    estado do filtro IIR entre blocos (streaming).
+    """
+    if _engine == "librosa":
+        return _librosa().pcen(
+            S, time_constant=time_constant, eps=eps, power=power, gain=gain, bias=bias, b=b,
+            zi=zi, return_zf=return_zf,
+        )
+    if b is None:
+        t_frames = time_constant * _PCEN_SR / float(_PCEN_HOP)
+        b = (np.sqrt(1 + 4 * t_frames**2) - 1) / (2 * t_frames**2)
+    if zi is None:
+        zi = np.empty((1,) * S.ndim)
+        zi[:] = scipy.signal.lfilter_zi([b], [1, b - 1])[:]
+    # filtro passa-baixas M[t] = (1 - b)·M[t-1] + b·S[t]; ganho em log para estabilidade
+    S_smooth, zf = scipy.signal.lfilter([b], [1, b - 1], S, zi=zi, axis=-1)
+    smooth = np.exp(-gain * (np.log(eps) + np.log1p(S_smooth / eps)))
+    if power == 0:
+        out = np.log1p(S * smooth)
+    elif bias == 0:
+        out = np.exp(power * (np.log(S) + np.log(smooth)))
+    else:
+        out = (bias**power) * np.expm1(power * np.log1p(S * smooth / bias))
+    return (out, zf) if return_zf else out
+
+
+def delta(X: np.ndarray, order: int = 1, width: int = 9) -> np.ndarray:
+    """Derivada temporal (eixo -1) por Savitzky-Golay com bordas interpoladas (librosa.feature.delta)."""
+    if _engine == "librosa":
+        return _librosa().feature.delta(X, width=width, order=order)
+    if width > X.shape[-1]:
+        raise ValueError(f"when mode='interp', width={width} cannot exceed data.shape[axis]={X.shape[-1]}")
+    return scipy.signal.savgol_filter(X, width, polyorder=order, deriv=order, axis=-1, mode="interp")
+
+
+def rms(y: np.ndarray, frame_length: int, hop: int) -> np.ndarray:
+    """RMS por quadro (T,), quadros sem padding (librosa.feature.rms(center=False)[0])."""
+    if _engine == "librosa":
+        return _librosa().feature.rms(y=y, frame_length=frame_length, hop_length=hop, center=False)[0]
+    frames = sliding_window_view(y, frame_length)[::hop]
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_length)
+
+
+def autocorrelate(x: np.ndarray, max_size: int) -> np.ndarray:
+    """Autocorrelação de cada linha de `x` (n, L) até o lag max_size - 1 (librosa.autocorrelate(axis=1))."""
+    if _engine == "librosa":
+        return _librosa().autocorrelate(x, max_size=max_size, axis=1)
+    n_fft = scipy.fft.next_fast_len(2 * x.shape[1] - 1, real=True)
+    X = scipy.fft.rfft(x, n=n_fft, axis=1)
+    return scipy.fft.irfft(X.real**2 + X.imag**2, n=n_fft, axis=1)[:, :max_size]
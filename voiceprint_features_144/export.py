@@ -0,0 +1,222 @@
+"""
+Exportação de datasets: features de muitos .wav em shards .npy de tamanho fixo, para treino.
+
+Arquivos em `out_dir`:
+  export.json        estado: modo, parâmetros, forma/dtype das linhas, shard_rows, hash da lista
+                     de entradas, shards concluídos, entradas já consumidas e bytes válidos de
+                     manifest.jsonl / errors.jsonl
+  shard-00000.npy    (shard_rows, *forma) — só o último shard pode ter menos linhas;
+                     abra com np.load(..., mmap_mode="r") (ou open_shards)
+  manifest.jsonl     uma linha JSON por linha exportada: row, shard, offset, path, sr, band,
+                     sha256 do arquivo (+ n_valid_frames nos modos temporais)
+  errors.jsonl       arquivos que falharam: path, error
+
+A extração roda em processos (pool_map, em ordem de entrada); só o processo principal grava.
+O shard corrente é um .npy.partial mapeado em memória: cheio, vai para o nome final
+(os.replace), o manifesto dele é acrescentado e só então o estado é publicado. Interrompido,
+export_dataset com o mesmo diretório e as mesmas entradas/parâmetros retoma depois do último
+shard concluído (descarta os .partial e o que passou dos bytes registrados no manifesto).
+"""
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ._io import write_atomic
+from .batch import pool_map
+from .common_adaptive import fit_frames
+from .modes import ALL_MODES, MATRIX_DEFAULTS, MATRIX_MODES, extract_mode
+
+STATE = "export.json"
+MANIFEST = "manifest.jsonl"
+ERRORS = "errors.jsonl"
+SHARD_BYTES = 256 << 20  # shard_rows padrão: linhas que cabem em ~256 MB
+EXPORT_CHUNKSIZE = 8     # arquivos por tarefa do pool: resultados chegam ao escritor aos poucos
+
+
+class ExportItem(NamedTuple):
+    index: int
+    path: str
+    features: Optional[np.ndarray]
+    sr: Optional[int]
+    band: Optional[Tuple[int, int]]
+    sha256: Optional[str]
+    n_valid_frames: Optional[int]
+    error: Optional[str]
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _export_one(index: int, path: str, mode: str, params: dict) -> ExportItem:
+    try:
+        digest = file_sha256(path)
+        if mode in MATRIX_MODES:
+            # linhas de tamanho fixo: extrai os quadros válidos e completa com zeros até n_frames
+            n_frames = params.get("n_frames") or MATRIX_DEFAULTS[mode][0]
+            feats, sr, band = extract_mode(path, mode, **{**params, "pad": False})
+            n_valid = int(feats.shape[0])
+            feats = fit_frames(feats, n_frames, pad=True)
+        else:
+            feats, sr, band = extract_mode(path, mode, **params)
+            n_valid = None
+        return ExportItem(index, path, feats, int(sr), (int(band[0]), int(band[1])), digest, n_valid, None)
+    except Exception as e:  # erro isolado por arquivo
+        return ExportItem(index, path, None, None, None, None, None, f"{type(e).__name__}: {e}")
+
+
+def _append(path: str, lines: List[str], valid_bytes: int) -> int:
+    """Trunca em `valid_bytes` (descarta o que uma execução interrompida deixou) e acrescenta; retorna o novo tamanho."""
+    with open(path, "ab") as f:
+        f.truncate(valid_bytes)
+        f.write("".join(line + "\n" for line in lines).encode())
+        return f.tell()
+
+
+def shard_path(out_dir: str, shard: int) -> str:
+    return os.path.join(out_dir, f"shard-{shard:05d}.npy")
+
+
+def inputs_digest(paths: List[str]) -> str:
+    return hashlib.sha256("\n".join(paths).encode()).hexdigest()
+
+
+def _json_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(json.dumps(params, sort_keys=True))
+
+
+def export_dataset(
+    paths: Iterable[str],
+    out_dir: str,
+    mode: str = "mfcc",
+    shard_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = EXPORT_CHUNKSIZE,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **params,
+) -> Dict[str, Any]:
+    """
+    Exporta `mode` de todos os `paths` para shards em `out_dir` e retorna o estado final (export.json).
+    Retoma automaticamente uma exportação interrompida no mesmo diretório; um diretório com
+    outra exportação (modo, parâmetros, shard_rows ou lista de entradas diferentes) gera ValueError.
+    shard_rows: linhas por shard (padrão: ~SHARD_BYTES por shard).
+    `params` são repassados a extract_mode (use_pcen, force_down_to_16k, resampler, n_frames, ...);
+    nos modos temporais as linhas têm sempre n_frames quadros (padding com zeros).
+    progress(estado) é chamado a cada shard concluído.
+    """
+    if mode not in ALL_MODES:
+        raise ValueError(f"unknown mode: {mode}")
+    paths = [str(p) for p in paths]
+    params = {k: v for k, v in params.items() if k != "pad"}
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE)
+    spec = {
+        "mode": mode,
+        "params": _json_params(params),
+        "inputs": inputs_digest(paths),
+        "n_inputs": len(paths),
+    }
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if any(state[k] != v for k, v in spec.items()) or (shard_rows and shard_rows != state["shard_rows"]):
+            raise ValueError(f"{out_dir} holds a different export (mode, params, shard_rows or inputs differ)")
+    else:
+        state = {**spec, "shard_rows": shard_rows, "row_shape": None, "dtype": None,
+                 "shards": 0, "rows": 0, "consumed": 0, "failed": 0,
+                 "manifest_bytes": 0, "errors_bytes": 0, "complete": False}
+    if state["complete"]:
+        return state
+
+    # memmaps e temporários que uma execução interrompida deixou (de qualquer shard)
+    for pattern in ("shard-*.npy.partial", "shard-*.npy.tmp"):
+        for stale in glob.glob(os.path.join(out_dir, pattern)):
+            os.remove(stale)
+    manifest_path, errors_path = os.path.join(out_dir, MANIFEST), os.path.join(out_dir, ERRORS)
+
+    shard: Optional[np.ndarray] = None
+    filled, consumed = 0, state["consumed"]
+    records: List[str] = []
+    errors: List[str] = []
+
+    def commit(final: bool) -> None:
+        nonlocal shard, filled, records, errors
+        if shard is not None:
+            shard.flush()
+            target = shard_path(out_dir, state["shards"])
+            partial = target + ".partial"
+            if filled == shard.shape[0]:
+                del shard
+                os.replace(partial, target)
+            else:
+                # último shard, incompleto: regrava só as linhas preenchidas num temporário e só
+                # então publica (o nome final nunca guarda um shard truncado)
+                tmp = target + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, shard[:filled])
+                    f.flush()
+                    os.fsync(f.fileno())
+                del shard
+                os.replace(tmp, target)
+                os.remove(partial)
+            state["shards"] += 1
+            state["rows"] += filled
+        state["manifest_bytes"] = _append(manifest_path, records, state["manifest_bytes"])
+        state["errors_bytes"] = _append(errors_path, errors, state["errors_bytes"])
+        state["failed"] += len(errors)
+        state.update(consumed=consumed, complete=final)
+        write_atomic(state_path, json.dumps(state, indent=2).encode())
+        shard, filled, records, errors = None, 0, [], []
+        if progress is not None:
+            progress(state)
+
+    todo = list(enumerate(paths))[state["consumed"]:]
+    for it in pool_map(_export_one, todo, (mode, params), workers, chunksize, ordered=True):
+        consumed = it.index + 1
+        if it.error is not None:
+            errors.append(json.dumps({"path": it.path, "error": it.error}))
+            continue
+        if state["row_shape"] is None:
+            state["row_shape"] = list(it.features.shape)
+            state["dtype"] = it.features.dtype.str
+            state["shard_rows"] = state["shard_rows"] or max(1, SHARD_BYTES // it.features.nbytes)
+        if shard is None:
+            shard = np.lib.format.open_memmap(
+                shard_path(out_dir, state["shards"]) + ".partial", mode="w+", dtype=np.dtype(state["dtype"]),
+                shape=(state["shard_rows"], *state["row_shape"]),
+            )
+        shard[filled] = it.features
+        rec = {"row": state["rows"] + filled, "shard": state["shards"], "offset": filled, "path": it.path,
+               "sr": it.sr, "band": list(it.band), "sha256": it.sha256}
+        if it.n_valid_frames is not None:
+            rec["n_valid_frames"] = it.n_valid_frames
+        records.append(json.dumps(rec))
+        filled += 1
+        if filled == state["shard_rows"]:
+            commit(final=False)
+    commit(final=True)
+    return state
+
+
+def open_shards(out_dir: str) -> List[np.ndarray]:
+    """Shards concluídos de uma exportação, mapeados em memória (somente leitura), em ordem."""
+    with open(os.path.join(out_dir, STATE)) as f:
+        state = json.load(f)
+    return [np.load(shard_path(out_dir, i), mmap_mode="r") for i in range(state["shards"])]
+
+
+def read_manifest(out_dir: str) -> List[Dict[str, Any]]:
+    """Registros do manifesto (um por linha exportada), até o último shard concluído."""
+    with open(os.path.join(out_dir, STATE)) as f:
+        state = json.load(f)
+    with open(os.path.join(out_dir, MANIFEST), "rb") as f:
+        data = f.read(state["manifest_bytes"])
+    return [json.loads(line) for line in data.splitlines()]
@@ -1,25 +1,15 @@
+from typing import Optional
 import numpy as np
-import soundfile as sf
-import librosa
 
-from .common_adaptive import to_mono, stft_params_from_sr, safe_voice_band
-
-
-def _normalize_row_to_uint8(row: np.ndarray) -> np.ndarray:
-    """Normaliza um vetor 1D para [0, 255] em uint8."""
-    finite = row[np.isfinite(row)]
-    if finite.size == 0:
-        return np.zeros_like(row, dtype=np.uint8)
-    min_val = finite.min()
-    max_val = finite.max()
-    if max_val - min_val == 0:
-        return np.zeros_like(row, dtype=np.uint8)
-    norm = (row - min_val) / (max_val - min_val)
-    return np.round(norm * 255).astype(np.uint8)
+from . import dsp
+from .analysis import AudioSource, ensure_analysis
+from .common_adaptive import safe_voice_band, normalize_rows_uint8, fill_columns, fit_frames, span_frames
+from .pitch import DEFAULT_PITCH, estimate_pitch, voiced_frames
+from .timing import stage
 
 
 def extract_health_matrix(
-    wav_path: str,
+    wav_path: AudioSource,
     n_mels: int = 48,
     target_frames: int = 400,
     pre_emphasis: float = 0.97,
@@ -27,6 +17,9 @@ def extract_health_matrix(
     force_down_to_16k: bool = True,
     fmin: int = 100,
     fmax: int = 7200,
+    pad: bool = True,
+    resampler: Optional[str] = None,
+    pitch: str = DEFAULT_PITCH,
 ) -> np.ndarray:
     """
     Extrai uma matriz (target_frames, 144) sensível a variações de saúde vocal.
@@ -38,77 +31,57 @@ def extract_health_matrix(
       - pitch estimado (1 coluna, em Hz)
     O conjunto (98 colunas) é replicado/recortado até 144 colunas
     e cada linha é normalizada para [0, 255] (uint8).
-    """
+    Com pad=False, retorna só os quadros válidos (n_valid_frames = mat.shape[0] <= target_frames).
 
-    y, sr = sf.read(wav_path, always_2d=False)
-    y = to_mono(y).astype(np.float32)
+    pitch: estimador de F0 (ver pitch.PITCH_ESTIMATORS: yin | acf | yin_decimated). O pitch só
+    é avaliado nos quadros mantidos (<= target_frames) com energia (RMS a menos de
+    pitch.SILENCE_DB do quadro mais forte); os demais recebem a mediana dos avaliados.
 
-    if force_down_to_16k and sr > 16000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=16000, res_type="kaiser_best")
-        sr = 16000
-
-    if len(y) > 1:
-        y = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
+    Só o início do áudio necessário para target_frames quadros (mais o contexto dos deltas) é
+    decodificado e analisado. Em dB, a referência (ref=max) e o piso top_db vêm dos quadros
+    mantidos, então as linhas não dependem do áudio depois deles.
+    """
 
-    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    an = ensure_analysis(wav_path, force_down_to_16k, resampler, max_frames=span_frames(target_frames))
+    sr, n_fft, hop = an.sr, an.n_fft, an.hop
     fmin, fmax = safe_voice_band(sr, fmin, fmax)
 
-    mel = librosa.feature.melspectrogram(
-        y=y,
-        sr=sr,
-        n_fft=n_fft,
-        hop_length=hop,
-        n_mels=n_mels,
-        fmin=fmin,
-        fmax=fmax,
-        power=1.0,
-    )
+    y = an.signal(pre_emphasis)
+    mel = an.melspectrogram(n_mels, fmin, fmax, power=1.0, pre_emphasis=pre_emphasis)
+
+    with stage("rms"):
+        rms = dsp.rms(y, n_fft, hop)  # (T,)
+    # Quadros que chegam à saída (a coluna de pitch tem um quadro por coluna do STFT)
+    n_keep = min(mel.shape[1], rms.shape[0], target_frames)
 
     if use_pcen:
-        base = librosa.pcen(mel, time_constant=0.06, eps=1e-6, b=0.5)
+        with stage("pcen"):
+            # causal: cada quadro só depende dos anteriores
+            base = dsp.pcen(mel, time_constant=0.06, eps=1e-6, b=0.5).astype(np.float32)  # IIR em float64
     else:
-        base = librosa.power_to_db(mel, ref=np.max)
-
-    d1 = librosa.feature.delta(base, order=1)
-
-    rms = librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop, center=False)[0]  # (T,)
-    pitch = librosa.yin(y, fmin=fmin, fmax=min(fmax, sr // 2 - 1), sr=sr, frame_length=n_fft, hop_length=hop)
-
-    # Transpõe para shape (T, n_mels) e concatena colunas adicionais
-    base_t = base.T.astype(np.float32)
-    d1_t = d1.T.astype(np.float32)
-    energy_col = rms.reshape(-1, 1).astype(np.float32)
-    pitch_med = float(np.nanmedian(pitch)) if np.isfinite(pitch).any() else 0.0
-    pitch_col = np.where(np.isfinite(pitch), pitch, pitch_med).reshape(-1, 1).astype(np.float32)
-
-    min_len = min(base_t.shape[0], d1_t.shape[0], energy_col.shape[0], pitch_col.shape[0])
-    base_t = base_t[:min_len]
-    d1_t = d1_t[:min_len]
-    energy_col = energy_col[:min_len]
-    pitch_col = pitch_col[:min_len]
-
-    full = np.concatenate([base_t, d1_t, energy_col, pitch_col], axis=1)  # (T, 98)
-
-    # Sanitiza NaNs/Infs antes da normalização por linha
-    full = np.nan_to_num(full, nan=0.0, posinf=0.0, neginf=0.0)
-
-    # Replica colunas para atingir 144 features/frame
-    if full.shape[1] < 144:
-        repeat_times = int(np.ceil(144 / full.shape[1]))
-        tiled = np.tile(full, (1, repeat_times))
-        full = tiled[:, :144]
-    elif full.shape[1] > 144:
-        full = full[:, :144]
-
-    # Ajusta número de frames
-    if full.shape[0] < target_frames:
-        pad = np.zeros((target_frames - full.shape[0], full.shape[1]), dtype=np.float32)
-        full = np.vstack([full, pad])
-    elif full.shape[0] > target_frames:
-        full = full[:target_frames, :]
-
-    normalized = np.zeros_like(full, dtype=np.uint8)
-    for i in range(full.shape[0]):
-        normalized[i] = _normalize_row_to_uint8(full[i])
+        with stage("db"):
+            base = dsp.power_to_db(mel, ref=mel[:, :n_keep].max(), top_db=None)
+            base = np.maximum(base, base[:, :n_keep].max() - 80.0)
+
+    with stage("delta"):
+        d1 = dsp.delta(base, order=1)
+
+    with stage("pitch"):
+        voiced = voiced_frames(rms[:n_keep])
+        f0 = estimate_pitch(an, voiced, pitch, fmin, fmax, pre_emphasis)
+        finite = np.isfinite(f0)
+        pitch_med = float(np.median(f0[finite])) if finite.any() else 0.0
+        pitch_col = np.full((n_keep, 1), pitch_med, dtype=np.float32)
+        pitch_col[voiced, 0] = np.where(finite, f0, pitch_med)
+
+    with stage("normalize"):
+        # (T, n_mels) dB/PCEN | Δ | energia | pitch = 98 colunas, replicadas até 144, num só buffer float32
+        full = fill_columns((base.T, d1.T, rms[:, None], pitch_col), n_keep)
+
+        # Sanitiza NaNs/Infs antes da normalização por linha
+        np.nan_to_num(full, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # Ajusta número de frames (normaliza só os quadros mantidos; padding é zero)
+        normalized = fit_frames(normalize_rows_uint8(full), target_frames, pad=pad)
 
     return normalized, sr, (fmin, fmax)
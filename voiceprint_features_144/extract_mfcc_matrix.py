@@ -1,17 +1,21 @@
+from typing import Optional
 import numpy as np
-import soundfile as sf
-import librosa
-from .common_adaptive import to_mono, stft_params_from_sr, safe_voice_band
+from . import dsp
+from .analysis import AudioSource, ensure_analysis
+from .common_adaptive import safe_voice_band, normalize_rows_uint8, fill_columns, fit_frames, span_frames
+from .timing import stage
 
 def extract_mfcc_matrix(
-    wav_path: str,
+    wav_path: AudioSource,
     n_mfcc: int = 24,
     n_mels: int = 64,
     target_frames: int = 20000,
     pre_emphasis: float = 0.97,
     force_down_to_16k: bool = True,
     fmin: int = 100,
-    fmax: int = 7000
+    fmax: int = 7000,
+    pad: bool = True,
+    resampler: Optional[str] = None,
 ) -> np.ndarray:
     """
     Retorna uma matriz (target_frames, 144), com valores normalizados por frame entre 0–255 (uint8).
@@ -19,48 +23,27 @@ def extract_mfcc_matrix(
     - 24 Δ
     - 24 ΔΔ
     Concatenados e duplicados por linha/frame (total 144 features/frame)
+    Com pad=False, retorna só os quadros válidos (n_valid_frames = mat.shape[0] <= target_frames),
+    sem materializar o padding de zeros.
+    Só o início do áudio necessário para target_frames quadros (mais o contexto dos deltas) é
+    decodificado e analisado; o piso top_db do MFCC vem dos quadros mantidos, então as linhas
+    não dependem do áudio depois deles.
     """
-    y, sr = sf.read(wav_path, always_2d=False)
-    y = to_mono(y).astype(np.float32)
-
-    if force_down_to_16k and sr > 16000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=16000, res_type="kaiser_best")
-        sr = 16000
-
-    if len(y) > 1:
-        y = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
-
-    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    an = ensure_analysis(wav_path, force_down_to_16k, resampler, max_frames=span_frames(target_frames))
+    sr = an.sr
     fmin, fmax = safe_voice_band(sr, fmin, fmax)
 
-    M = librosa.feature.mfcc(
-        y=y, sr=sr, n_mfcc=n_mfcc, n_mels=n_mels,
-        n_fft=n_fft, hop_length=hop, fmin=fmin, fmax=fmax, htk=True
-    )
-    d1 = librosa.feature.delta(M, order=1)
-    d2 = librosa.feature.delta(M, order=2)
-
-    full = np.concatenate([M, d1, d2], axis=0).astype(np.float32)  # (72, T)
-    full = full.T  # (T, 72)
-
-    full = np.concatenate([full, full], axis=1)  # (T, 144)
+    M = an.mfcc(n_mfcc, n_mels, fmin, fmax, pre_emphasis=pre_emphasis, floor_frames=target_frames)
+    with stage("delta"):
+        d1 = dsp.delta(M, order=1)
+        d2 = dsp.delta(M, order=2)
 
-    if full.shape[0] < target_frames:
-        pad = np.zeros((target_frames - full.shape[0], full.shape[1]), dtype=np.float32)
-        full = np.vstack([full, pad])
-    elif full.shape[0] > target_frames:
-        full = full[:target_frames, :]
+    with stage("normalize"):
+        # (T, 72) = MFCC | Δ | ΔΔ, duplicado até 144 colunas, só nos quadros mantidos (um buffer float32)
+        n_keep = min(M.shape[1], target_frames)
+        full = fill_columns((M.T, d1.T, d2.T), n_keep)
 
-    # Normaliza cada linha/frame para [0, 255] e converte para uint8
-    normalized = np.zeros_like(full, dtype=np.uint8)
-    for i in range(full.shape[0]):
-        row = full[i]
-        min_val = row.min()
-        max_val = row.max()
-        if max_val - min_val == 0:
-            normalized[i] = np.zeros_like(row, dtype=np.uint8)
-        else:
-            norm = (row - min_val) / (max_val - min_val)
-            normalized[i] = np.round(norm * 255).astype(np.uint8)
+        # Normaliza cada linha/frame para [0, 255] (uint8)
+        normalized = fit_frames(normalize_rows_uint8(full), target_frames, pad=pad)
 
     return normalized, sr, (fmin, fmax)
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""
+Índice de embeddings (vetores 144D) para identificação de locutor por similaridade de cosseno.
+
+Arquivos em `path` (um diretório; vários processos podem abrir o mesmo índice):
+  index.json               cabeçalho: dim, tag, época, linhas gravadas (count), apagadas,
+                           bytes válidos de labels e uma geração que muda a cada escrita
+  vectors.<época>.f32      matriz (count, dim) float32 com linhas já normalizadas (norma 1)
+  alive.<época>.u8         1 byte por linha: 1 = ativa, 0 = apagada
+  labels.<época>.jsonl     id do locutor de cada linha (uma string JSON por linha)
+  index.lock               flock que serializa as escritas entre processos
+
+Leitura: vectors/alive são mapeados com np.memmap, então workers do gunicorn que abrem o
+mesmo diretório compartilham as páginas no cache do SO. Cada operação confere o cabeçalho
+(os.stat) e remapeia se outro processo escreveu. Escrita: append grava as linhas além de
+count e só então publica o novo cabeçalho (os.replace); um processo que morrer no meio deixa
+lixo além de count, descartado na próxima escrita. delete zera o byte em alive; compact
+regrava só as linhas ativas numa época nova e troca o cabeçalho; os arquivos da época anterior
+só são apagados na compactação seguinte, então quem acabou de ler o cabeçalho antigo ainda
+consegue mapeá-los (e refresh relê o cabeçalho se mesmo assim não os encontrar).
+
+Busca: produto de matriz (BLAS) por blocos de `block_rows` linhas contra as consultas
+normalizadas, mantendo o top-k parcial com argpartition (só nas colunas do bloco que superam
+o k-ésimo melhor atual); a memória extra é O(block_rows × consultas), independente do
+número de linhas.
+"""
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ._io import write_atomic
+
+HEADER = "index.json"
+LOCK = "index.lock"
+BLOCK_ROWS = 65536     # linhas por bloco do produto de matriz na busca
+COMPACT_RATIO = 0.25   # maybe_compact: regrava quando mais de 25% das linhas estão apagadas
+
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """Linhas com norma 1 (float32); linhas nulas continuam nulas."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return np.divide(X, norms, out=np.zeros_like(X), where=norms > 0)
+
+
+class EmbeddingIndex:
+    """
+    Armazena vetores normalizados com o id do locutor de cada linha.
+
+        index = EmbeddingIndex("/data/speakers", dim=144, tag="mfcc")
+        index.append(vecs, ["alice", "alice", "bob"])
+        index.search(query, k=5)     # (scores (m, k), linhas (m, k))
+        index.identify(query, k=3)   # [(locutor, score, linha), ...] melhor linha de cada locutor
+        index.delete("bob"); index.maybe_compact()
+
+    tag identifica como os vetores foram extraídos (modo, parâmetros); abrir um índice
+    existente com outro dim ou tag gera ValueError.
+    """
+
+    def __init__(self, path: str, dim: int = 144, tag: str = "", block_rows: int = BLOCK_ROWS):
+        self.path = path
+        self.dim = int(dim)
+        self.tag = tag
+        self.block_rows = max(1, int(block_rows))
+        os.makedirs(path, exist_ok=True)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._header: Dict[str, Any] = {}
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=np.uint8)
+        self._labels: List[str] = []
+        self._labels_epoch = -1
+        self._labels_bytes = 0
+        with self._locked():
+            if not os.path.exists(self._file(HEADER)):
+                self._publish({"dim": self.dim, "tag": tag, "epoch": 0, "count": 0, "deleted": 0,
+                               "labels_bytes": 0, "generation": 0})
+        self.refresh()
+        if self._header["dim"] != self.dim or self._header["tag"] != tag:
+            raise ValueError(
+                f"index at {path} holds dim={self._header['dim']} tag={self._header['tag']!r}, "
+                f"not dim={self.dim} tag={tag!r}"
+            )
+
+    # ---------- arquivos ----------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _data(self, kind: str, epoch: int) -> str:
+        ext = {"vectors": "f32", "alive": "u8", "labels": "jsonl"}[kind]
+        return self._file(f"{kind}.{epoch}.{ext}")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._file(LOCK), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_header(self) -> Dict[str, Any]:
+        with open(self._file(HEADER)) as f:
+            return json.load(f)
+
+    def _publish(self, header: Dict[str, Any]) -> None:
+        write_atomic(self._file(HEADER), json.dumps(header).encode())
+
+    def _map(self, kind: str, epoch: int, shape: tuple, dtype, mode: str = "r"):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._data(kind, epoch), dtype=dtype, mode=mode, shape=shape)
+
+    # ---------- leitura ----------
+
+    def refresh(self) -> bool:
+        """Remapeia se outro processo (ou esta instância) escreveu; retorna True se mudou."""
+        for attempt in range(3):
+            st = os.stat(self._file(HEADER))
+            stamp = (st.st_mtime_ns, st.st_ino)
+            if stamp == self._stamp:
+                return False
+            header = self._read_header()
+            epoch, n = header["epoch"], header["count"]
+            try:
+                vectors = self._map("vectors", epoch, (n, header["dim"]), np.float32)
+                alive = self._map("alive", epoch, (n,), np.uint8)
+                self._load_labels(epoch, header["labels_bytes"])
+            except FileNotFoundError:
+                # época apagada por compactações enquanto lia o cabeçalho: relê o cabeçalho novo
+                if attempt == 2:
+                    raise
+                continue
+            self._vectors, self._alive = vectors, alive
+            self._header, self._stamp = header, stamp
+            return True
+        return False
+
+    def _load_labels(self, epoch: int, n_bytes: int) -> None:
+        # labels só crescem dentro de uma época: lê apenas o trecho novo
+        if epoch != self._labels_epoch or n_bytes < self._labels_bytes:
+            self._labels, self._labels_bytes, self._labels_epoch = [], 0, epoch
+        if n_bytes > self._labels_bytes:
+            with open(self._data("labels", epoch), "rb") as f:
+                f.seek(self._labels_bytes)
+                chunk = f.read(n_bytes - self._labels_bytes)
+            self._labels += [json.loads(line) for line in chunk.splitlines()]
+            self._labels_bytes = n_bytes
+
+    def __len__(self) -> int:
+        """Linhas ativas (sem as apagadas)."""
+        self.refresh()
+        return self._header["count"] - self._header["deleted"]
+
+    def info(self) -> Dict[str, Any]:
+        self.refresh()
+        h = self._header
+        return {"dim": h["dim"], "tag": h["tag"], "rows": h["count"], "active": h["count"] - h["deleted"],
+                "deleted": h["deleted"], "speakers": len(set(self.speakers())), "generation": h["generation"]}
+
+    def speakers(self) -> List[str]:
+        """Id do locutor de cada linha ativa."""
+        self.refresh()
+        return [self._labels[i] for i in np.flatnonzero(self._alive)]
+
+    def search(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k por cosseno de cada consulta (m, dim) ou (dim,): (scores (m, k), linhas (m, k)),
+        em ordem decrescente. Com menos de k linhas ativas, sobra score -inf e linha -1.
+        """
+        self.refresh()
+        q = normalize_rows(queries)
+        if q.shape[1] != self.dim:
+            raise ValueError(f"query has dim {q.shape[1]}, index has dim {self.dim}")
+        m, k = q.shape[0], max(1, int(k))
+        best_s = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_i = np.zeros((m, 0), dtype=np.int64)
+        V, alive = self._vectors, self._alive
+        for start in range(0, V.shape[0], self.block_rows):
+            stop = min(start + self.block_rows, V.shape[0])
+            S = q @ V[start:stop].T  # (m, b)
+            S[:, np.asarray(alive[start:stop]) == 0] = -np.inf
+            rows = np.arange(start, stop)
+            if best_s.shape[1] == k:
+                # só colunas que superam o k-ésimo melhor de alguma consulta entram na partição
+                cols = np.flatnonzero((S > best_s.min(axis=1, keepdims=True)).any(axis=0))
+                if cols.size == 0:
+                    continue
+                S, rows = S[:, cols], rows[cols]
+            kk = min(k, S.shape[1])
+            part = np.argpartition(-S, kk - 1, axis=1)[:, :kk]
+            cand_s = np.concatenate([best_s, np.take_along_axis(S, part, axis=1)], axis=1)
+            cand_i = np.concatenate([best_i, rows[part]], axis=1)
+            if cand_s.shape[1] > k:
+                keep = np.argpartition(-cand_s, k - 1, axis=1)[:, :k]
+                cand_s = np.take_along_axis(cand_s, keep, axis=1)
+                cand_i = np.take_along_axis(cand_i, keep, axis=1)
+            best_s, best_i = cand_s, cand_i
+
+        order = np.argsort(-best_s, axis=1, kind="stable")
+        best_s = np.take_along_axis(best_s, order, axis=1)
+        best_i = np.take_along_axis(best_i, order, axis=1)
+        best_i[~np.isfinite(best_s)] = -1
+        if best_s.shape[1] < k:
+            pad = k - best_s.shape[1]
+            best_s = np.pad(best_s, ((0, 0), (0, pad)), constant_values=-np.inf)
+            best_i = np.pad(best_i, ((0, 0), (0, pad)), constant_values=-1)
+        return best_s, best_i
+
+    def identify(self, query: np.ndarray, k: int = 5, oversample: int = 4) -> List[Tuple[str, float, int]]:
+        """
+        Até k locutores mais parecidos com `query` (dim,): [(locutor, score, linha)], usando a
+        melhor linha de cada locutor. A busca começa nas k * oversample linhas mais próximas e é
+        ampliada (x4, até o índice inteiro) enquanto faltarem locutores distintos: um locutor
+        com muitas linhas cadastradas não esconde os demais.
+        """
+        k = max(1, int(k))
+        want = k * max(1, oversample)
+        while True:
+            scores, rows = self.search(query, want)
+            out: List[Tuple[str, float, int]] = []
+            seen = set()
+            for s, r in zip(scores[0], rows[0]):
+                if r < 0:
+                    break
+                speaker = self._labels[r]
+                if speaker not in seen:
+                    seen.add(speaker)
+                    out.append((speaker, float(s), int(r)))
+                    if len(out) == k:
+                        break
+            n_rows = self._header["count"]
+            if len(out) == k or rows[0, -1] < 0 or want >= n_rows:
+                return out
+            want = min(n_rows, want * 4)
+
+    # ---------- escrita ----------
+
+    def append(self, vectors: np.ndarray, speakers: Sequence[str]) -> np.ndarray:
+        """Acrescenta linhas (normalizadas aqui) com o locutor de cada uma; retorna os índices das linhas."""
+        X = normalize_rows(vectors)
+        if X.shape[1] != self.dim:
+            raise ValueError(f"vectors have dim {X.shape[1]}, index has dim {self.dim}")
+        speakers = [str(s) for s in speakers]
+        if len(speakers) != X.shape[0]:
+            raise ValueError("one speaker id per vector is required")
+        with self._locked():
+            h = self._read_header()
+            epoch, n = h["epoch"], h["count"]
+            labels = b"".join(json.dumps(s).encode() + b"\n" for s in speakers)
+            # trunca até count antes de gravar: descarta o que uma escrita interrompida deixou
+            for kind, data, size in (
+                ("vectors", X.tobytes(), n * self.dim * 4),
+                ("alive", np.ones(X.shape[0], dtype=np.uint8).tobytes(), n),
+                ("labels", labels, h["labels_bytes"]),
+            ):
+                with open(self._data(kind, epoch), "ab") as f:
+                    f.truncate(size)
+                    f.write(data)
+            h.update(count=n + X.shape[0], labels_bytes=h["labels_bytes"] + len(labels), generation=h["generation"] + 1)
+            self._publish(h)
+        self.refresh()
+        return np.arange(n, n + X.shape[0])
+
+    def delete(self, speaker: str) -> int:
+        """Apaga (marca em alive) todas as linhas do locutor; retorna quantas."""
+        with self._locked():
+            self._stamp = None
+            self.refresh()
+            h = dict(self._header)
+            rows = np.array([i for i, s in enumerate(self._labels) if s == speaker], dtype=np.int64)
+            rows = rows[np.asarray(self._alive)[rows] == 1]
+            if len(rows):
+                alive = self._map("alive", h["epoch"], (h["count"],), np.uint8, mode="r+")
+                alive[rows] = 0
+                alive.flush()
+                h.update(deleted=h["deleted"] + len(rows), generation=h["generation"] + 1)
+                self._publish(h)
+        self.refresh()
+        return len(rows)
+
+    def compact(self) -> int:
+        """Regrava só as linhas ativas numa época nova; retorna quantas linhas foram descartadas."""
+        with self._locked():
+            self._stamp = None
+            self.refresh()
+            h = dict(self._header)
+            old, new = h["epoch"], h["epoch"] + 1
+            keep = np.flatnonzero(np.asarray(self._alive))
+            with open(self._data("vectors", new), "wb") as f:
+                for start in range(0, len(keep), self.block_rows):
+                    f.write(np.ascontiguousarray(self._vectors[keep[start:start + self.block_rows]]).tobytes())
+            with open(self._data("alive", new), "wb") as f:
+                f.write(np.ones(len(keep), dtype=np.uint8).tobytes())
+            labels = b"".join(json.dumps(self._labels[i]).encode() + b"\n" for i in keep)
+            with open(self._data("labels", new), "wb") as f:
+                f.write(labels)
+            dropped = h["count"] - len(keep)
+            h.update(epoch=new, count=len(keep), deleted=0, labels_bytes=len(labels), generation=h["generation"] + 1)
+            self._publish(h)
+            # a época `old` fica até a próxima compactação (leitores que ainda não remapearam)
+            for kind in ("vectors", "alive", "labels"):
+                try:
+                    os.remove(self._data(kind, old - 1))
+                except OSError:
+                    pass
+        self.refresh()
+        return dropped
+
+    def maybe_compact(self, ratio: float = COMPACT_RATIO) -> int:
+        """Compacta se a fração de linhas apagadas passar de `ratio`; retorna as linhas descartadas."""
+        self.refresh()
+        h = self._header
+        if h["count"] and h["deleted"] / h["count"] > ratio:
+            return self.compact()
+        return 0
+
@@ -1,49 +1,51 @@
 import json
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
-import soundfile as sf
-import librosa
-from .common_adaptive import to_mono, stft_params_from_sr, safe_voice_band
+from . import dsp
+from .analysis import AudioSource, ensure_analysis
+from .common_adaptive import safe_voice_band
+from .timing import stage
 
 def extract_logmel_144(
-    wav_path: str,
+    wav_path: AudioSource,
     n_bands: int = 48,
     use_pcen: bool = False,
-    force_down_to_16k: bool = True
+    force_down_to_16k: bool = True,
+    resampler: Optional[str] = None,
+    vad: bool = False,
 ) -> Tuple[np.ndarray, int, Tuple[int, int]]:
     """
-    Lê um .wav e retorna:
+    Lê um .wav (caminho, file-like, bytes ou (y, sr)), ou reaproveita um AudioAnalysis já carregado, e retorna:
       - features: vetor (144,) float32  [48 bandas × (mean,std,median)]
       - sr: sample-rate efetiva
       - band: (fmin, fmax) usada
+    vad=True: Mel/PCEN/dB e estatísticas só nos quadros com voz (ver vad.py).
     """
-    y, sr = sf.read(wav_path, always_2d=False)
-    y = to_mono(y).astype(np.float32)
-
-    if force_down_to_16k and sr > 16000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=16000, res_type="kaiser_best")
-        sr = 16000
-
-    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    an = ensure_analysis(wav_path, force_down_to_16k, resampler)
+    sr = an.sr
     fmin, fmax = safe_voice_band(sr, 100, 7200)
 
     # Espectrograma Mel (magnitude)
-    S = librosa.feature.melspectrogram(
-        y=y, sr=sr, n_mels=n_bands, n_fft=n_fft, hop_length=hop,
-        fmin=fmin, fmax=fmax, power=1.0
-    )  # (n_bands, T)
+    S = an.melspectrogram(n_bands, fmin, fmax, power=1.0, vad=vad)  # (n_bands, T)
 
     if use_pcen:
-        X = librosa.pcen(S * (2**31), time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0)
+        with stage("pcen"):
+            # o filtro IIR do PCEN roda em float64; volta para float32 uma vez, na saída
+            X = dsp.pcen(S * (2**31), time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0)
+            X = X.astype(np.float32)
     else:
         # Log-mel em dB (usa S**2 para energia e pequeno offset p/ estabilidade)
-        X = librosa.power_to_db(S**2 + 1e-12, ref=np.max)
+        with stage("db"):
+            S2 = np.square(S)
+            S2 += 1e-12
+            X = dsp.power_to_db(S2, ref=np.max)
 
-    mean = X.mean(axis=1)
-    std  = X.std(axis=1, ddof=1) if X.shape[1] > 1 else np.zeros(X.shape[0], dtype=np.float32)
-    med  = np.median(X, axis=1)
+    with stage("pooling"):
+        mean = X.mean(axis=1)
+        std  = X.std(axis=1, ddof=1) if X.shape[1] > 1 else np.zeros(X.shape[0], dtype=np.float32)
+        med  = np.median(X, axis=1)
 
-    feat = np.concatenate([mean, std, med], axis=0).astype(np.float32) 
+        feat = np.concatenate([mean, std, med], axis=0, dtype=np.float32)
     assert feat.shape[0] == 144
     return feat, sr, (fmin, fmax)
 
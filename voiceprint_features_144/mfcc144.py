@@ -1,9 +1,10 @@
 import json
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
-import soundfile as sf
-import librosa
-from .common_adaptive import to_mono, stft_params_from_sr, safe_voice_band
+from . import dsp
+from .analysis import AudioSource, ensure_analysis
+from .common_adaptive import safe_voice_band
+from .timing import stage
 
 def _stats_mean_std(X: np.ndarray) -> np.ndarray:
     mu = X.mean(axis=1)
@@ -11,42 +12,34 @@ def _stats_mean_std(X: np.ndarray) -> np.ndarray:
     return np.concatenate([mu, sd], axis=0)
 
 def extract_mfcc_144(
-    wav_path: str,
+    wav_path: AudioSource,
     n_mfcc: int = 24,
     n_mels: int = 64,
     pre_emphasis: float = 0.97,
-    force_down_to_16k: bool = True
+    force_down_to_16k: bool = True,
+    resampler: Optional[str] = None,
+    vad: bool = False,
 ) -> Tuple[np.ndarray, int, Tuple[int, int]]:
     """
-    Lê um .wav e retorna:
+    Lê um .wav (caminho, file-like, bytes ou (y, sr)), ou reaproveita um AudioAnalysis já carregado, e retorna:
       - features: vetor (144,) float32
       - sr: sample-rate efetiva
       - band: (fmin, fmax) usada na extração
+    vad=True: Mel/DCT/deltas/estatísticas só nos quadros com voz (ver vad.py).
     """
-    y, sr = sf.read(wav_path, always_2d=False)
-    y = to_mono(y).astype(np.float32)
-
-    # Padroniza SR (opcional). Nunca upsample; apenas downsample se sr > 16k.
-    if force_down_to_16k and sr > 16000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=16000, res_type="kaiser_best")
-        sr = 16000
-
-    # Pré-ênfase ajuda em microfones de celular
-    if len(y) > 1:
-        y = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
-
-    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    an = ensure_analysis(wav_path, force_down_to_16k, resampler)
+    sr = an.sr
     fmin, fmax = safe_voice_band(sr, 100, 7200)
 
-    M = librosa.feature.mfcc(
-        y=y, sr=sr, n_mfcc=n_mfcc, n_mels=n_mels,
-        n_fft=n_fft, hop_length=hop, fmin=fmin, fmax=fmax, htk=True
-    )  # (n_mfcc, T)
+    # Pré-ênfase ajuda em microfones de celular
+    M = an.mfcc(n_mfcc, n_mels, fmin, fmax, pre_emphasis=pre_emphasis, vad=vad)  # (n_mfcc, T)
 
-    d1 = librosa.feature.delta(M, order=1)
-    d2 = librosa.feature.delta(M, order=2)
+    with stage("delta"):
+        d1 = dsp.delta(M, order=1)
+        d2 = dsp.delta(M, order=2)
 
-    feat = np.concatenate([_stats_mean_std(M), _stats_mean_std(d1), _stats_mean_std(d2)], axis=0).astype(np.float32)
+    with stage("pooling"):
+        feat = np.concatenate([_stats_mean_std(M), _stats_mean_std(d1), _stats_mean_std(d2)], axis=0, dtype=np.float32)
     assert feat.shape[0] == n_mfcc * 3 * 2 == 144
     return feat, sr, (fmin, fmax)
 
@@ -0,0 +1,108 @@
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+from .analysis import AudioAnalysis, ensure_analysis
+from .mfcc144 import extract_mfcc_144
+from .mel144 import extract_logmel_144
+from .biometric144 import extract_biometric_144
+from .extract_mfcc_matrix import extract_mfcc_matrix
+from .extract_health_matrix import extract_health_matrix
+from .streaming import extract_streaming
+from .pitch import check_pitch
+from .common_adaptive import span_frames
+# Nomes dos modos vivem em options.py (sem dependências pesadas); reexportados aqui
+from .options import ALL_MODES, MATRIX_DEFAULTS, MATRIX_MODES, PCEN_MODES, VECTOR_MODES  # noqa: F401
+
+
+
+def extract_mode(
+    source,
+    mode: str,
+    use_pcen: bool = False,
+    force_down_to_16k: bool = True,
+    n_frames: Optional[int] = None,
+    fmin: Optional[int] = None,
+    fmax: Optional[int] = None,
+    stream: bool = False,
+    pad: bool = True,
+    resampler: Optional[str] = None,
+    pitch: Optional[str] = None,
+    vad: bool = False,
+) -> Tuple[np.ndarray, int, Tuple[int, int]]:
+    """
+    Executa o extrator de um modo (nomes iguais aos da API) sobre um .wav
+    ou AudioAnalysis e retorna (features, sr, (fmin, fmax)).
+    n_frames/fmin/fmax só se aplicam aos modos temporais.
+    stream=True usa o caminho em blocos de memória constante (só modos vetoriais; caminho, file-like ou bytes).
+    pad=False devolve só os quadros válidos nos modos temporais (sem padding até n_frames).
+    resampler escolhe o motor de reamostragem quando sr > 16k (ver resample.RESAMPLERS).
+    pitch escolhe o estimador de F0 do health_matrix (ver pitch.PITCH_ESTIMATORS).
+    vad=True descarta os quadros sem voz antes de Mel/DCT/deltas e do pooling (só modos vetoriais;
+    ver vad.py); a fração de quadros com voz fica em AudioAnalysis.voiced_fraction.
+    """
+    if stream:
+        if mode not in VECTOR_MODES:
+            raise ValueError(f"mode {mode} has no streaming path")
+        if vad:
+            raise ValueError("vad has no streaming path")
+        return extract_streaming(
+            source, mode, use_pcen=use_pcen, force_down_to_16k=force_down_to_16k, resampler=resampler
+        )
+    common = {"force_down_to_16k": force_down_to_16k, "resampler": resampler}
+    if mode == "logmel":
+        return extract_logmel_144(source, use_pcen=use_pcen, vad=vad, **common)
+    if mode == "bio_mean144":
+        return extract_biometric_144(source, mode="mean144", use_pcen=use_pcen, vad=vad, **common)
+    if mode == "bio_mm72":
+        return extract_biometric_144(source, mode="mean_median_72", use_pcen=use_pcen, vad=vad, **common)
+
+    if mode in MATRIX_MODES:
+        d_frames, d_fmin, d_fmax = MATRIX_DEFAULTS[mode]
+        n_frames = d_frames if n_frames is None else n_frames
+        fmin = d_fmin if fmin is None else fmin
+        fmax = d_fmax if fmax is None else fmax
+        if mode == "mfcc_matrix":
+            return extract_mfcc_matrix(source, target_frames=n_frames, fmin=fmin, fmax=fmax, pad=pad, **common)
+        return extract_health_matrix(
+            source,
+            target_frames=n_frames,
+            use_pcen=use_pcen,
+            fmin=fmin,
+            fmax=fmax,
+            pad=pad,
+            pitch=check_pitch(pitch),
+            **common,
+        )
+
+    if mode != "mfcc":
+        raise ValueError(f"unknown mode: {mode}")
+    return extract_mfcc_144(source, vad=vad, **common)
+
+
+def extract_modes(
+    source,
+    modes: Iterable[str],
+    use_pcen: bool = False,
+    force_down_to_16k: bool = True,
+    n_frames: Optional[int] = None,
+    fmin: Optional[int] = None,
+    fmax: Optional[int] = None,
+    pad: bool = True,
+    resampler: Optional[str] = None,
+    pitch: Optional[str] = None,
+    vad: bool = False,
+) -> Dict[str, Tuple[np.ndarray, int, Tuple[int, int]]]:
+    """
+    Extrai vários modos de uma só gravação com um único decode/resample:
+    todos os modos compartilham o mesmo AudioAnalysis (e seus STFT/Mel).
+    Se todos os modos forem temporais, só o trecho que o maior n_frames precisa é decodificado.
+    """
+    modes = list(modes)
+    max_frames = None
+    if modes and all(m in MATRIX_MODES for m in modes):
+        max_frames = max(span_frames(MATRIX_DEFAULTS[m][0] if n_frames is None else n_frames) for m in modes)
+    an: AudioAnalysis = ensure_analysis(source, force_down_to_16k, resampler, max_frames=max_frames)
+    return {
+        m: extract_mode(an, m, use_pcen=use_pcen, n_frames=n_frames, fmin=fmin, fmax=fmax, pad=pad, pitch=pitch, vad=vad)
+        for m in modes
+    }
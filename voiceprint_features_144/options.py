@@ -0,0 +1,31 @@
+"""
+Nomes aceitos pelos extratores (modos, motores de reamostragem, estimadores de pitch) e seus
+padrões. Sem numpy/scipy/librosa: o CLI monta o --help e valida argumentos só com este módulo.
+"""
+import os
+
+# Modos que resumem o áudio em um vetor (144,) e modos temporais (n_frames, 144)
+VECTOR_MODES = ("mfcc", "logmel", "bio_mean144", "bio_mm72")
+MATRIX_MODES = ("mfcc_matrix", "health_matrix")
+ALL_MODES = VECTOR_MODES + MATRIX_MODES
+
+# Defaults dos modos temporais (n_frames, fmin, fmax)
+MATRIX_DEFAULTS = {
+    "mfcc_matrix": (20000, 100, 7000),
+    "health_matrix": (400, 100, 7200),
+}
+
+# Modos que realmente usam PCEN
+PCEN_MODES = ("logmel", "bio_mean144", "bio_mm72", "health_matrix")
+
+# Reamostragem (resample.py)
+RESAMPLERS = ("soxr_hq", "soxr_vhq", "polyphase", "kaiser_best")
+DEFAULT_RESAMPLER = os.getenv("VOICEPRINT_RESAMPLER", "soxr_hq")
+
+# Pitch do health_matrix (pitch.py)
+PITCH_ESTIMATORS = ("yin", "acf", "yin_decimated")
+DEFAULT_PITCH = "yin"
+
+# Motor das operações de DSP (dsp.py): librosa (referência) | numpy (sem librosa em runtime)
+ENGINES = ("librosa", "numpy")
+DEFAULT_ENGINE = os.getenv("VOICEPRINT_ENGINE", "librosa")
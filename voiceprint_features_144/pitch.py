@@ -0,0 +1,161 @@
+"""
+Estimadores de pitch (F0) da coluna de pitch do health_matrix, avaliados só nos quadros pedidos.
+
+  - yin            (padrão) YIN de librosa.yin (mesmo algoritmo, limiar 0.1 e interpolação
+                   parabólica), calculado apenas nos quadros selecionados: em cada quadro o
+                   valor é igual ao de librosa.yin no sinal inteiro
+  - acf            autocorrelação obtida do |STFT| que o health_matrix já calculou
+                   (irfft de |X|², corrigida pela autocorrelação da janela de Hann); não
+                   toca o sinal de novo
+  - yin_decimated  YIN no sinal decimado para ~4 kHz (resample_poly com o FIR em cache),
+                   quadros de mesma duração com 1/q das amostras
+
+acf e yin_decimated procuram F0 em [fmin, min(fmax, PITCH_FMAX)]: acima de ~1 kHz não há
+fundamental de voz, e a autocorrelação de lags muito curtos sempre ganha. O yin mantém a
+faixa pedida (compatível com a coluna original). Desvio e speed-up de cada estimador em
+relação ao YIN original: benchmarks/pitch.py.
+"""
+from typing import Optional
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+from . import dsp
+from .bases import resample_filter, stft_window
+from .options import DEFAULT_PITCH, PITCH_ESTIMATORS
+
+PITCH_FMAX = 1000.0       # teto de F0 de acf e yin_decimated (Hz)
+DECIMATED_SR = 4000       # taxa alvo aproximada do yin_decimated
+SILENCE_DB = 60.0         # quadros com RMS abaixo de (máximo - SILENCE_DB) não são avaliados
+YIN_THRESHOLD = 0.1       # trough_threshold padrão de librosa.yin
+ACF_PEAK_RATIO = 0.85     # acf: menor lag com pico >= 85% do maior pico (evita erro de oitava abaixo)
+
+
+def check_pitch(method: Optional[str]) -> str:
+    """Resolve None para o padrão e valida o nome do estimador."""
+    name = (method or DEFAULT_PITCH).strip().lower()
+    if name not in PITCH_ESTIMATORS:
+        raise ValueError(f"unknown pitch estimator: {name} (use one of {', '.join(PITCH_ESTIMATORS)})")
+    return name
+
+
+def voiced_frames(rms: np.ndarray, silence_db: float = SILENCE_DB) -> np.ndarray:
+    """Índices dos quadros com energia: RMS > 0 e a menos de `silence_db` dB do quadro mais forte."""
+    rms = np.asarray(rms)
+    if rms.size == 0 or not np.any(rms > 0):
+        return np.zeros(0, dtype=np.int64)
+    floor = rms.max() * 10.0 ** (-silence_db / 20.0)
+    return np.flatnonzero(rms > floor)
+
+
+def _frames_at(y: np.ndarray, centers: np.ndarray, frame_length: int) -> np.ndarray:
+    """Quadros (n, frame_length) centrados em `centers`, com zeros fora do sinal (center=True, constant)."""
+    half = frame_length // 2
+    lo = max(0, half - int(centers.min()))
+    hi = max(0, int(centers.max()) + frame_length - half - len(y))
+    ypad = np.pad(y, (lo, hi))
+    idx = (centers - half + lo)[:, None] + np.arange(frame_length)
+    return ypad[idx]
+
+
+def _parabolic_shift(x: np.ndarray, i: np.ndarray) -> np.ndarray:
+    """Deslocamento do vértice da parábola em x[i-1], x[i], x[i+1] (0 nas bordas ou se passar de 1 bin)."""
+    n = x.shape[1]
+    rows = np.arange(x.shape[0])
+    inner = (i > 0) & (i < n - 1)
+    il, ir = np.clip(i - 1, 0, n - 1), np.clip(i + 1, 0, n - 1)
+    a = x[rows, ir] + x[rows, il] - 2 * x[rows, i]
+    b = (x[rows, ir] - x[rows, il]) / 2
+    ok = inner & (np.abs(b) < np.abs(a))
+    shift = np.zeros(len(i), dtype=x.dtype)
+    shift[ok] = -b[ok] / a[ok]
+    return shift
+
+
+def yin_frames(frames: np.ndarray, sr: float, fmin: float, fmax: float, threshold: float = YIN_THRESHOLD) -> np.ndarray:
+    """
+    YIN em quadros já recortados (n, frame_length), como librosa.yin: diferença normalizada
+    pela média cumulativa, primeiro vale abaixo de `threshold` (ou o mínimo global) e
+    interpolação parabólica do período.
+    """
+    n, L = frames.shape
+    min_period = int(np.floor(sr / fmax))
+    max_period = min(int(np.ceil(sr / fmin)), L - 1)
+
+    acf = dsp.autocorrelate(frames, max_size=max_period + 1)
+    energy = np.cumsum(frames[:, :max_period] ** 2, axis=1)
+    energy[:, 0] = 0.0  # como em librosa.yin, que zera esse termo antes de usá-lo
+
+    diff = np.empty((n, max_period + 1), dtype=acf.dtype)
+    diff[:, 0] = 0.0
+    diff[:, 1:] = 2 * (acf[:, :1] - acf[:, 1:]) - energy
+    cmean = np.cumsum(diff[:, 1:], axis=1) / np.arange(1, max_period + 1)
+    den = cmean[:, min_period - 1 : max_period]
+    d = diff[:, min_period : max_period + 1] / (den + np.finfo(den.dtype).tiny)
+
+    trough = np.zeros(d.shape, dtype=bool)
+    trough[:, 1:-1] = (d[:, 1:-1] < d[:, :-2]) & (d[:, 1:-1] <= d[:, 2:])
+    trough[:, 0] = d[:, 0] < d[:, 1]
+    trough[:, -1] = d[:, -1] < d[:, -2]  # util.localmin conta a última posição
+    below = trough & (d < threshold)
+    period = np.where(below.any(axis=1), np.argmax(below, axis=1), np.argmin(d, axis=1))
+    return sr / (min_period + period + _parabolic_shift(d, period))
+
+
+def _acf_from_stft(mag: np.ndarray, sr: int, n_fft: int, fmin: float, fmax: float) -> np.ndarray:
+    """F0 por autocorrelação a partir de colunas de |STFT| (1 + n_fft//2, n)."""
+    lag_min = max(1, int(np.floor(sr / fmax)))
+    lag_max = min(int(np.ceil(sr / fmin)), n_fft // 2 - 1)
+    r = scipy.fft.irfft(mag.astype(np.float64) ** 2, n=n_fft, axis=0)[: lag_max + 2].T  # (n, lag_max + 2)
+    w = stft_window(n_fft).astype(np.float64)
+    w_acf = scipy.fft.irfft(np.abs(scipy.fft.rfft(w)) ** 2, n=n_fft)[: lag_max + 2]
+    # normaliza por r[0] e desfaz o decaimento que a janela impõe à autocorrelação
+    rn = r / (r[:, :1] + np.finfo(np.float64).tiny) / (w_acf / w_acf[0])
+    seg = rn[:, lag_min - 1 : lag_max + 2]  # um lag de margem em cada lado para achar picos locais
+
+    peak = np.zeros(seg.shape, dtype=bool)
+    peak[:, 1:-1] = (seg[:, 1:-1] > seg[:, :-2]) & (seg[:, 1:-1] >= seg[:, 2:])
+    vals = np.where(peak, seg, -np.inf)
+    best = vals.max(axis=1, keepdims=True)
+    pick = np.argmax(peak & (vals >= ACF_PEAK_RATIO * best), axis=1)
+    none = ~np.isfinite(best[:, 0])
+    pick[none] = np.argmax(seg[none, 1:-1], axis=1) + 1
+    lag = lag_min - 1 + pick + _parabolic_shift(seg, pick)
+    return sr / lag
+
+
+def estimate_pitch(
+    an,
+    frames: np.ndarray,
+    method: str = DEFAULT_PITCH,
+    fmin: float = 100,
+    fmax: float = 7200,
+    pre_emphasis: Optional[float] = None,
+) -> np.ndarray:
+    """
+    F0 (Hz, float64) nos quadros `frames` (índices da grade do STFT de `an`: centro em t * hop)
+    do sinal de `an` (AudioAnalysis), com o estimador `method`.
+    """
+    method = check_pitch(method)
+    frames = np.asarray(frames, dtype=np.int64)
+    if frames.size == 0:
+        return np.zeros(0)
+    sr, n_fft, hop = an.sr, an.n_fft, an.hop
+
+    if method == "acf":
+        mag = an.magnitude(pre_emphasis)
+        return _acf_from_stft(mag[:, frames], sr, n_fft, fmin, min(fmax, PITCH_FMAX, sr / 2 - 1))
+
+    y = an.signal(pre_emphasis)
+    if method == "yin":
+        return yin_frames(_frames_at(y, frames * hop, n_fft), sr, fmin, min(fmax, sr // 2 - 1))
+
+    q = max(1, int(sr // DECIMATED_SR))
+    sr_d = sr / q
+    fir = resample_filter(1, q)
+    # decima só até o fim do último quadro pedido + meio FIR (em amostras de entrada, up=1): as
+    # amostras decimadas que o último quadro lê não dependem do corte
+    end = min(len(y), int(frames.max()) * hop + n_fft + len(fir) // 2)
+    y_d = scipy.signal.resample_poly(y[:end], 1, q, window=fir) if q > 1 else y[:end]
+    centers = np.round(frames * hop / q).astype(np.int64)
+    return yin_frames(_frames_at(y_d, centers, n_fft // q), sr_d, fmin, min(fmax, PITCH_FMAX, sr_d / 2 - 1))
@@ -0,0 +1,336 @@
+"""
+Extração incremental para áudio ao vivo (ligações, microfone): PCM chega em pedaços de
+qualquer tamanho e as linhas 144D saem à medida que os quadros ficam completos.
+
+LiveExtractor mantém só o estado necessário para os próximos quadros: a sobreposição da STFT
+(FrameRing), o estado do reamostrador (soxr.ResampleStream), o filtro do PCEN, os 8 quadros de
+contexto dos deltas e acumuladores de tamanho fixo (RunningStats / QuantileSketch). O custo de
+cada push() depende só do tamanho do pedaço, nunca de há quanto tempo o stream começou.
+
+Diferenças em relação aos extratores de arquivo (a extração é causal: um quadro não pode
+depender do áudio que ainda não chegou):
+  - linhas saem com atraso de 4 quadros (contexto à frente do delta, width=9) e os 4 últimos
+    só em flush(); com menos de 9 quadros no total, flush() não devolve linhas
+  - referência em dB e piso top_db=80 usam o pico visto até o quadro (e não o global): no
+    health_matrix em dB as linhas anteriores ao pico mudam de escala; com PCEN (causal) e no
+    mfcc_matrix com sinal sem trechos 80 dB abaixo do pico, as linhas coincidem (±1 nível)
+  - health_matrix: quadro com voz = RMS a menos de pitch.SILENCE_DB do maior RMS até ele;
+    quadros sem voz (ou sem F0) recebem a mediana (QuantileSketch, 1 Hz) dos F0 anteriores
+  - summary() = extract_streaming(..., exact_floor=False) do áudio recebido até agora (mfcc)
+    ou extract_streaming(..., "logmel"); os deltas dos 4 últimos quadros do mfcc só entram
+    depois de flush()
+"""
+from typing import List, Optional
+import numpy as np
+import soxr
+
+from . import dsp
+from .bases import dct_matrix, mel_basis, stft_window
+from .common_adaptive import fill_columns, normalize_rows_uint8, safe_voice_band, stft_params_from_sr, to_mono
+from .pitch import PITCH_FMAX, SILENCE_DB, _acf_from_stft, check_pitch, yin_frames
+from .resample import soxr_quality
+from .streaming import LogMelSummary, MfccSummary, PreEmphasis, QuantileSketch, StreamingDelta, _db
+
+LIVE_LAYOUTS = ("health_matrix", "mfcc_matrix")
+LIVE_SUMMARIES = ("mfcc", "logmel")
+LIVE_PITCH = ("yin", "acf")    # yin_decimated decima o sinal inteiro: sem versão incremental
+RING_BLOCK_FRAMES = 64         # quadros por passada do FrameRing (pedaços maiores são divididos)
+
+
+class FrameRing:
+    """
+    Quadros de n_fft amostras com passo hop a partir de pedaços de qualquer tamanho, num buffer
+    fixo de n_fft + block * hop amostras: cada add() copia as amostras novas para o fim, devolve
+    os quadros completos (k, n_fft) e move para o início só o resto (< n_fft amostras).
+    center=True equivale a librosa (center=True, pad_mode="constant"): n_fft // 2 zeros no
+    início e, em flush(), no fim, com 1 + n // hop quadros no total. center=False equivale a
+    librosa.util.frame (ex.: librosa.feature.rms(center=False)).
+    """
+
+    def __init__(self, n_fft: int, hop: int, center: bool = True, block: int = RING_BLOCK_FRAMES):
+        self.n_fft, self.hop, self.center = n_fft, hop, center
+        self.buf = np.zeros(n_fft + max(block * hop, n_fft), dtype=np.float32)
+        self.fill = n_fft // 2 if center else 0
+        self.n_samples = 0
+        self.n_frames = 0
+
+    def _take(self, limit: Optional[int] = None) -> np.ndarray:
+        n = 0 if self.fill < self.n_fft else 1 + (self.fill - self.n_fft) // self.hop
+        if limit is not None:
+            n = max(0, min(n, limit))
+        if n == 0:
+            return np.zeros((0, self.n_fft), dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(self.buf[: self.fill], self.n_fft)[:: self.hop][:n].copy()
+        used = n * self.hop
+        self.buf[: self.fill - used] = self.buf[used: self.fill]
+        self.fill -= used
+        self.n_frames += n
+        return frames
+
+    def add(self, x: np.ndarray) -> np.ndarray:
+        out = []
+        pos = 0
+        while pos < len(x):
+            k = min(len(x) - pos, len(self.buf) - self.fill)
+            self.buf[self.fill: self.fill + k] = x[pos: pos + k]
+            self.fill += k
+            pos += k
+            out.append(self._take())
+        self.n_samples += len(x)
+        return np.concatenate(out) if len(out) > 1 else (out[0] if out else np.zeros((0, self.n_fft), np.float32))
+
+    def flush(self) -> np.ndarray:
+        if not self.center:
+            return np.zeros((0, self.n_fft), dtype=np.float32)
+        half = self.n_fft // 2
+        self.buf[self.fill: self.fill + half] = 0.0
+        self.fill += half
+        return self._take(limit=1 + self.n_samples // self.hop - self.n_frames)
+
+
+def stft_frames(frames: np.ndarray, window: np.ndarray) -> np.ndarray:
+    """|rfft| (n_fft//2 + 1, k) de quadros (k, n_fft), como StreamingSTFT."""
+    return np.abs(np.fft.rfft(frames * window, axis=1)).T.astype(np.float32)
+
+
+class _Pending:
+    """Fila de quadros (k, dim) que esperam as outras colunas da linha (deltas, RMS)."""
+
+    def __init__(self, dim: int, dtype=np.float32):
+        self.data = np.zeros((0, dim), dtype=dtype)
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def push(self, X: np.ndarray) -> None:
+        if len(X):
+            self.data = np.concatenate([self.data, X]) if len(self.data) else X
+
+    def pop(self, k: int) -> np.ndarray:
+        out, self.data = self.data[:k], self.data[k:]
+        return out
+
+
+class LiveExtractor:
+    """
+    Extrator incremental: push(pcm) devolve as linhas uint8 (k, 144) do layout que ficaram
+    prontas; flush() fecha o stream e devolve as restantes; summary() devolve a qualquer
+    momento o vetor (144,) float32 do resumo (mfcc144 ou logmel144) do áudio recebido.
+
+    pcm: (n,) ou (n, canais), float em [-1, 1] ou inteiro (escalado como o soundfile).
+    layout: health_matrix (48 Mel em dB/PCEN | Δ | RMS | F0) ou mfcc_matrix (24 MFCC | Δ | ΔΔ),
+    com as colunas e a normalização por linha dos extratores de arquivo.
+    sr > 16 kHz é reamostrado com estado (soxr, qualidade de resample.soxr_quality(resampler)).
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        layout: str = "health_matrix",
+        summary: str = "mfcc",
+        use_pcen: bool = False,
+        pitch: str = "yin",
+        resampler: Optional[str] = None,
+        force_down_to_16k: bool = True,
+        pre_emphasis: float = 0.97,
+        n_mels: int = 48,
+    ):
+        if layout not in LIVE_LAYOUTS:
+            raise ValueError(f"unknown live layout: {layout} (use one of {', '.join(LIVE_LAYOUTS)})")
+        if summary not in LIVE_SUMMARIES:
+            raise ValueError(f"unknown live summary: {summary} (use one of {', '.join(LIVE_SUMMARIES)})")
+        pitch = check_pitch(pitch)
+        if pitch not in LIVE_PITCH:
+            raise ValueError(f"pitch estimator {pitch!r} has no live path (use one of {', '.join(LIVE_PITCH)})")
+        self.layout, self.summary_mode, self.use_pcen, self.pitch = layout, summary, use_pcen, pitch
+        self.orig_sr = int(sr)
+        self.rs = None
+        if force_down_to_16k and self.orig_sr > 16000:
+            self.rs = soxr.ResampleStream(self.orig_sr, 16000, 1, dtype="float32", quality=soxr_quality(resampler))
+        self.sr = 16000 if self.rs is not None else self.orig_sr
+        self.n_fft, self.hop = stft_params_from_sr(self.sr, 25.0, 10.0)
+        self.window = stft_window(self.n_fft)
+
+        self.pre = PreEmphasis(pre_emphasis)
+        self.ring = FrameRing(self.n_fft, self.hop)  # pré-enfatizado, centrado: STFT (+ F0)
+        self.raw_ring = FrameRing(self.n_fft, self.hop) if summary == "logmel" else None
+        self.rms_ring = FrameRing(self.n_fft, self.hop, center=False) if layout == "health_matrix" else None
+
+        if summary == "mfcc":
+            self.summ = MfccSummary(self.sr, self.n_fft)
+        else:
+            self.summ = LogMelSummary(self.sr, self.n_fft, 48, use_pcen, want_std=True, want_median=True)
+
+        if layout == "mfcc_matrix":
+            self.band = safe_voice_band(self.sr, 100, 7000)
+            self.basis = mel_basis(self.sr, self.n_fft, 64, self.band[0], self.band[1], htk=True)
+            self.D = dct_matrix(24, 64)
+            self.deltas = [StreamingDelta(1), StreamingDelta(2)]
+            self.pending = [_Pending(24), _Pending(24), _Pending(24)]  # M, Δ, ΔΔ
+            self.peak = -np.inf   # pico (dB) visto até agora: piso top_db causal
+        else:
+            self.band = safe_voice_band(self.sr, 100, 7200)
+            self.basis = mel_basis(self.sr, self.n_fft, n_mels, self.band[0], self.band[1])
+            self.deltas = [StreamingDelta(1)]
+            # base, Δ, RMS e o que o F0 precisa (quadro para yin, |STFT| para acf)
+            f0_dim = self.n_fft if pitch == "yin" else self.n_fft // 2 + 1
+            self.pending = [_Pending(n_mels), _Pending(n_mels), _Pending(1), _Pending(f0_dim)]
+            self.zi = None
+            self.mel_peak = 0.0   # referência (ref=max) causal do dB
+            self.rms_peak = 0.0
+            self.f0_sketch = QuantileSketch(1, resolution=1.0)
+        self.n_in = 0         # amostras recebidas (taxa original)
+        self.n_rows = 0       # linhas emitidas
+        self.n_frames = 0     # quadros do STFT analisados
+        self.closed = False
+
+    # ---------- entrada ----------
+
+    def _prepare(self, pcm: np.ndarray) -> np.ndarray:
+        pcm = np.asarray(pcm)
+        if pcm.dtype.kind in "iu":
+            if pcm.dtype.kind == "u":  # PCM sem sinal (u8): centrado em 2**(bits-1)
+                pcm = pcm.astype(np.int64) - (1 << (8 * pcm.dtype.itemsize - 1))
+            scale = np.float32(1.0 / (1 << (8 * pcm.dtype.itemsize - 1)))
+            y = pcm.astype(np.float32) * scale
+        else:
+            y = pcm.astype(np.float32, copy=False)
+        y = to_mono(y)
+        self.n_in += len(y)
+        return self.rs.resample_chunk(y) if self.rs is not None else y
+
+    def push(self, pcm: np.ndarray) -> np.ndarray:
+        """Acrescenta amostras; devolve as linhas (k, 144) uint8 que ficaram completas."""
+        if self.closed:
+            raise ValueError("live extractor already flushed")
+        return self._advance(self._prepare(pcm), last=False)
+
+    def flush(self) -> np.ndarray:
+        """Fecha o stream (padding final do STFT, borda dos deltas) e devolve as linhas restantes."""
+        if self.closed:
+            return np.zeros((0, 144), dtype=np.uint8)
+        y = self.rs.resample_chunk(np.zeros(0, dtype=np.float32), last=True) if self.rs is not None else np.zeros(0, np.float32)
+        rows = self._advance(y, last=True)
+        self.closed = True
+        return rows
+
+    def summary(self) -> np.ndarray:
+        """Vetor (144,) float32 do resumo do áudio recebido até agora (zeros antes do primeiro quadro)."""
+        return self.summ.result()
+
+    @property
+    def seconds(self) -> float:
+        """Duração do áudio recebido (s)."""
+        return self.n_in / self.orig_sr
+
+    # ---------- quadros ----------
+
+    def _advance(self, y: np.ndarray, last: bool) -> np.ndarray:
+        y_pre = self.pre.push(y)
+        frames = self.ring.add(y_pre)
+        if last:
+            frames = np.concatenate([frames, self.ring.flush()])
+        mag = stft_frames(frames, self.window)
+        self.n_frames += len(frames)
+
+        if self.summary_mode == "mfcc":
+            self.summ.update(mag)
+            if last and self.summ.deltas[0].frames >= self.summ.deltas[0].width:
+                self.summ.finish()
+        else:
+            raw = self.raw_ring.add(y)
+            if last:
+                raw = np.concatenate([raw, self.raw_ring.flush()])
+            self.summ.update(stft_frames(raw, self.window))
+
+        if self.layout == "mfcc_matrix":
+            return self._mfcc_rows(mag, last)
+        rms_frames = self.rms_ring.add(y_pre)
+        return self._health_rows(frames, mag, rms_frames, last)
+
+    def _delta_ready(self, X: np.ndarray, last: bool) -> List[np.ndarray]:
+        """Deltas (k, dim) de X (T, dim) que ficaram prontos; no fim, a borda (se houve quadros suficientes)."""
+        out = []
+        for d in self.deltas:
+            parts = [d.push(X.T)]
+            if last and d.frames >= d.width:
+                parts.append(d.flush())
+            out.append(np.concatenate(parts, axis=1).T.astype(np.float32))
+        return out
+
+    def _emit(self, full: np.ndarray) -> np.ndarray:
+        self.n_rows += full.shape[0]
+        return normalize_rows_uint8(full)
+
+    def _mfcc_rows(self, mag: np.ndarray, last: bool) -> np.ndarray:
+        S_db = _db(self.basis @ (mag ** 2))
+        # piso top_db=80 a partir do pico visto até cada quadro
+        peaks = np.maximum.accumulate(np.maximum(S_db.max(axis=0, initial=-np.inf), self.peak))
+        if len(peaks):
+            self.peak = float(peaks[-1])
+        M = (self.D @ np.maximum(S_db, peaks - 80.0)).T.astype(np.float32)  # (T, 24)
+        self.pending[0].push(M)
+        for p, d in zip(self.pending[1:], self._delta_ready(M, last)):
+            p.push(d)
+        # com menos de 9 quadros no total não há deltas (nem linhas)
+        k = min(len(p) for p in self.pending)
+        return self._emit(fill_columns([p.pop(k) for p in self.pending], k))
+
+    def _health_rows(self, frames: np.ndarray, mag: np.ndarray, rms_frames: np.ndarray, last: bool) -> np.ndarray:
+        mel = self.basis @ mag
+        if self.use_pcen:
+            if mel.shape[1]:
+                base, self.zi = dsp.pcen(mel, time_constant=0.06, eps=1e-6, b=0.5, zi=self.zi, return_zf=True)
+            else:
+                base = mel
+            base = base.astype(np.float32)
+        else:
+            # power_to_db(mel, ref=pico até o quadro) com piso top_db=80 (= -80 após a referência)
+            mel_db = _db(mel)
+            ref = np.maximum.accumulate(np.maximum(mel.max(axis=0, initial=0.0), self.mel_peak))
+            if len(ref):
+                self.mel_peak = float(ref[-1])
+            base = np.maximum(mel_db - _db(ref), -80.0).astype(np.float32)
+        base = base.T  # (T, n_mels)
+        rms = np.sqrt(np.mean(np.abs(rms_frames) ** 2, axis=1, dtype=np.float32))[:, None]
+
+        self.pending[0].push(base)
+        self.pending[1].push(self._delta_ready(base, last)[0])
+        self.pending[2].push(rms)
+        self.pending[3].push(frames if self.pitch == "yin" else mag.T)
+        k = min(len(p) for p in self.pending)  # quadros com Δ e RMS (center=False: o RMS acaba antes)
+        base, d1, rms, src = [p.pop(k) for p in self.pending]
+        pitch_col = self._pitch(rms[:, 0], src)
+        full = fill_columns((base, d1, rms, pitch_col), k)
+        np.nan_to_num(full, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        return self._emit(full)
+
+    def _pitch(self, rms: np.ndarray, src: np.ndarray) -> np.ndarray:
+        """
+        Coluna de F0 (k, 1): avaliada nos quadros com voz; os demais (ou F0 não finito) recebem a
+        mediana dos F0 avaliados antes deles (independe de como o stream foi dividido em pedaços).
+        """
+        k = len(rms)
+        col = np.zeros((k, 1), dtype=np.float32)
+        if k == 0:
+            return col
+        peaks = np.maximum.accumulate(np.maximum(rms, self.rms_peak))
+        self.rms_peak = float(peaks[-1])
+        voiced = np.flatnonzero(rms > peaks * 10.0 ** (-SILENCE_DB / 20.0))
+        f0 = np.full(k, np.nan)
+        if voiced.size:
+            fmin, fmax = self.band
+            if self.pitch == "yin":
+                f0[voiced] = yin_frames(src[voiced], self.sr, fmin, min(fmax, self.sr // 2 - 1))
+            else:
+                f0[voiced] = _acf_from_stft(src[voiced].T, self.sr, self.n_fft, fmin, min(fmax, PITCH_FMAX, self.sr / 2 - 1))
+        ok = np.isfinite(f0)
+        # trechos alternados: F0 avaliados entram no sketch, os outros usam a mediana até ali
+        edges = np.flatnonzero(np.diff(ok.astype(np.int8))) + 1
+        for a, b in zip(np.r_[0, edges], np.r_[edges, k]):
+            if ok[a]:
+                col[a:b, 0] = f0[a:b]
+                self.f0_sketch.update(f0[None, a:b])
+            else:
+                col[a:b, 0] = self.f0_sketch.median()[0] if self.f0_sketch.n else 0.0
+        return col
@@ -0,0 +1,63 @@
+"""
+Reamostragem para 16 kHz com motor selecionável.
+
+  - soxr_hq     (padrão) rápido, banda passante ~95% de Nyquist
+  - soxr_vhq    soxr de qualidade máxima (o mesmo usado no caminho em streaming)
+  - polyphase   scipy.signal.resample_poly com a razão reduzida pelo MDC; razões inteiras
+                (48k→16k = 1/3, 32k→16k = 1/2) viram decimação pura, sem etapa de upsample
+  - kaiser_best resampy (padrão antigo; o mais lento, ~100x o soxr_hq). resampy/numba só são
+                importados no primeiro uso
+
+O padrão do processo vem de VOICEPRINT_RESAMPLER. O desvio de cada motor nos vetores
+144D e o throughput são medidos por benchmarks/resamplers.py.
+"""
+from math import gcd
+from typing import Optional
+import numpy as np
+import scipy.signal
+import soxr
+
+from .bases import resample_filter
+from .options import DEFAULT_RESAMPLER, RESAMPLERS
+
+_SOXR_QUALITY = {"soxr_hq": "HQ", "soxr_vhq": "VHQ"}
+
+
+def check_resampler(resampler: Optional[str]) -> str:
+    """Resolve None para o padrão do processo e valida o nome do motor."""
+    name = (resampler or DEFAULT_RESAMPLER).strip().lower()
+    if name not in RESAMPLERS:
+        raise ValueError(f"unknown resampler: {name} (use one of {', '.join(RESAMPLERS)})")
+    return name
+
+
+def soxr_quality(resampler: Optional[str]) -> str:
+    """Qualidade do soxr.ResampleStream usada em streaming (motores sem estado caem no VHQ)."""
+    return _SOXR_QUALITY.get(check_resampler(resampler), "VHQ")
+
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int, resampler: Optional[str] = None) -> np.ndarray:
+    """Reamostra um sinal mono float32 de orig_sr para target_sr com o motor escolhido."""
+    name = check_resampler(resampler)
+    if orig_sr == target_sr:
+        return y
+    if name == "polyphase":
+        g = gcd(int(orig_sr), int(target_sr))
+        up, down = int(target_sr) // g, int(orig_sr) // g
+        # Mesmo filtro que resample_poly projetaria, mas projetado uma vez por razão (cache de bases)
+        y_hat = scipy.signal.resample_poly(y, up, down, window=resample_filter(up, down))
+    elif name in _SOXR_QUALITY:
+        y_hat = soxr.resample(y, orig_sr, target_sr, quality=name)
+    else:
+        import resampy
+
+        y_hat = resampy.resample(y, orig_sr, target_sr, filter=name, axis=-1)
+    # mesmo comprimento que librosa.resample(fix=True): ceil(n · target_sr / orig_sr)
+    return _fix_length(y_hat, int(np.ceil(len(y) * target_sr / orig_sr))).astype(np.float32, copy=False)
+
+
+def _fix_length(y: np.ndarray, size: int) -> np.ndarray:
+    """Corta ou completa com zeros até `size` amostras (librosa.util.fix_length)."""
+    if len(y) >= size:
+        return y[:size]
+    return np.pad(y, (0, size - len(y)))
@@ -0,0 +1,485 @@
+"""
+Extração 144D em streaming para gravações longas (memória de pico constante).
+
+Em vez de carregar o arquivo inteiro, lê blocos com soundfile.SoundFile.blocks,
+reamostra com estado (soxr.ResampleStream), mantém a sobreposição da STFT entre
+blocos e resume os quadros com acumuladores online:
+  - média/desvio: Welford (combinação de blocos de Chan et al.)
+  - mediana: QuantileSketch (histograma por banda de resolução fixa)
+
+Tolerância em relação ao caminho em memória (extract_mfcc_144 / extract_logmel_144 /
+extract_biometric_144):
+  - sr <= 16 kHz (sem reamostragem): diferenças de arredondamento float32/float64,
+    |Δ| < 1e-3 nas médias/desvios; medianas dentro da resolução do sketch
+    (0.01 dB / 1e-3 em PCEN).
+  - sr > 16 kHz: a reamostragem em streaming é o soxr com estado (HQ com
+    resampler="soxr_hq", VHQ nos demais motores, que não têm versão com estado);
+    com o mesmo motor soxr do caminho em memória sobra só o efeito de borda dos
+    blocos. O desvio entre motores é medido por benchmarks/resamplers.py.
+  - mfcc: o piso top_db=80 do power_to_db depende do pico global; por padrão ele é
+    obtido numa primeira passada (exact_floor=True). Com exact_floor=False usa-se o
+    pico visto até o quadro atual e quadros mais de 80 dB abaixo de um pico ainda não
+    observado (ex.: silêncio digital no início) divergem.
+  - logmel/bio_* em dB: a referência (ref=np.max) e o piso top_db são aplicados no
+    final a partir do Welford + sketch, então não dependem da ordem dos blocos.
+"""
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import scipy.signal
+import soundfile as sf
+import soxr
+
+from . import dsp
+from .analysis import audio_input
+from .resample import soxr_quality
+from .bases import dct_matrix, mel_basis, stft_window
+from .common_adaptive import stft_params_from_sr, safe_voice_band
+
+STREAM_MODES = ("mfcc", "logmel", "bio_mean144", "bio_mm72")
+
+
+class RunningStats:
+    """Média e variância online por linha de uma matriz (dim, T), atualizadas bloco a bloco (Welford/Chan)."""
+
+    def __init__(self, dim: int):
+        self.n = 0
+        self.mean = np.zeros(dim, dtype=np.float64)
+        self.m2 = np.zeros(dim, dtype=np.float64)
+
+    def update(self, X: np.ndarray) -> None:
+        k = X.shape[1]
+        if k == 0:
+            return
+        X = X.astype(np.float64, copy=False)
+        b_mean = X.mean(axis=1)
+        b_m2 = ((X - b_mean[:, None]) ** 2).sum(axis=1)
+        n = self.n + k
+        delta = b_mean - self.mean
+        self.mean += delta * (k / n)
+        self.m2 += b_m2 + delta ** 2 * (self.n * k / n)
+        self.n = n
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        if self.n <= ddof:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.n - ddof))
+
+
+class QuantileSketch:
+    """
+    Histograma por linha com bins de largura `resolution` e faixa que cresce sob demanda.
+    Se a faixa passar de `max_bins`, a resolução dobra (bins vizinhos são fundidos), então a
+    memória depende da faixa dos valores e nunca da duração. Cada bin guarda contagem, soma
+    e soma dos quadrados: a mediana é estimada pela média do bin e um piso aplicado depois
+    (clamp) pode corrigir média/variância quase exatamente.
+    """
+
+    def __init__(self, dim: int, resolution: float = 0.01, max_bins: int = 8192):
+        self.dim = dim
+        self.res = float(resolution)
+        self.max_bins = int(max_bins)
+        self.lo = 0
+        self.count = np.zeros((dim, 0), dtype=np.int64)
+        self.sum = np.zeros((dim, 0), dtype=np.float64)
+        self.sumsq = np.zeros((dim, 0), dtype=np.float64)
+        self.n = 0
+
+    @property
+    def n_bins(self) -> int:
+        return self.count.shape[1]
+
+    def _coarsen(self) -> None:
+        arrays = [self.count, self.sum, self.sumsq]
+        if self.lo % 2:
+            arrays = [np.pad(a, ((0, 0), (1, 0))) for a in arrays]
+            self.lo -= 1
+        if arrays[0].shape[1] % 2:
+            arrays = [np.pad(a, ((0, 0), (0, 1))) for a in arrays]
+        self.count, self.sum, self.sumsq = [a.reshape(self.dim, -1, 2).sum(axis=2) for a in arrays]
+        self.lo //= 2
+        self.res *= 2
+
+    def _ensure_range(self, imin: int, imax: int) -> None:
+        lo, hi = self.lo, self.lo + self.n_bins
+        if self.n_bins and lo <= imin and imax < hi:
+            return
+        # folga para não realocar a cada bloco
+        margin = max(64, (imax - imin) // 4)
+        new_lo = imin - margin if (not self.n_bins or imin < lo) else lo
+        new_hi = imax + 1 + margin if (not self.n_bins or imax >= hi) else hi
+        if not self.n_bins:
+            lo = hi = new_lo
+        pad = ((0, 0), (lo - new_lo, new_hi - hi))
+        self.count = np.pad(self.count, pad)
+        self.sum = np.pad(self.sum, pad)
+        self.sumsq = np.pad(self.sumsq, pad)
+        self.lo = new_lo
+
+    def update(self, X: np.ndarray) -> None:
+        if X.shape[1] == 0:
+            return
+        X = X.astype(np.float64, copy=False)
+        idx = np.floor(X / self.res).astype(np.int64)
+        self._ensure_range(int(idx.min()), int(idx.max()))
+        while self.n_bins > self.max_bins:
+            self._coarsen()
+            idx = np.floor(X / self.res).astype(np.int64)
+        flat = (idx - self.lo) + np.arange(self.dim)[:, None] * self.n_bins
+        size = self.dim * self.n_bins
+        self.count += np.bincount(flat.ravel(), minlength=size).reshape(self.dim, -1)
+        self.sum += np.bincount(flat.ravel(), weights=X.ravel(), minlength=size).reshape(self.dim, -1)
+        self.sumsq += np.bincount(flat.ravel(), weights=(X * X).ravel(), minlength=size).reshape(self.dim, -1)
+        self.n += X.shape[1]
+
+    def _value_at_rank(self, rank: int) -> np.ndarray:
+        cum = np.cumsum(self.count, axis=1)
+        b = np.argmax(cum > rank, axis=1)
+        rows = np.arange(self.dim)
+        return self.sum[rows, b] / np.maximum(self.count[rows, b], 1)
+
+    def median(self, floor: Optional[float] = None) -> np.ndarray:
+        """Mediana por linha (média dos dois postos centrais, como np.median); `floor` aplica max(x, floor)."""
+        if self.n == 0:
+            return np.zeros(self.dim, dtype=np.float64)
+        med = 0.5 * (self._value_at_rank((self.n - 1) // 2) + self._value_at_rank(self.n // 2))
+        return med if floor is None else np.maximum(med, floor)
+
+    def floor_correction(self, floor: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Correções (Δsoma, Δsoma²) por linha para trocar x por max(x, floor) nos valores
+        abaixo do piso. Só o bin que contém o piso é aproximado (pela média do bin).
+        """
+        mean_bin = self.sum / np.maximum(self.count, 1)
+        below = (self.count > 0) & (mean_bin < floor)
+        cnt = np.where(below, self.count, 0)
+        d_sum = (floor * cnt - np.where(below, self.sum, 0.0)).sum(axis=1)
+        d_sumsq = (floor * floor * cnt - np.where(below, self.sumsq, 0.0)).sum(axis=1)
+        return d_sum, d_sumsq
+
+
+class StreamingSTFT:
+    """
+    |STFT| incremental equivalente a librosa.stft(center=True, pad_mode="constant"):
+    guarda entre blocos só as amostras que ainda pertencem a quadros futuros.
+    """
+
+    def __init__(self, n_fft: int, hop: int):
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = stft_window(n_fft)
+        self._buf = np.zeros(n_fft // 2, dtype=np.float32)  # padding inicial do center=True
+        self._n_samples = 0
+        self._n_frames = 0
+
+    def _frames(self, buf: np.ndarray, max_frames: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        n = 0 if len(buf) < self.n_fft else 1 + (len(buf) - self.n_fft) // self.hop
+        if max_frames is not None:
+            n = min(n, max_frames)
+        if n == 0:
+            return np.zeros((self.n_fft // 2 + 1, 0), dtype=np.float32), 0
+        frames = np.lib.stride_tricks.sliding_window_view(buf, self.n_fft)[:: self.hop][:n]
+        mag = np.abs(np.fft.rfft(frames * self.window, axis=1)).T.astype(np.float32)
+        return mag, n
+
+    def push(self, x: np.ndarray) -> np.ndarray:
+        self._n_samples += len(x)
+        buf = np.concatenate([self._buf, x])
+        mag, n = self._frames(buf)
+        self._buf = buf[n * self.hop:]
+        self._n_frames += n
+        return mag
+
+    def flush(self) -> np.ndarray:
+        # librosa: 1 + len(y) // hop quadros no total
+        remaining = 1 + self._n_samples // self.hop - self._n_frames
+        buf = np.concatenate([self._buf, np.zeros(self.n_fft // 2, dtype=np.float32)])
+        mag, n = self._frames(buf, max_frames=max(0, remaining))
+        self._buf = buf[n * self.hop:]
+        self._n_frames += n
+        return mag
+
+
+class StreamingDelta:
+    """
+    Derivada temporal incremental equivalente a librosa.feature.delta(width=9, mode="interp"):
+    quadros internos usam os coeficientes Savitzky-Golay; os `width // 2` primeiros e
+    últimos são obtidos do ajuste polinomial nas bordas, como no scipy.
+    Atrasa a saída em width // 2 quadros.
+    """
+
+    def __init__(self, order: int = 1, width: int = 9):
+        self.order = order
+        self.width = width
+        self.half = width // 2
+        self.coeffs = scipy.signal.savgol_coeffs(width, order, deriv=order, use="dot")
+        self._buf = None      # quadros a partir do índice absoluto self._b0
+        self._b0 = 0
+        self._n = 0           # quadros recebidos
+        self._next = 0        # próximo quadro a emitir
+
+    @property
+    def frames(self) -> int:
+        """Quadros recebidos (flush() exige pelo menos `width`)."""
+        return self._n
+
+    def _edge(self, start: int) -> np.ndarray:
+        seg = self._buf[:, start - self._b0: start - self._b0 + self.width]
+        return scipy.signal.savgol_filter(seg, self.width, self.order, deriv=self.order, axis=1, mode="interp")
+
+    def push(self, X: np.ndarray) -> np.ndarray:
+        self._buf = X if self._buf is None else np.concatenate([self._buf, X], axis=1)
+        self._n += X.shape[1]
+        out = []
+        if self._next == 0 and self._n >= self.width:
+            out.append(self._edge(0)[:, : self.half])
+            self._next = self.half
+        last = self._n - 1 - self.half  # último quadro interno disponível
+        if self._next >= self.half and last >= self._next:
+            seg = self._buf[:, self._next - self.half - self._b0: last + self.half + 1 - self._b0]
+            win = np.lib.stride_tricks.sliding_window_view(seg, self.width, axis=1)
+            out.append(win @ self.coeffs)
+            self._next = last + 1
+        if self._next > 0:
+            # mantém os `width` últimos quadros para o ajuste da borda final
+            keep_from = max(0, self._next - self.half - 1)
+            self._buf = self._buf[:, keep_from - self._b0:]
+            self._b0 = keep_from
+        dim = X.shape[0]
+        return np.concatenate(out, axis=1) if out else np.zeros((dim, 0))
+
+    def flush(self) -> np.ndarray:
+        if self._n < self.width:
+            raise ValueError(f"when mode='interp', width={self.width} cannot exceed the number of frames={self._n}")
+        tail = self._edge(self._n - self.width)
+        out = tail[:, self._next - self._n:] if self._next < self._n else tail[:, :0]
+        self._next = self._n
+        return out
+
+
+class PreEmphasis:
+    """y[t] = x[t] - coef * x[t-1], carregando a última amostra entre blocos (y[0] = x[0])."""
+
+    def __init__(self, coef: float = 0.97):
+        self.coef = coef
+        self._prev = None
+
+    def push(self, x: np.ndarray) -> np.ndarray:
+        if len(x) == 0:
+            return x
+        y = np.empty_like(x)
+        y[0] = x[0] if self._prev is None else x[0] - self.coef * self._prev
+        y[1:] = x[1:] - self.coef * x[:-1]
+        self._prev = x[-1]
+        return y
+
+
+class BlockSource:
+    """
+    Lê um .wav em blocos (mono, float32) e reamostra para 16 kHz com estado quando sr > 16k.
+    Aceita caminho, objeto file-like com seek ou bytes; pode ser iterado mais de uma vez.
+    """
+
+    def __init__(
+        self, wav_path, force_down_to_16k: bool = True, block_seconds: float = 10.0, resampler: Optional[str] = None
+    ):
+        self.wav_path = audio_input(wav_path)
+        self.quality = soxr_quality(resampler)
+        self.block_seconds = block_seconds
+        self._start = self.wav_path.tell() if hasattr(self.wav_path, "tell") else None
+        with sf.SoundFile(self.wav_path) as f:
+            self.orig_sr = int(f.samplerate)
+        self.resample = force_down_to_16k and self.orig_sr > 16000
+        self.sr = 16000 if self.resample else self.orig_sr
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        rs = soxr.ResampleStream(self.orig_sr, 16000, 1, dtype="float32", quality=self.quality) if self.resample else None
+        blocksize = max(1, int(self.block_seconds * self.orig_sr))
+        if self._start is not None:
+            self.wav_path.seek(self._start)
+        with sf.SoundFile(self.wav_path) as f:
+            for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                y = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+                yield rs.resample_chunk(y) if rs is not None else y
+        if rs is not None:
+            yield rs.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def _db(S: np.ndarray, amin: float = 1e-10) -> np.ndarray:
+    return 10.0 * np.log10(np.maximum(amin, S))
+
+
+class MfccSummary:
+    """
+    24 MFCC/Δ/ΔΔ × (mean, std) (= extract_mfcc_144) acumulados a partir de blocos do |STFT|
+    pré-enfatizado. `peak` é o pico (dB) do piso top_db=80: o global, se já conhecido, ou -inf
+    para usar o pico visto até cada quadro (o resultado não depende do tamanho dos blocos).
+    result() pode ser chamado a qualquer momento (os deltas dos últimos quadros só entram
+    depois de finish()).
+    """
+
+    def __init__(self, sr: int, n_fft: int, n_mfcc: int = 24, n_mels: int = 64, peak: float = -np.inf):
+        self.band = safe_voice_band(sr, 100, 7200)
+        self.basis = mel_basis(sr, n_fft, n_mels, self.band[0], self.band[1], htk=True)
+        self.D = dct_matrix(n_mfcc, n_mels)
+        self.peak = peak
+        self.deltas = [StreamingDelta(1), StreamingDelta(2)]
+        self.stats = [RunningStats(n_mfcc) for _ in range(3)]
+
+    def mel_db(self, mag: np.ndarray) -> np.ndarray:
+        return _db(self.basis @ (mag ** 2))
+
+    def update(self, mag: np.ndarray) -> None:
+        S_db = self.mel_db(mag)
+        if S_db.shape[1] == 0:
+            return
+        peaks = np.maximum.accumulate(np.maximum(S_db.max(axis=0), self.peak))
+        self.peak = float(peaks[-1])
+        M = self.D @ np.maximum(S_db, peaks - 80.0)
+        self.stats[0].update(M)
+        for d, st in zip(self.deltas, self.stats[1:]):
+            st.update(d.push(M))
+
+    def finish(self) -> None:
+        for d, st in zip(self.deltas, self.stats[1:]):
+            st.update(d.flush())
+
+    def result(self) -> np.ndarray:
+        parts = []
+        for st in self.stats:
+            parts += [st.mean, st.std(ddof=1)]
+        return np.concatenate(parts).astype(np.float32)
+
+
+class LogMelSummary:
+    """
+    Log-Mel (dB com ref=np.max e top_db=80, ou PCEN) resumido em (mean, [std], [median]),
+    acumulado a partir de blocos do |STFT|. Em dB, referência e piso são aplicados em result()
+    a partir do Welford + sketch, que pode ser chamado a qualquer momento.
+    """
+
+    def __init__(self, sr: int, n_fft: int, n_bands: int, use_pcen: bool, want_std: bool, want_median: bool):
+        self.band = safe_voice_band(sr, 100, 7200)
+        self.basis = mel_basis(sr, n_fft, n_bands, self.band[0], self.band[1])
+        self.use_pcen, self.want_std, self.want_median = use_pcen, want_std, want_median
+        self.stats = RunningStats(n_bands)
+        # Em dB o sketch é necessário também para aplicar o piso top_db no final
+        self.sketch = (
+            QuantileSketch(n_bands, resolution=1e-3 if use_pcen else 0.01) if (want_median or not use_pcen) else None
+        )
+        self.zi = None
+        self.peak = -np.inf
+
+    def update(self, mag: np.ndarray) -> None:
+        if mag.shape[1] == 0:
+            return
+        S = self.basis @ mag
+        if self.use_pcen:
+            X, self.zi = dsp.pcen(
+                S * (2**31), time_constant=0.06, eps=1e-6, power=0.25, gain=0.98, bias=2.0,
+                zi=self.zi, return_zf=True,
+            )
+        else:
+            X = _db(S ** 2 + 1e-12)  # dB absoluto; ref=np.max é subtraído no final
+            self.peak = max(self.peak, float(X.max()))
+        self.stats.update(X)
+        if self.sketch is not None:
+            self.sketch.update(X)
+
+    def result(self) -> np.ndarray:
+        n = self.stats.n
+        size = self.stats.mean.shape[0] * (1 + self.want_std + self.want_median)
+        if n == 0:
+            return np.zeros(size, dtype=np.float32)
+        mean, std = self.stats.mean, self.stats.std(ddof=1)
+        med = self.sketch.median() if self.want_median else None
+        if not self.use_pcen:
+            floor = self.peak - 80.0
+            d_sum, d_sumsq = self.sketch.floor_correction(floor)
+            sumsq = self.stats.m2 + n * mean ** 2 + d_sumsq
+            mean = mean + d_sum / n
+            std = np.sqrt(np.maximum(sumsq - n * mean ** 2, 0.0) / (n - 1)) if n > 1 else np.zeros_like(mean)
+            mean = mean - self.peak
+            if self.want_median:
+                med = np.maximum(med, floor) - self.peak
+
+        parts = [mean] + ([std] if self.want_std else []) + ([med] if self.want_median else [])
+        return np.concatenate(parts).astype(np.float32)
+
+
+def _stream_mfcc(
+    src: BlockSource,
+    n_mfcc: int = 24,
+    n_mels: int = 64,
+    pre_emphasis: float = 0.97,
+    exact_floor: bool = True,
+):
+    sr = src.sr
+    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    summary = MfccSummary(sr, n_fft, n_mfcc, n_mels)
+
+    def mag_blocks():
+        pre, stft = PreEmphasis(pre_emphasis), StreamingSTFT(n_fft, hop)
+        for y in src:
+            yield stft.push(pre.push(y))
+        yield stft.flush()
+
+    # O piso top_db=80 depende do pico global: com exact_floor, uma primeira passada
+    # (sem DCT/deltas) encontra o pico; sem ela, usa-se o pico visto até o quadro atual.
+    if exact_floor:
+        for mag in mag_blocks():
+            S_db = summary.mel_db(mag)
+            if S_db.shape[1]:
+                summary.peak = max(summary.peak, float(S_db.max()))
+
+    for mag in mag_blocks():
+        summary.update(mag)
+    summary.finish()
+    return summary.result(), sr, summary.band
+
+
+def _stream_logmel(src: BlockSource, n_bands: int, use_pcen: bool, want_std: bool, want_median: bool):
+    """Log-Mel (dB com ref=np.max e top_db=80, ou PCEN) resumido em (mean, [std], [median])."""
+    sr = src.sr
+    n_fft, hop = stft_params_from_sr(sr, 25.0, 10.0)
+    summary = LogMelSummary(sr, n_fft, n_bands, use_pcen, want_std, want_median)
+    stft = StreamingSTFT(n_fft, hop)
+    for y in src:
+        summary.update(stft.push(y))
+    summary.update(stft.flush())
+    return summary.result(), sr, summary.band
+
+
+def extract_streaming(
+    wav_path,
+    mode: str = "mfcc",
+    use_pcen: bool = False,
+    force_down_to_16k: bool = True,
+    block_seconds: float = 10.0,
+    exact_floor: bool = True,
+    resampler: Optional[str] = None,
+) -> Tuple[np.ndarray, int, Tuple[int, int]]:
+    """
+    Versão em streaming (memória constante) dos modos vetoriais:
+      - mfcc:        24 MFCC/Δ/ΔΔ × (mean, std)   (= extract_mfcc_144)
+      - logmel:      48 bandas × (mean, std, median) (= extract_logmel_144)
+      - bio_mean144: 144 bandas × mean             (= extract_biometric_144 mean144)
+      - bio_mm72:    72 bandas × (mean, median)    (= extract_biometric_144 mean_median_72)
+    Retorna (features[144], sr, (fmin, fmax)). Ver tolerâncias no docstring do módulo.
+
+    exact_floor (só mfcc): faz uma passada extra (STFT + Mel, sem DCT/deltas) para achar o
+    pico global usado no piso top_db, como no caminho em memória. Com False, usa o pico
+    visto até o quadro atual (uma passada só; silêncio inicial pode divergir bastante).
+    """
+    src = BlockSource(wav_path, force_down_to_16k=force_down_to_16k, block_seconds=block_seconds, resampler=resampler)
+    if mode == "mfcc":
+        feat, sr, band = _stream_mfcc(src, exact_floor=exact_floor)
+    elif mode == "logmel":
+        feat, sr, band = _stream_logmel(src, 48, use_pcen, want_std=True, want_median=True)
+    elif mode == "bio_mean144":
+        feat, sr, band = _stream_logmel(src, 144, use_pcen, want_std=False, want_median=False)
+    elif mode == "bio_mm72":
+        feat, sr, band = _stream_logmel(src, 72, use_pcen, want_std=False, want_median=True)
+    else:
+        raise ValueError(f"mode {mode!r} has no streaming path (use one of {STREAM_MODES})")
+    assert feat.shape[0] == 144
+    return feat, sr, band
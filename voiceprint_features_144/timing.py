@@ -0,0 +1,78 @@
+"""
+Cronômetros por estágio (decode, resample, stft, mel, delta, pitch...) dentro dos extratores.
+
+    with collect_timings() as t:
+        extract_mode("voz.wav", "health_matrix")
+    t.stages  # {"decode": 0.004, "resample": 0.002, "stft": 0.011, ...} em segundos
+
+Os extratores marcam os estágios com `with stage("nome"):`. Sem um collect_timings ativo
+no contexto atual, stage() devolve um context manager nulo compartilhado (uma leitura de
+ContextVar por estágio, sem relógio nem alocação). Estágios aninhados (ex.: stft calculado
+sob demanda dentro de mel) contam só o tempo próprio: o filho é descontado do pai, e a soma
+dos estágios nunca passa do tempo total. O estado fica num ContextVar: threads e jobs em
+background não enxergam o cronômetro de outra requisição.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+_current: ContextVar[Optional["StageTimer"]] = ContextVar("voiceprint_stage_timer", default=None)
+_NULL = nullcontext()
+
+
+class StageTimer:
+    """Acumula o tempo próprio (segundos) de cada estágio e anotações simples (ex.: orig_sr)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.notes: Dict[str, Any] = {}
+        self._children: List[float] = []  # tempo dos filhos de cada estágio aberto (pilha)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._children.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            children = self._children.pop()
+            self.stages[name] = self.stages.get(name, 0.0) + (elapsed - children)
+            if self._children:
+                self._children[-1] += elapsed
+
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    def as_ms(self) -> Dict[str, float]:
+        """Estágios em milissegundos (3 casas), na ordem em que apareceram."""
+        return {k: round(v * 1000.0, 3) for k, v in self.stages.items()}
+
+
+def stage(name: str):
+    """Context manager de um estágio; sem collect_timings ativo, não mede nada."""
+    timer = _current.get()
+    return _NULL if timer is None else timer.stage(name)
+
+
+def note(key: str, value: Any) -> None:
+    """Anota um valor no cronômetro ativo (no-op quando desligado)."""
+    timer = _current.get()
+    if timer is not None:
+        timer.notes[key] = value
+
+
+def active() -> Optional[StageTimer]:
+    return _current.get()
+
+
+@contextmanager
+def collect_timings(timer: Optional[StageTimer] = None) -> Iterator[StageTimer]:
+    """Liga a medição por estágio no contexto atual; devolve o StageTimer preenchido."""
+    timer = timer or StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
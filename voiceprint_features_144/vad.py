@@ -0,0 +1,75 @@
+"""
+Detecção de atividade de voz (VAD) por energia e planicidade espectral, no |STFT| que o
+extrator já calculou (não toca o sinal de novo).
+
+Um quadro tem voz quando:
+  - a energia (média de |X|² no quadro) está a menos de VAD_DB dB do quadro mais forte e
+    VAD_SNR_DB acima do piso de ruído (percentil VAD_FLOOR_PERCENTILE da energia), e
+  - a planicidade espectral (média geométrica / média aritmética de |X|²) fica abaixo de
+    VAD_FLATNESS: ruído branco fica perto de 0.56, trechos harmônicos bem abaixo disso.
+Os quadros com voz são estendidos por VAD_HANGOVER_MS para cada lado (não corta ataques,
+finais de sílaba e consoantes surdas entre vogais). Se sobrarem menos de VAD_MIN_FRAMES
+quadros (gravação toda em silêncio/ruído), nada é descartado.
+
+Com vad=True, os modos vetoriais calculam Mel/PCEN/dB/DCT/deltas e o pooling só nesses
+quadros. Os trechos com voz ficam colados no tempo, então deltas e PCEN veem uma
+descontinuidade em cada corte. Economia e desvio em relação ao caminho sem VAD:
+benchmarks/vad.py.
+"""
+from typing import Optional
+import numpy as np
+import scipy.ndimage
+
+from .common_adaptive import DELTA_WIDTH
+
+VAD_DB = 40.0             # quadros mais de VAD_DB abaixo do mais forte são silêncio
+VAD_SNR_DB = 6.0          # ... e os que não passam do piso de ruído + VAD_SNR_DB
+VAD_FLOOR_PERCENTILE = 10  # piso de ruído: percentil da energia dos quadros
+VAD_FLATNESS = 0.5        # planicidade acima disso é ruído
+VAD_HANGOVER_MS = 100.0   # margem mantida em volta de cada trecho com voz
+VAD_MIN_FRAMES = DELTA_WIDTH  # menos quadros que isso: mantém todos (deltas precisam de DELTA_WIDTH)
+
+
+def _deemphasis_weights(n_bins: int, pre_emphasis: Optional[float]) -> np.ndarray:
+    """|1 - coef e^{-jω}|⁻² por bin: desfaz a pré-ênfase na potência (pesos 1 sem pré-ênfase)."""
+    if not pre_emphasis:
+        return np.ones(n_bins, dtype=np.float32)
+    w = np.linspace(0.0, np.pi, n_bins)
+    return (1.0 / np.abs(1.0 - pre_emphasis * np.exp(-1j * w)) ** 2).astype(np.float32)
+
+
+def voice_activity(
+    mag: np.ndarray,
+    sr: int,
+    hop: int,
+    pre_emphasis: Optional[float] = None,
+    vad_db: float = VAD_DB,
+    snr_db: float = VAD_SNR_DB,
+    flatness: float = VAD_FLATNESS,
+    hangover_ms: float = VAD_HANGOVER_MS,
+) -> np.ndarray:
+    """
+    Máscara booleana (T,) dos quadros com voz de um |STFT| (1 + n_fft//2, T).
+    pre_emphasis: coeficiente usado no sinal do STFT; energia e planicidade são medidas no
+    espectro sem pré-ênfase (pesos por bin), então a máscara quase não depende dela.
+    """
+    T = mag.shape[1]
+    if T == 0:
+        return np.zeros(0, dtype=bool)
+    w2 = _deemphasis_weights(mag.shape[0], pre_emphasis)
+    energy = (w2 @ (mag * mag)) / mag.shape[0] + 1e-20
+    energy_db = 10.0 * np.log10(energy)
+    floor_db = np.percentile(energy_db, VAD_FLOOR_PERCENTILE)
+    voiced = energy_db > max(energy_db.max() - vad_db, floor_db + snr_db)
+
+    # planicidade só nos quadros com energia; média geométrica via média de log|X|
+    loud = np.flatnonzero(voiced)
+    log_geo = 2.0 * np.log(mag[:, loud] + 1e-10).mean(axis=0) + np.log(w2).mean()
+    voiced[loud] = np.exp(log_geo) / energy[loud] < flatness
+
+    hang = int(round(hangover_ms / 1000.0 * sr / hop))
+    if hang > 0 and voiced.any():
+        voiced = scipy.ndimage.binary_dilation(voiced, iterations=hang)
+    if voiced.sum() < min(VAD_MIN_FRAMES, T):
+        voiced[:] = True
+    return voiced
@@ -0,0 +1,126 @@
+"""
+Aquecimento: roda todos os modos num sinal sintético curto para pagar, fora de uma requisição,
+os custos da primeira chamada (compilação numba do librosa/resampy, planos de FFT, imports
+tardios de scipy/soxr).
+
+Sem cache do numba, a primeira extração de um processo novo leva segundos: o front-end (STFT,
+pré-ênfase, reamostragem) e o YIN do health_matrix compilam na primeira chamada. Com
+NUMBA_CACHE_DIR apontando para um diretório gravável e persistente (lido pelo numba quando ele é
+importado, antes deste módulo), as funções compiladas vão para disco e o próximo processo só as
+carrega; `python -m voiceprint_features_144.warmup` no build da imagem deixa esse cache pronto.
+
+Uso:
+    python -m voiceprint_features_144.warmup [--rates 16000 48000] [--seconds 1.0]
+"""
+import argparse
+import io
+import json
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import soundfile as sf
+
+from .analysis import AudioAnalysis
+from .modes import ALL_MODES, MATRIX_MODES, PCEN_MODES, VECTOR_MODES, extract_mode
+from .pitch import DEFAULT_PITCH, PITCH_ESTIMATORS
+from .resample import DEFAULT_RESAMPLER, RESAMPLERS
+
+WARMUP_RATES = (16000, 48000)  # 16 kHz nativo e um caminho com reamostragem
+WARMUP_SECONDS = 1.0
+WARMUP_FRAMES = 64             # n_frames dos modos temporais no aquecimento
+
+
+def warmup_signal(sr: int, seconds: float = WARMUP_SECONDS) -> np.ndarray:
+    """Tom harmônico com envelope silábico e ruído leve (o VAD encontra voz e silêncio)."""
+    t = np.arange(int(sr * seconds)) / sr
+    f0 = 150 + 20 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, 12) if k * 180 < sr / 2)
+    env = np.clip(np.sin(2 * np.pi * 2 * t), 0, None)
+    noise = 0.002 * np.random.default_rng(0).normal(size=t.size)
+    return (0.1 * y * env + noise).astype(np.float32)
+
+
+def numba_cache_dir() -> Optional[str]:
+    """Diretório de cache em disco do numba (NUMBA_CACHE_DIR) ou None se não configurado."""
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.config.CACHE_DIR or None
+
+
+def warmup(
+    modes: Iterable[str] = ALL_MODES,
+    rates: Iterable[int] = WARMUP_RATES,
+    resamplers: Iterable[str] = (DEFAULT_RESAMPLER,),
+    pitches: Iterable[str] = (DEFAULT_PITCH,),
+    seconds: float = WARMUP_SECONDS,
+) -> Dict[str, float]:
+    """
+    Executa cada modo (com e sem PCEN, com e sem VAD nos vetoriais, e o caminho em blocos)
+    em cada taxa de `rates` e retorna o tempo de cada etapa em segundos.
+    As taxas acima de 16 kHz passam por cada motor de `resamplers`; o health_matrix roda com
+    cada estimador de `pitches`. A primeira etapa decodifica um .wav em memória (soundfile).
+    """
+    modes, pitches = list(modes), list(pitches)
+    timings: Dict[str, float] = {}
+
+    def step(name: str, fn) -> None:
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - t0, 4)
+
+    for sr in rates:
+        y = warmup_signal(sr, seconds)
+        buf = io.BytesIO()
+        sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+        for resampler in (resamplers if sr > 16000 else [DEFAULT_RESAMPLER]):
+            tag = f"{sr}" if sr <= 16000 else f"{sr}/{resampler}"
+            holder = {}
+
+            def front_end():
+                buf.seek(0)
+                an = AudioAnalysis.from_file(buf, resampler=resampler)
+                an.magnitude(0.97)
+                an.magnitude()
+                holder["an"] = an
+
+            step(f"{tag}/front_end", front_end)
+            an = holder["an"]
+            for mode in modes:
+                for pcen in ((False, True) if mode in PCEN_MODES else (False,)):
+                    name = f"{tag}/{mode}" + ("+pcen" if pcen else "")
+                    if mode in MATRIX_MODES:
+                        for pitch in (pitches if mode == "health_matrix" else [None]):
+                            step(name + (f"/{pitch}" if pitch else ""), lambda: extract_mode(
+                                an, mode, use_pcen=pcen, n_frames=WARMUP_FRAMES, pitch=pitch))
+                    else:
+                        step(name, lambda: extract_mode(an, mode, use_pcen=pcen))
+                        step(name + "+vad", lambda: extract_mode(an, mode, use_pcen=pcen, vad=True))
+        if any(m in VECTOR_MODES for m in modes):
+            step(f"{sr}/stream", lambda: extract_mode(buf.getvalue(), "mfcc", stream=True))
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run every mode once on a synthetic signal (numba JIT / cache warm-up).")
+    ap.add_argument("--rates", type=int, nargs="+", default=list(WARMUP_RATES))
+    ap.add_argument("--seconds", type=float, default=WARMUP_SECONDS)
+    ap.add_argument("--all", action="store_true", help="Every resampler and pitch estimator, not only the defaults")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    timings = warmup(
+        rates=args.rates,
+        resamplers=RESAMPLERS if args.all else (DEFAULT_RESAMPLER,),
+        pitches=PITCH_ESTIMATORS if args.all else (DEFAULT_PITCH,),
+        seconds=args.seconds,
+    )
+    print(json.dumps({"total_s": round(time.perf_counter() - t0, 3), "numba_cache_dir": numba_cache_dir(),
+                      "steps": timings}, indent=2))
+
+
+if __name__ == "__main__":
+    main()